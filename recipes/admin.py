@@ -6,7 +6,8 @@ the basic admin configuration used for each model.
 
 from django.contrib import admin
 
-from .models import Recipe, Comment, Rating
+from . import slugs
+from .models import Recipe, Comment, Rating, Tag
 
 
 @admin.register(Recipe)
@@ -14,7 +15,8 @@ class RecipeAdmin(admin.ModelAdmin):
     """Admin configuration for :class:`recipes.models.Recipe`.
 
     Shows title/author/status in list view and prepopulates the slug from
-    the title for convenience.
+    the title for convenience.  A slug left blank is allocated on save the
+    same way ``recipe_create`` does it (see :mod:`recipes.slugs`).
     """
 
     list_display = ("title", "author", "status", "created_at")
@@ -22,6 +24,23 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ("title", "description", "ingredients", "steps")
     prepopulated_fields = {"slug": ("title",)}
 
+    def get_form(self, request, obj=None, **kwargs):
+        """Let the slug be left blank on new recipes."""
+        form = super().get_form(request, obj, **kwargs)
+        if obj is None and "slug" in form.base_fields:
+            form.base_fields["slug"].required = False
+            form.base_fields["slug"].help_text = (
+                "Leave blank to generate a unique slug from the title."
+            )
+        return form
+
+    def save_model(self, request, obj, form, change):
+        """Allocate a unique slug for new recipes saved without one."""
+        if not change and not obj.slug:
+            slugs.save_with_unique_slug(obj)
+        else:
+            super().save_model(request, obj, form, change)
+
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -39,3 +58,11 @@ class RatingAdmin(admin.ModelAdmin):
     list_display = ("recipe", "user", "stars", "created_at")
     list_filter = ("stars", "created_at")
     search_fields = ("recipe__title", "user__username")
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    """Admin configuration for :class:`recipes.models.Tag`."""
+
+    list_display = ("name", "slug")
+    search_fields = ("name", "slug")
@@ -0,0 +1,310 @@
+"""Read-only JSON API for the recipe catalogue.
+
+Endpoints (GET only, no authentication, published recipes only):
+
+- ``api/recipes/``: the recipe list, with the HTML list's ``?q=`` and
+  ``?tag=`` filters and ``?sort=`` orders;
+- ``api/recipes/<slug>/``: one recipe;
+- ``api/recipes/<slug>/comments/``: its approved comments, oldest first;
+- ``api/recipes/<slug>/ratings/``: its rating count, average and
+  distribution of stars.
+
+Objects are serialized straight from ``.values()`` rows.  Each public field
+in :data:`RECIPE_FIELDS` / :data:`COMMENT_FIELDS` names the columns it
+reads, so a request selects only the columns of the fields it asks for
+(``?fields=id,title``) and no model instances are built.  Lists are
+paginated with signed keyset cursors (``?cursor=``, ``?limit=``) and link
+their ``next``/``previous`` pages.
+
+Responses do not depend on who asks, so they are ``public`` and may be
+cached for ``RECIPE_API_MAX_AGE`` seconds.  Their ``ETag`` is derived from
+the state they are built from (the list generation of
+:mod:`recipes.caching`, or the recipe's ``cache_version``) and checked
+before anything is serialized.  Serialized list pages are also kept in the
+cache for that generation, so a repeated list request runs no query.
+"""
+
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from . import caching
+from .conditional import make_etag
+from .models import STARS, Comment, Recipe, normalize_tags
+from .pagination import CursorPaginator, InvalidCursor
+from .views import filter_recipes
+
+API_KEY_PREFIX = "recipes:api"
+
+
+class ApiError(Exception):
+    """A bad request, answered with a 400 and ``{"error": message}``."""
+
+
+class Field:
+    """A public field: the ``.values()`` columns it reads and how to render them."""
+
+    def __init__(self, *columns, render=None):
+        self.columns = columns
+        self.render = render or (lambda row: row[columns[0]])
+
+
+def _lines(column) -> Field:
+    """A text column as a list of its non-blank lines."""
+
+    def render(row):
+        return [line.strip() for line in row[column].splitlines() if line.strip()]
+
+    return Field(column, render=render)
+
+
+def _image_url(row):
+    name = row["image"]
+    return Recipe._meta.get_field("image").storage.url(name) if name else None
+
+
+def _average(row) -> float:
+    count = row["rating_count"]
+    return round(row["rating_sum"] / count, 1) if count else 0
+
+
+RECIPE_FIELDS = {
+    "id": Field("id"),
+    "slug": Field("slug"),
+    "url": Field(
+        "slug", render=lambda row: reverse("api_recipe_detail", args=[row["slug"]])
+    ),
+    "title": Field("title"),
+    "excerpt": Field("excerpt"),
+    "author": Field("author__username"),
+    "tags": Field(
+        "tags", render=lambda row: list(normalize_tags(row["tags"]).values())
+    ),
+    "prep_minutes": Field("prep_minutes"),
+    "cook_minutes": Field("cook_minutes"),
+    "servings": Field("servings"),
+    "image": Field("image", render=_image_url),
+    "rating_count": Field("rating_count"),
+    "average_rating": Field("rating_count", "rating_sum", render=_average),
+    "comment_count": Field("approved_comment_count"),
+    "created_at": Field("created_at"),
+    "updated_at": Field("updated_at"),
+    "description": Field("description"),
+    "ingredients": _lines("ingredients"),
+    "steps": _lines("steps"),
+}
+
+# What the list returns without ?fields= (the detail returns every field).
+LIST_FIELDS = tuple(
+    name for name in RECIPE_FIELDS
+    if name not in ("description", "ingredients", "steps")
+)
+
+COMMENT_FIELDS = {
+    "id": Field("id"),
+    "user": Field("user__username"),
+    "body": Field("body"),
+    "created_at": Field("created_at"),
+}
+
+
+def api_view(view):
+    """Serve ``view`` for GET/HEAD only and answer errors with JSON bodies."""
+
+    @require_safe
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        except Http404:
+            return JsonResponse({"error": "Not found."}, status=404)
+
+    return wrapped
+
+
+# ---------- request parsing ----------
+
+
+def _requested_fields(request, available, default) -> list[str]:
+    """The ``?fields=`` names (in order, without repeats), or ``default``."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(default)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown) or raw}.")
+    return names
+
+
+def _limit(request) -> int:
+    raw = request.GET.get("limit")
+    if not raw:
+        return settings.RECIPE_API_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.RECIPE_API_MAX_PAGE_SIZE:
+        raise ApiError(
+            f"limit must be between 1 and {settings.RECIPE_API_MAX_PAGE_SIZE}."
+        )
+    return limit
+
+
+def _query_state(request):
+    """The query string as a stable value for ETags and cache keys."""
+    return sorted(request.GET.lists())
+
+
+# ---------- serialization ----------
+
+
+def _columns(fields, available, *extra) -> list[str]:
+    """The ``.values()`` columns ``fields`` read, plus ``extra``, each once."""
+    columns = dict.fromkeys(extra)
+    for name in fields:
+        columns.update(dict.fromkeys(available[name].columns))
+    return list(columns)
+
+
+def _serialize(row, fields, available) -> dict:
+    return {name: available[name].render(row) for name in fields}
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query["cursor"] = cursor
+    return f"{request.path}?{query.urlencode()}"
+
+
+def _paginated(request, rows, fields, available, limit, ordering=None) -> dict:
+    """One cursor page of the ``.values()`` queryset ``rows``, serialized."""
+    paginator = CursorPaginator(rows, limit, ordering)
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise ApiError("Invalid cursor.")
+    return {
+        "results": [_serialize(row, fields, available) for row in page],
+        "next": _page_url(request, page.next_cursor),
+        "previous": _page_url(request, page.previous_cursor),
+    }
+
+
+def _json_response(request, etag, build):
+    """A 304 when the client already has ``etag``, else the body ``build()`` returns."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(build(), content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.RECIPE_API_MAX_AGE)
+    return response
+
+
+def _recipe_row(slug, *columns) -> dict:
+    row = Recipe.objects.filter(slug=slug, status="published").values(*columns).first()
+    if row is None:
+        raise Http404("No such recipe.")
+    return row
+
+
+# ---------- endpoints ----------
+
+
+@api_view
+def recipe_list(request):
+    """Published recipes in ``?sort=`` order, else newest (or best match) first."""
+    fields = _requested_fields(request, RECIPE_FIELDS, LIST_FIELDS)
+    limit = _limit(request)
+    etag = make_etag(
+        "api-list", caching.list_generation(request), _query_state(request)
+    )
+
+    def build():
+        key = f"{API_KEY_PREFIX}:list:{etag}"
+        body = cache.get(key)
+        if body is None:
+            get = request.GET.get
+            recipes = filter_recipes(
+                Recipe.objects.filter(status="published"),
+                get("q"), get("tag"), get("sort"),
+            )
+            # the ordering keys, for the cursors
+            keys = [name.lstrip("-") for name in recipes.query.order_by]
+            keys = keys or ["created_at"]
+            rows = recipes.values(*_columns(fields, RECIPE_FIELDS, *keys, "id"))
+            body = _dumps(_paginated(request, rows, fields, RECIPE_FIELDS, limit))
+            cache.set(key, body, caching.page_cache_timeout())
+        return body
+
+    return _json_response(request, etag, build)
+
+
+@api_view
+def recipe_detail(request, slug):
+    """One published recipe."""
+    fields = _requested_fields(request, RECIPE_FIELDS, RECIPE_FIELDS)
+    columns = _columns(fields, RECIPE_FIELDS, "cache_version", "updated_at")
+    row = _recipe_row(slug, *columns)
+    etag = make_etag(
+        "api-detail", slug, row["cache_version"], row["updated_at"], fields
+    )
+    return _json_response(
+        request, etag, lambda: _dumps(_serialize(row, fields, RECIPE_FIELDS))
+    )
+
+
+@api_view
+def recipe_comments(request, slug):
+    """A published recipe's approved comments, oldest first."""
+    fields = _requested_fields(request, COMMENT_FIELDS, COMMENT_FIELDS)
+    limit = _limit(request)
+    recipe = _recipe_row(slug, "id", "cache_version")
+    # approving, editing or removing a visible comment bumps cache_version
+    etag = make_etag(
+        "api-comments", recipe["id"], recipe["cache_version"], _query_state(request)
+    )
+
+    def build():
+        rows = Comment.objects.filter(recipe_id=recipe["id"], approved=True).values(
+            *_columns(fields, COMMENT_FIELDS, "created_at", "id")
+        )
+        return _dumps(
+            _paginated(
+                request, rows, fields, COMMENT_FIELDS, limit,
+                ordering=["created_at", "id"],
+            )
+        )
+
+    return _json_response(request, etag, build)
+
+
+@api_view
+def recipe_ratings(request, slug):
+    """A published recipe's rating count, average and number of ratings per star."""
+    histogram = [f"ratings_{star}" for star in STARS]
+    recipe = _recipe_row(
+        slug, "id", "cache_version", "rating_count", "rating_sum", *histogram
+    )
+    etag = make_etag("api-ratings", recipe["id"], recipe["cache_version"])
+    return _json_response(request, etag, lambda: _dumps({
+        "count": recipe["rating_count"],
+        "average": _average(recipe),
+        "distribution": {str(star): recipe[f"ratings_{star}"] for star in STARS},
+    }))
@@ -11,7 +11,7 @@ class RecipesConfig(AppConfig):
     """Django AppConfig for the `recipes` app.
 
     When the app is ready we import ``recipes.signals`` which registers
-    handlers for user login/logout messaging.
+    handlers for user login/logout messaging and derived model data.
     """
 
     default_auto_field = 'django.db.models.BigAutoField'
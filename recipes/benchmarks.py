@@ -0,0 +1,383 @@
+"""Latency and query-count benchmarks for the main recipe views.
+
+Each :class:`Benchmark` names a request (method, URL, logged-in user and
+POST data) plus two budgets: the most SQL queries it may run and the
+latency it should stay under.  :func:`run` times every benchmark against a
+seeded dataset and returns a JSON-serializable report; the ``benchmark``
+management command runs it on a throwaway database, writes the report and
+fails when a view goes over its query budget.  Query counts are
+deterministic, so that budget is enforced; latency depends on the machine
+and is only reported (unless asked otherwise) so runs can be compared
+across commits.
+
+Every request runs with an empty cache and the anonymous page cache off,
+so the numbers are for the cold path a cache miss takes.  Each result
+records the response size too, and the JSON API benchmarks name the HTML
+view they stand in for (``versus``), so the report's ``api_vs_html``
+section compares their payload size and latency side by side.
+
+:func:`throughput` compares the WSGI and ASGI serving paths of the read
+views: it keeps ``concurrency`` requests in flight (threads through the
+sync views, tasks through the async views) and reports requests per
+second.  Fragments stay cached between those requests, as they would on a
+live site, while the page cache remains off.
+"""
+
+import asyncio
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import counters, search
+from .models import Comment, Rating, Recipe, sort_columns
+from .views import RecipeListView
+
+User = get_user_model()
+
+# One per-recipe topic so ?q= and ?tag= have something to select on.
+TOPICS = ["chicken", "pasta", "salad", "curry", "soup", "cake", "bread", "tofu"]
+
+DEFAULT_DATASET = {
+    "users": 50,
+    "recipes": 2000,
+    "comments": 200,  # approved comments on the recipe the detail page shows
+    "pending_comments": 100,
+}
+
+
+class Benchmark:
+    """A request to time and the budgets it must stay within."""
+
+    def __init__(
+        self, name, url, max_queries, max_ms, method="GET", user=None, data=None, versus=None
+    ):
+        self.name = name
+        self.url = url  # callable(fixtures) -> str
+        self.max_queries = max_queries
+        self.max_ms = max_ms
+        self.method = method
+        self.user = user  # None, "member" or "staff"
+        self.data = data or {}
+        self.versus = versus  # name of the HTML benchmark this one replaces
+
+    def __repr__(self):
+        return f"<Benchmark {self.name}>"
+
+
+def _last_page(fixtures):
+    return f"{reverse('recipe_list')}?page={fixtures['last_page']}"
+
+
+def _detail(fixtures):
+    return reverse("recipe_detail", args=[fixtures["hot_slug"]])
+
+
+def _api_list(**params):
+    params["limit"] = RecipeListView.paginate_by
+    return f"{reverse('api_recipe_list')}?{urlencode(params)}"
+
+
+BENCHMARKS = [
+    # list generation, count, page, tags prefetch, facets
+    Benchmark("recipe_list", lambda f: reverse("recipe_list"), 5, 150),
+    Benchmark("recipe_list_search", lambda f: f"{reverse('recipe_list')}?q=chicken", 5, 250),
+    Benchmark("recipe_list_tag", lambda f: f"{reverse('recipe_list')}?tag=chicken", 5, 150),
+    Benchmark("recipe_list_deep_page", _last_page, 5, 250),
+    # recipe with author, comments with their authors
+    Benchmark("recipe_detail", _detail, 2, 150),
+    # session, user, pending counts (2), the queue's highest id, one page with
+    # recipe and user joined
+    Benchmark("pending_comments", lambda f: reverse("pending_comments"), 6, 150, user="staff"),
+    # session, user, recipe with own stars, update_or_create + counter/version
+    # writes, list generation
+    Benchmark("rate_recipe", _detail, 11, 150, method="POST", user="member", data={"rating": "4"}),
+    # session, user, recipe with own stars, insert
+    Benchmark(
+        "post_comment", _detail, 4, 150, method="POST", user="member",
+        data={"body": "Benchmark comment"},
+    ),
+    # JSON API, same page size as the HTML list: list generation and one
+    # projected page query, no count and no facets
+    Benchmark("api_recipe_list", lambda f: _api_list(), 2, 100, versus="recipe_list"),
+    Benchmark(
+        "api_recipe_list_sparse", lambda f: _api_list(fields="id,title,url"),
+        2, 100, versus="recipe_list",
+    ),
+    Benchmark(
+        "api_recipe_list_search", lambda f: _api_list(q="chicken"),
+        2, 200, versus="recipe_list_search",
+    ),
+    Benchmark(
+        "api_recipe_list_tag", lambda f: _api_list(tag="chicken"), 2, 100, versus="recipe_list_tag"
+    ),
+    Benchmark(
+        "api_recipe_detail", lambda f: reverse("api_recipe_detail", args=[f["hot_slug"]]),
+        1, 100, versus="recipe_detail",
+    ),
+    # recipe state, one page of comments
+    Benchmark(
+        "api_recipe_comments", lambda f: reverse("api_recipe_comments", args=[f["hot_slug"]]),
+        2, 100,
+    ),
+]
+
+
+# Read views timed under concurrency by :func:`throughput`.
+THROUGHPUT_VIEWS = {
+    "recipe_list": lambda f: reverse("recipe_list"),
+    "recipe_detail": _detail,
+}
+
+
+# ---------- dataset ----------
+
+
+def seed(users=50, recipes=2000, comments=200, pending_comments=100, batch_size=500):
+    """Bulk-create a synthetic dataset and return the fixtures benchmarks need.
+
+    Rows are inserted with ``bulk_create`` (no signals), so the derived data
+    (tags, search index, counters) is rebuilt in bulk afterwards.
+    """
+    password = make_password("benchmark")
+    User.objects.bulk_create(
+        [User(username=f"bench{i}", password=password) for i in range(users)],
+        batch_size=batch_size,
+    )
+    people = list(User.objects.filter(username__startswith="bench").order_by("pk"))
+    staff = User.objects.create_user(username="bench-staff", password="benchmark", is_staff=True)
+
+    ingredients = "\n".join(f"Ingredient {n}" for n in range(8))
+    Recipe.objects.bulk_create(
+        [
+            Recipe(
+                author=people[i % len(people)],
+                title=f"{TOPICS[i % len(TOPICS)].title()} recipe {i}",
+                slug=f"bench-{i}",
+                excerpt=f"Benchmark recipe number {i}.",
+                description=f"A {TOPICS[i % len(TOPICS)]} dish used for benchmarking.",
+                ingredients=ingredients,
+                steps="\n".join(f"Step {n}" for n in range(5)),
+                tags=f"{TOPICS[i % len(TOPICS)]}, benchmark",
+                prep_minutes=i % 30,
+                cook_minutes=i % 60,
+                status="published",
+                **sort_columns(i % 30, i % 60, ingredients),
+            )
+            for i in range(recipes)
+        ],
+        batch_size=batch_size,
+    )
+    hot = Recipe.objects.get(slug="bench-0")
+    Comment.objects.bulk_create(
+        [
+            Comment(recipe=hot, user=people[i % len(people)], body=f"Comment {i}", approved=True)
+            for i in range(comments)
+        ]
+        + [
+            Comment(recipe=hot, user=people[i % len(people)], body=f"Pending {i}", approved=False)
+            for i in range(pending_comments)
+        ],
+        batch_size=batch_size,
+    )
+    Rating.objects.bulk_create(
+        [Rating(recipe=hot, user=person, stars=1 + i % 5) for i, person in enumerate(people[1:])],
+        batch_size=batch_size,
+    )
+
+    for recipe in Recipe.objects.filter(slug__startswith="bench-").iterator():
+        recipe.sync_tags()
+    search.rebuild_index()
+    counters.recount()
+
+    per_page = RecipeListView.paginate_by
+    return {
+        "hot_slug": hot.slug,
+        "last_page": max(1, -(-recipes // per_page)),
+        "member": people[0],
+        "staff": staff,
+    }
+
+
+# ---------- running ----------
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_benchmark(benchmark, fixtures, repeat=5):
+    """Time ``benchmark`` ``repeat`` times and return its report entry."""
+    client = Client()
+    if benchmark.user:
+        client.force_login(fixtures[benchmark.user])
+    url = benchmark.url(fixtures)
+    send = client.post if benchmark.method == "POST" else client.get
+
+    timings = []
+    queries = 0
+    status = None
+    size = 0
+    for _ in range(repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = send(url, benchmark.data)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, len(ctx.captured_queries))
+        status = response.status_code
+        size = len(response.content)
+
+    return {
+        "name": benchmark.name,
+        "method": benchmark.method,
+        "url": url,
+        "status": status,
+        "bytes": size,
+        "queries": queries,
+        "max_queries": benchmark.max_queries,
+        "within_query_budget": queries <= benchmark.max_queries,
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "latency_budget_ms": benchmark.max_ms,
+        "within_latency_budget": statistics.median(timings) <= benchmark.max_ms,
+        "versus": benchmark.versus,
+    }
+
+
+def versus(results):
+    """Pair each result with the one it names in ``versus``: size and latency ratios."""
+    by_name = {r["name"]: r for r in results}
+    pairs = []
+    for result in results:
+        other = by_name.get(result.get("versus"))
+        if other is None:
+            continue
+        pairs.append({
+            "name": result["name"],
+            "versus": other["name"],
+            "bytes": result["bytes"],
+            "versus_bytes": other["bytes"],
+            "bytes_ratio": round(result["bytes"] / other["bytes"], 3) if other["bytes"] else None,
+            "median_ms": result["median_ms"],
+            "versus_median_ms": other["median_ms"],
+            "speedup": (
+                round(other["median_ms"] / result["median_ms"], 2) if result["median_ms"] else None
+            ),
+        })
+    return pairs
+
+
+def _wsgi_throughput(url, concurrency, requests):
+    """Statuses of ``requests`` GETs spread over ``concurrency`` threads."""
+
+    def worker(count):
+        client = Client()
+        try:
+            return [client.get(url).status_code for _ in range(count)]
+        finally:
+            connections.close_all()
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [status for statuses in pool.map(worker, shares) for status in statuses]
+
+
+async def _asgi_throughput(url, concurrency, requests):
+    """Statuses of ``requests`` GETs with at most ``concurrency`` tasks in flight."""
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch():
+        # as ASGIHandler does, give each request its own thread for sync code
+        async with slots, ThreadSensitiveContext():
+            try:
+                return (await client.get(url)).status_code
+            finally:
+                await sync_to_async(connections.close_all)()
+
+    return await asyncio.gather(*(fetch() for _ in range(requests)))
+
+
+def throughput(fixtures, concurrency=20, requests=200):
+    """Requests per second of each read view under WSGI and under ASGI."""
+    results = []
+    for name, url in THROUGHPUT_VIEWS.items():
+        url = url(fixtures)
+        for server in ("wsgi", "asgi"):
+            start = time.perf_counter()
+            if server == "wsgi":
+                statuses = _wsgi_throughput(url, concurrency, requests)
+            else:
+                with override_settings(ROOT_URLCONF="recipesite.urls_async"):
+                    statuses = asyncio.run(_asgi_throughput(url, concurrency, requests))
+            seconds = time.perf_counter() - start
+            results.append({
+                "name": name,
+                "server": server,
+                "concurrency": concurrency,
+                "requests": requests,
+                "errors": sum(1 for status in statuses if status >= 400),
+                "seconds": round(seconds, 3),
+                "requests_per_s": round(requests / seconds, 1),
+            })
+    return results
+
+
+def run(benchmarks=None, dataset=None, repeat=5, only=None, concurrency=0, requests=200):
+    """Seed ``dataset``, run the benchmarks and return the full report.
+
+    With ``concurrency`` set the report also has a ``throughput`` section
+    (see :func:`throughput`).
+    """
+    dataset = {**DEFAULT_DATASET, **(dataset or {})}
+    benchmarks = BENCHMARKS if benchmarks is None else benchmarks
+    if only:
+        benchmarks = [b for b in benchmarks if b.name in only]
+
+    fixtures = seed(**dataset)
+    with override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0):
+        results = [run_benchmark(b, fixtures, repeat=repeat) for b in benchmarks]
+        cache.clear()
+        concurrent = throughput(fixtures, concurrency, requests) if concurrency else []
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "dataset": dataset,
+        "repeat": repeat,
+        "results": results,
+    }
+    pairs = versus(results)
+    if pairs:
+        report["api_vs_html"] = pairs
+    if concurrent:
+        report["throughput"] = concurrent
+    return report
+
+
+def compare(report, baseline):
+    """Yield ``(name, metric, before, after)`` for the metrics both reports have."""
+    before = {r["name"]: r for r in baseline.get("results", [])}
+    for result in report["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        for metric in ("queries", "bytes", "median_ms", "p95_ms"):
+            if metric in old and metric in result:
+                yield result["name"], metric, old[metric], result[metric]
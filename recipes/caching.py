@@ -0,0 +1,261 @@
+"""Caching for rendered recipe fragments and anonymous pages.
+
+Templates cache recipe cards and detail-page sections with ``{% cache %}``
+keyed on the recipe id plus ``Recipe.cache_version``.  The version is
+read from the same row the page already loads, so a fragment is only ever
+served for the exact version it was rendered from: bumping the version
+makes the old entry unreachable (it simply expires) and stale HTML is
+never shown, even when the cache is per-process.
+
+The version is bumped when the recipe is saved, when its rating counters
+change and when a comment is approved or un-approved (see
+:mod:`recipes.signals` and :mod:`recipes.counters`).
+
+Logged-out visitors additionally get whole pages from
+:func:`anonymous_page_cache`.  Those entries are purged explicitly by the
+views that publish, change or remove what a page shows
+(:func:`purge_recipe_pages`); ``RECIPE_PAGE_CACHE_TIMEOUT`` bounds how long
+a change made elsewhere (e.g. the admin) can stay invisible to them.
+List pages are keyed on the list generation, which every purge moves and
+which is kept in the database (``ListGeneration``), so all workers move
+to new list pages and validators together.  Detail pages are deleted from
+the cache instead; with a per-process cache that only reaches the worker
+that purged, and the others serve their copy until it expires.
+Cached pages keep the ``ETag``/``Last-Modified`` they were rendered with
+(see :mod:`recipes.conditional`), and a hit is answered with a 304 when
+the visitor already has that version.
+"""
+
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Now
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from .models import ListGeneration, Recipe
+
+
+def fragment_timeout() -> int:
+    """Seconds a rendered fragment may live in the cache."""
+    return getattr(settings, "RECIPE_FRAGMENT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def bump_versions(queryset) -> int:
+    """Invalidate cached fragments for every recipe in ``queryset``.
+
+    ``updated_at`` moves with the version, as the pages'
+    ``Last-Modified`` is derived from it (see :mod:`recipes.conditional`).
+    """
+    return queryset.update(cache_version=F("cache_version") + 1, updated_at=Now())
+
+
+def bump_version(recipe_id) -> None:
+    """Invalidate cached fragments for one recipe."""
+    bump_versions(Recipe.objects.filter(pk=recipe_id))
+
+
+# ---------- anonymous full-page cache ----------
+
+PAGE_KEY_PREFIX = "recipes:page"
+
+
+def page_cache_timeout() -> int:
+    """Seconds a cached anonymous page may be served."""
+    return getattr(settings, "RECIPE_PAGE_CACHE_TIMEOUT", 300)
+
+
+def _generation():
+    return ListGeneration.objects.filter(pk=1).values_list("generation", flat=True)
+
+
+def list_generation(request=None) -> int:
+    """Current generation of the recipe-list pages (changes on every purge).
+
+    It is read from its database row, so a purge in one worker is seen by
+    all of them even with a per-process cache.  Passing ``request`` reads
+    it once per request.
+    """
+    generation = getattr(request, "_list_generation", None)
+    if generation is None:
+        generation = _generation().first() or 0
+        if request is not None:
+            request._list_generation = generation
+    return generation
+
+
+async def alist_generation(request) -> int:
+    """:func:`list_generation` for async views; later sync calls reuse it."""
+    generation = getattr(request, "_list_generation", None)
+    if generation is None:
+        generation = request._list_generation = await _generation().afirst() or 0
+    return generation
+
+
+def purge_recipe_list() -> None:
+    """Drop every cached list page by moving to a new generation.
+
+    The generation is a ``time_ns()`` stamp that never moves backwards,
+    whatever the clocks of the workers that purge.
+    """
+    moved = ListGeneration.objects.filter(pk=1).update(
+        generation=Greatest(F("generation") + 1, Value(time.time_ns()))
+    )
+    if not moved:
+        ListGeneration.objects.get_or_create(
+            pk=1, defaults={"generation": time.time_ns()}
+        )
+
+
+def purge_recipe_page(slug) -> None:
+    """Drop the cached detail page for ``slug``."""
+    purge_detail_pages([slug])
+
+
+def purge_detail_pages(slugs) -> None:
+    """Drop the cached detail pages for many recipes in one cache call."""
+    cache.delete_many(
+        [_page_key("detail", reverse("recipe_detail", args=[slug]), "") for slug in slugs]
+    )
+
+
+def purge_recipe_pages(slug) -> None:
+    """Drop a recipe's detail page and all list pages (which may show it)."""
+    purge_recipe_page(slug)
+    purge_recipe_list()
+
+
+def _page_key(scope, path, query, request=None) -> str:
+    if scope == "list":
+        return f"{PAGE_KEY_PREFIX}:list:{list_generation(request)}:{path}?{query}"
+    return f"{PAGE_KEY_PREFIX}:{scope}:{path}?{query}"
+
+
+def _normalized_query(request, params) -> str:
+    """Only the listed, non-empty parameters, in a stable order."""
+    pairs = sorted(
+        (name, value)
+        for name in params
+        for value in request.GET.getlist(name)
+        if value
+    )
+    return urlencode(pairs)
+
+
+def page_cache_bypassed(request) -> bool:
+    """True for requests that may see personalised output.
+
+    That is anything but a GET/HEAD from a visitor with no session cookie
+    and no pending flash messages.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return True
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return True
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return True
+    return len(messages.get_messages(request)) > 0
+
+
+def _revalidated(request, cached):
+    """A 304 if the client already has ``cached`` (by its own validators), else ``cached``."""
+    last_modified = cached.get("Last-Modified")
+    return get_conditional_response(
+        request,
+        etag=cached.get("ETag"),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=cached,
+    )
+
+
+def _store_when_rendered(response, request, key) -> None:
+    def store(rendered):
+        # never share a response that sets cookies or embeds a CSRF token
+        if (
+            rendered.status_code == 200
+            and not rendered.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        ):
+            cache.set(key, rendered, page_cache_timeout())
+
+    if getattr(response, "streaming", False):
+        return
+    if hasattr(response, "render") and not response.is_rendered:
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+
+
+def anonymous_page_cache(scope, query_params=()):
+    """Cache whole responses of a view for anonymous visitors.
+
+    Keys are built from the request path and the normalized ``query_params``;
+    ``scope="list"`` keys also include the list generation so that
+    :func:`purge_recipe_list` invalidates every list page at once.  The
+    ``X-Page-Cache`` response header reports ``HIT``, ``MISS`` or ``BYPASS``.
+
+    Async views get an async wrapper.  It calls the cache directly, as the
+    ``{% cache %}`` tag does: Django's cache backends are synchronous and
+    their ``a*`` methods only move the same call to a thread.  Deciding on a
+    bypass touches the database only for requests with a session cookie,
+    and :func:`page_cache_bypassed` returns before that for them.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def awrapped(request, *args, **kwargs):
+                if page_cache_bypassed(request):
+                    response = await view(request, *args, **kwargs)
+                    response["X-Page-Cache"] = "BYPASS"
+                    return response
+
+                if scope == "list":
+                    await alist_generation(request)
+                query = _normalized_query(request, query_params)
+                key = _page_key(scope, request.path, query, request)
+                cached = cache.get(key)
+                if cached is not None:
+                    cached["X-Page-Cache"] = "HIT"
+                    return _revalidated(request, cached)
+
+                response = await view(request, *args, **kwargs)
+                patch_vary_headers(response, ("Cookie",))
+                response["X-Page-Cache"] = "MISS"
+                _store_when_rendered(response, request, key)
+                return response
+
+            return awrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if page_cache_bypassed(request):
+                response = view(request, *args, **kwargs)
+                response["X-Page-Cache"] = "BYPASS"
+                return response
+
+            query = _normalized_query(request, query_params)
+            key = _page_key(scope, request.path, query, request)
+            cached = cache.get(key)
+            if cached is not None:
+                cached["X-Page-Cache"] = "HIT"
+                return _revalidated(request, cached)
+
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ("Cookie",))
+            response["X-Page-Cache"] = "MISS"
+            _store_when_rendered(response, request, key)
+            return response
+
+        return wrapped
+
+    return decorator
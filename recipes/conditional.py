@@ -0,0 +1,127 @@
+"""Conditional GET (``ETag`` / ``Last-Modified``) for the recipe pages.
+
+A repeat visitor or crawler that sends ``If-None-Match`` or
+``If-Modified-Since`` gets a ``304 Not Modified`` when the page has not
+changed.  The check runs as soon as the view knows the validators, before
+anything else is queried and before any template is rendered.
+
+Validators are cheap to compute:
+
+* a recipe page's come from the row the view loads anyway: ``updated_at``
+  (which the counter updates in :mod:`recipes.counters` advance too), the
+  newest approved comment (a subquery on the same row), the rating and
+  comment counters and ``cache_version``;
+* list pages use the catalogue version, i.e. the list generation of
+  :mod:`recipes.caching`, which moves whenever any list page could change.
+  It is one database row, read once per request, so every worker agrees
+  on it; being a ``time_ns()`` stamp, it doubles as ``Last-Modified``.
+
+Pages for logged-in users carry their name, their own rating, a CSRF token
+and, for staff, the pending counts, so their ETag also covers the viewer
+and they get no ``Last-Modified`` (which cannot express that).  Every
+response varies on ``Cookie`` and must be revalidated (``no-cache``);
+personal ones are ``private``.  Requests with flash messages waiting are
+never answered with a 304, as the messages must be shown.
+
+Pages served from the anonymous page cache keep the validators they were
+rendered with and are revalidated against those (see
+:func:`recipes.caching.anonymous_page_cache`).
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import caching, pending
+
+# Recipe values a detail page's ETag is computed from.
+RECIPE_STATE_FIELDS = (
+    "pk", "updated_at", "cache_version",
+    "rating_count", "rating_sum", "approved_comment_count", "last_comment_at",
+)
+
+
+class Validators:
+    """The ``ETag`` (and, for shared pages, ``Last-Modified``) of one response."""
+
+    def __init__(self, etag, last_modified=None, private=False):
+        self.etag = etag
+        self.last_modified = last_modified  # seconds since the epoch
+        self.private = private
+
+    def not_modified(self, request):
+        """Return a 304 if the client's copy is current (or a 412 if its
+        preconditions fail), else None."""
+        return self.apply(
+            get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        )
+
+    def apply(self, response):
+        """Add the validator and caching headers to a 200 or 304 ``response``."""
+        if response is None or response.status_code not in (200, 304):
+            return response
+        response.headers.setdefault("ETag", self.etag)
+        if self.last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(self.last_modified))
+        patch_vary_headers(response, ("Cookie",))
+        if self.private:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+def make_etag(*parts) -> str:
+    """A strong ETag for the state described by ``parts``."""
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def _viewer(request):
+    """``None`` for a shared (anonymous) page, else what personalizes it.
+
+    Returns False when the request must not get a 304 at all.  Async views
+    call this only once they have loaded the user (and with it the session
+    and staff pending counts), so it runs no query for them.
+    """
+    if len(messages.get_messages(request)) > 0:
+        return False
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    counts = None
+    if user.is_staff:
+        counts = getattr(request, "pending_counts", None) or pending.get_counts()
+        request.pending_counts = counts
+    return (user.pk, user.is_staff, counts, request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+
+
+def _validators(request, parts, last_modified):
+    viewer = _viewer(request)
+    if viewer is False:
+        return None
+    if viewer is not None:
+        return Validators(make_etag(*parts, viewer), private=True)
+    return Validators(make_etag(*parts), last_modified)
+
+
+def for_list(request):
+    """Validators for a recipe list page, or None if it must not be revalidated."""
+    version = caching.list_generation(request)
+    return _validators(request, ("list", version), version // 10**9)
+
+
+def for_recipe(request, recipe):
+    """Validators for ``recipe``'s page, or None if it must not be revalidated.
+
+    ``recipe`` must carry the ``last_comment_at`` annotation (see
+    ``views._detail_queryset``).  Unpublished recipes are never revalidated.
+    """
+    if recipe.status != "published":
+        return None
+    state = tuple(getattr(recipe, name) for name in RECIPE_STATE_FIELDS)
+    moments = [m for m in (recipe.updated_at, recipe.last_comment_at) if m is not None]
+    return _validators(request, ("detail",) + state, int(max(moments).timestamp()))
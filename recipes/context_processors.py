@@ -1,6 +1,6 @@
 from typing import Dict
 
-from .models import Recipe, Comment
+from . import pending
 
 
 def pending_counts(request) -> Dict[str, int]:
@@ -8,11 +8,18 @@ def pending_counts(request) -> Dict[str, int]:
 
     Adds `pending_recipes_count` and `pending_comments_count` to the template
     context. If the current user is not authenticated or not staff, both counts
-    are 0 to avoid leaking information.
+    are 0 to avoid leaking information. The counts come from the cache kept up
+    to date by `recipes.pending`, so a render normally runs no queries for them.
+
+    Async views render on the event loop, where no query may run at all;
+    they fetch the counts beforehand with `pending.aget_counts()` and leave
+    them on `request.pending_counts`, which is used as is.
     """
     user = getattr(request, "user", None)
     if user and user.is_authenticated and user.is_staff:
-        recipes = Recipe.objects.filter(status="draft").count()
-        comments = Comment.objects.filter(approved=False).count()
-        return {"pending_recipes_count": recipes, "pending_comments_count": comments}
+        counts = getattr(request, "pending_counts", None) or pending.get_counts()
+        return {
+            "pending_recipes_count": counts["recipes"],
+            "pending_comments_count": counts["comments"],
+        }
     return {"pending_recipes_count": 0, "pending_comments_count": 0}
@@ -0,0 +1,196 @@
+"""Denormalized rating and comment counters stored on ``Recipe``.
+
+``Recipe.rating_count``, ``Recipe.rating_sum``, the per-star histogram
+``Recipe.ratings_1`` … ``ratings_5`` and ``Recipe.approved_comment_count``
+let list and detail pages show averages, distributions and comment totals
+without aggregate queries.  The signal handlers in :mod:`recipes.signals`
+call the ``*_saved``/``*_deleted`` functions below, which apply deltas with
+single ``UPDATE ... SET col = col + n`` statements so concurrent writers
+cannot lose increments.  :func:`recount` rebuilds the counters from the
+source tables to repair drift.
+
+``Recipe.top_score`` orders ``?sort=top``.  It is a Bayesian average
+(:func:`top_score`): the recipe's ratings averaged together with
+``RECIPE_TOP_PRIOR_WEIGHT`` imaginary ratings of ``RECIPE_TOP_PRIOR_MEAN``
+stars, so one 5★ vote does not outrank hundreds averaging 4.8.  It is
+recomputed in the same UPDATE that moves the rating counters.
+"""
+
+from django.conf import settings
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum,
+    Value, When,
+)
+from django.db.models.functions import Coalesce, Now
+
+from .caching import bump_version, purge_recipe_list
+from .models import STARS, Comment, Rating, Recipe
+
+
+def top_score(count, total):
+    """The "top rated" score of ``count`` ratings adding up to ``total`` stars.
+
+    ``count`` and ``total`` may be numbers or query expressions (the
+    result is then an expression too).
+    """
+    weight = settings.RECIPE_TOP_PRIOR_WEIGHT
+    score = (total + weight * settings.RECIPE_TOP_PRIOR_MEAN) / (count + weight)
+    if hasattr(score, "resolve_expression"):
+        return ExpressionWrapper(score, output_field=FloatField())
+    return score
+
+
+def apply_deltas(recipe_id, ratings=None, comments=0) -> None:
+    """Atomically add the given deltas to one recipe's counters.
+
+    ``ratings`` maps a number of stars to the change in ratings with that
+    many stars (``{4: -1, 5: 1}`` for a rating moved from 4★ to 5★).
+    The same statement bumps ``cache_version`` so cached fragments showing
+    the old numbers are not served again, and ``updated_at`` so the page's
+    ``Last-Modified`` moves (see :mod:`recipes.conditional`).  Rating
+    changes also move the list pages, which show averages, to a new
+    generation; comment changes do so when the recipe is listed, as the
+    list can be sorted by comment count.
+    """
+    ratings = {star: n for star, n in (ratings or {}).items() if n}
+    changes = {}
+    if ratings:
+        count = sum(ratings.values())
+        total = sum(star * n for star, n in ratings.items())
+        for star, n in ratings.items():
+            changes[f"ratings_{star}"] = F(f"ratings_{star}") + n
+        changes["rating_count"] = F("rating_count") + count
+        changes["rating_sum"] = F("rating_sum") + total
+        # SET expressions read the row as it was, so add the deltas here too
+        changes["top_score"] = top_score(F("rating_count") + count, F("rating_sum") + total)
+    if comments:
+        changes["approved_comment_count"] = F("approved_comment_count") + comments
+    if changes:
+        changes["cache_version"] = F("cache_version") + 1
+        changes["updated_at"] = Now()
+        Recipe.objects.filter(pk=recipe_id).update(**changes)
+    if ratings:
+        purge_recipe_list()
+    elif comments:
+        _purge_list_if_published([recipe_id])
+
+
+def _purge_list_if_published(recipe_ids) -> None:
+    """Move the list pages on if any of ``recipe_ids`` is listed on them."""
+    if Recipe.objects.filter(pk__in=recipe_ids, status="published").exists():
+        purge_recipe_list()
+
+
+def apply_comment_deltas(deltas, listed=None) -> int:
+    """Add ``{recipe_id: n}`` to many recipes' approved-comment counters in one UPDATE.
+
+    Like :func:`apply_deltas`, moves the list pages on when a published
+    recipe's count changed; callers that already know pass ``listed``
+    (whether any of the recipes is published) to save the lookup.
+    """
+    deltas = {pk: n for pk, n in deltas.items() if n}
+    if not deltas:
+        return 0
+    change = Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    updated = Recipe.objects.filter(pk__in=deltas).update(
+        approved_comment_count=F("approved_comment_count") + change,
+        cache_version=F("cache_version") + 1,
+        updated_at=Now(),
+    )
+    if listed is None:
+        _purge_list_if_published(deltas)
+    elif listed:
+        purge_recipe_list()
+    return updated
+
+
+def rating_saved(rating, created: bool) -> None:
+    """Account for a created or updated rating."""
+    if created:
+        apply_deltas(rating.recipe_id, ratings={rating.stars: 1})
+        return
+    loaded = getattr(rating, "_loaded_values", {})
+    if "stars" not in loaded or loaded.get("recipe_id", rating.recipe_id) != rating.recipe_id:
+        # We don't know the previous state; rebuild this recipe's counters.
+        recount(Recipe.objects.filter(pk=rating.recipe_id))
+        return
+    if rating.stars != loaded["stars"]:
+        apply_deltas(rating.recipe_id, ratings={loaded["stars"]: -1, rating.stars: 1})
+    rating._loaded_values["stars"] = rating.stars
+
+
+def rating_deleted(rating) -> None:
+    """Account for a deleted rating."""
+    apply_deltas(rating.recipe_id, ratings={rating.stars: -1})
+
+
+def comment_saved(comment, created: bool) -> None:
+    """Account for a comment whose approval may have changed."""
+    if created:
+        if comment.approved:
+            apply_deltas(comment.recipe_id, comments=1)
+        return
+    loaded = getattr(comment, "_loaded_values", {})
+    if "approved" not in loaded or loaded.get("recipe_id", comment.recipe_id) != comment.recipe_id:
+        recount(Recipe.objects.filter(pk=comment.recipe_id))
+        return
+    if loaded["approved"] != comment.approved:
+        apply_deltas(comment.recipe_id, comments=1 if comment.approved else -1)
+        comment._loaded_values["approved"] = comment.approved
+    elif comment.approved:
+        # an already-visible comment was edited in place
+        bump_version(comment.recipe_id)
+
+
+def comment_deleted(comment) -> None:
+    """Account for a deleted comment."""
+    if comment.approved:
+        apply_deltas(comment.recipe_id, comments=-1)
+
+
+def _actual_counts():
+    """Subquery expressions computing each counter from the source tables."""
+    ratings = Rating.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+    comments = (
+        Comment.objects.filter(recipe=OuterRef("pk"), approved=True)
+        .order_by()
+        .values("recipe")
+    )
+    zero = Value(0, output_field=IntegerField())
+    counts = {
+        "rating_count": Coalesce(Subquery(ratings.annotate(n=Count("pk")).values("n")), zero),
+        "rating_sum": Coalesce(Subquery(ratings.annotate(n=Sum("stars")).values("n")), zero),
+        "approved_comment_count": Coalesce(
+            Subquery(comments.annotate(n=Count("pk")).values("n")), zero
+        ),
+    }
+    for star in STARS:
+        counts[f"ratings_{star}"] = Coalesce(
+            Subquery(ratings.filter(stars=star).annotate(n=Count("pk")).values("n")), zero
+        )
+    return counts
+
+
+def find_drift(queryset=None):
+    """Return the recipes whose stored counters disagree with the source tables."""
+    queryset = Recipe.objects.all() if queryset is None else queryset
+    actual = {f"actual_{name}": expr for name, expr in _actual_counts().items()}
+    drifted = Q()
+    for name in actual:
+        drifted |= ~Q(**{name.removeprefix("actual_"): F(name)})
+    return queryset.annotate(**actual).filter(drifted)
+
+
+def recount(queryset=None) -> int:
+    """Recompute the counters and scores for ``queryset`` (default: all recipes) in one UPDATE."""
+    queryset = Recipe.objects.all() if queryset is None else queryset
+    counts = _actual_counts()
+    return queryset.update(
+        cache_version=F("cache_version") + 1,
+        top_score=top_score(counts["rating_count"], counts["rating_sum"]),
+        **counts,
+    )
@@ -0,0 +1,211 @@
+"""Streaming export of the recipe catalogue as NDJSON or CSV.
+
+:func:`iter_records` reads recipes a chunk at a time, seeking on the
+primary key (``WHERE id > last ORDER BY id LIMIT n``), and reads each
+chunk's approved comments alongside, ``COMMENT_CHUNK_SIZE`` at a time
+(star distributions are stored on the recipe).  Memory therefore holds
+one chunk of recipes, one page of comments and the comments of the recipe
+being written, however large the catalogue is, unlike ``dumpdata``, which
+builds the whole dump before writing any of it.
+:func:`render` turns the records into text lines in either format, and
+:func:`buffered` groups the lines into larger pieces for writing to a
+socket.
+
+Used by the ``export_recipes`` management command and the staff
+``export_recipes`` view, which streams the same lines to the browser.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import STARS, Comment, Recipe, normalize_tags
+
+# Recipes per query; each chunk also costs at least one comments query.
+CHUNK_SIZE = 500
+# Comments per query.
+COMMENT_CHUNK_SIZE = 2000
+
+# Spreadsheets run a cell starting with one of these as a formula; CSV
+# cells that do are written with a leading "'" (see csv_cell()).
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+RECIPE_COLUMNS = (
+    "id", "slug", "title", "author__username", "status", "excerpt", "description",
+    "ingredients", "steps", "tags", "prep_minutes", "cook_minutes", "servings", "image",
+    "created_at", "updated_at", "rating_count", "rating_sum",
+    *(f"ratings_{star}" for star in STARS),
+)
+
+# One CSV row per recipe: nested values are flattened (tags joined with
+# commas, one column per star, comments as a JSON array).
+CSV_COLUMNS = (
+    "id", "slug", "title", "author", "status", "excerpt", "description",
+    "ingredients", "steps", "tags", "prep_minutes", "cook_minutes", "servings", "image",
+    "created_at", "updated_at", "rating_count", "rating_average",
+    *(f"ratings_{star}" for star in STARS), "comment_count", "comments",
+)
+
+
+def _comment_groups(recipe_ids, chunk_size=None):
+    """Yield ``(recipe_id, comments)`` for the recipes with approved comments, by id.
+
+    Comments are read ``chunk_size`` at a time, seeking on
+    ``(recipe_id, created_at, id)`` like the comment pages do.
+    """
+    chunk_size = chunk_size or COMMENT_CHUNK_SIZE
+    rows = (
+        Comment.objects.filter(recipe_id__in=recipe_ids, approved=True)
+        .order_by("recipe_id", "created_at", "id")
+        .values_list("recipe_id", "user__username", "body", "created_at", "id")
+    )
+    current, comments, after = None, [], Q()
+    while True:
+        page = list(rows.filter(after)[:chunk_size])
+        for recipe_id, user, body, created_at, _ in page:
+            if recipe_id != current:
+                if comments:
+                    yield current, comments
+                current, comments = recipe_id, []
+            comments.append({"user": user, "body": body, "created_at": created_at})
+        if len(page) < chunk_size:
+            break
+        recipe_id, _, _, created_at, pk = page[-1]
+        after = (
+            Q(recipe_id__gt=recipe_id)
+            | Q(recipe_id=recipe_id, created_at__gt=created_at)
+            | Q(recipe_id=recipe_id, created_at=created_at, id__gt=pk)
+        )
+    if comments:
+        yield current, comments
+
+
+def _record(row, comments) -> dict:
+    count = row["rating_count"]
+    return {
+        "id": row["id"],
+        "slug": row["slug"],
+        "title": row["title"],
+        "author": row["author__username"],
+        "status": row["status"],
+        "excerpt": row["excerpt"],
+        "description": row["description"],
+        "ingredients": row["ingredients"],
+        "steps": row["steps"],
+        "tags": list(normalize_tags(row["tags"]).values()),
+        "prep_minutes": row["prep_minutes"],
+        "cook_minutes": row["cook_minutes"],
+        "servings": row["servings"],
+        "image": row["image"] or "",
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "ratings": {
+            "count": count,
+            "average": round(row["rating_sum"] / count, 2) if count else None,
+            "distribution": {str(star): row[f"ratings_{star}"] for star in STARS},
+        },
+        "comments": comments,
+    }
+
+
+def iter_records(queryset=None, chunk_size=CHUNK_SIZE):
+    """Yield one export record (a dict) per recipe in ``queryset``, by id."""
+    queryset = Recipe.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("pk").values(*RECIPE_COLUMNS)
+    last = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last)[:chunk_size])
+        if not chunk:
+            return
+        ids = [row["id"] for row in chunk]
+        groups = _comment_groups(ids)
+        group = next(groups, None)
+        for row in chunk:
+            comments = []
+            if group is not None and group[0] == row["id"]:
+                comments = group[1]
+                group = next(groups, None)
+            yield _record(row, comments)
+        if len(chunk) < chunk_size:
+            return
+        last = ids[-1]
+
+
+def _ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """A file-like object whose ``write`` returns what it is given (for ``csv.writer``)."""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    """``value``, with a leading "'" if a spreadsheet would run it as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _csv_row(record):
+    ratings = record["ratings"]
+    values = [
+        *(record[name] for name in CSV_COLUMNS[:9]),
+        ", ".join(record["tags"]),
+        record["prep_minutes"],
+        record["cook_minutes"],
+        record["servings"],
+        record["image"],
+        record["created_at"].isoformat(),
+        record["updated_at"].isoformat(),
+        ratings["count"],
+        "" if ratings["average"] is None else ratings["average"],
+        *(ratings["distribution"][str(star)] for star in STARS),
+        len(record["comments"]),
+        json.dumps(record["comments"], cls=DjangoJSONEncoder, ensure_ascii=False),
+    ]
+    return [csv_cell(value) for value in values]
+
+
+def _csv_lines(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in records:
+        yield writer.writerow(_csv_row(record))
+
+
+def render(records, fmt="ndjson"):
+    """Yield ``records`` as text lines in ``fmt`` (a key of :data:`FORMATS`)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return _ndjson_lines(records) if fmt == "ndjson" else _csv_lines(records)
+
+
+def buffered(lines, size=64 * 1024):
+    """Join ``lines`` into pieces of roughly ``size`` characters.
+
+    The first line is yielded on its own so a streamed response starts at once.
+    """
+    lines = iter(lines)
+    for first in lines:
+        yield first
+        break
+    parts, length = [], 0
+    for line in lines:
+        parts.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(parts)
+            parts, length = [], 0
+    if parts:
+        yield "".join(parts)
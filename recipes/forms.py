@@ -5,7 +5,7 @@ views.  Docstrings explain which model each form operates on.
 """
 
 from django import forms
-from .models import Comment, Recipe
+from .models import Comment, Recipe, Tag, normalize_tags
 
 
 class CommentForm(forms.ModelForm):
@@ -38,9 +38,23 @@ class RecipeForm(forms.ModelForm):
     Model: ``Recipe``
 
     This form intentionally omits administrative fields such as ``status``
-    and ``slug`` which are controlled server-side in the views.
+    and ``slug`` which are controlled server-side in the views.  ``tags``
+    stays a comma-separated text input; it is tidied here and synced to
+    the normalized ``Tag`` rows when the recipe is saved.
     """
 
+    def clean_tags(self):
+        """Collapse whitespace and drop duplicate/empty tags; refuse over-long ones."""
+        tags = normalize_tags(self.cleaned_data.get("tags", ""))
+        limit = Tag._meta.get_field("slug").max_length
+        too_long = [name for slug, name in tags.items() if max(len(slug), len(name)) > limit]
+        if too_long:
+            raise forms.ValidationError(
+                "Each tag can be at most %(limit)d characters long: %(tags)s.",
+                params={"limit": limit, "tags": ", ".join(too_long)},
+            )
+        return ", ".join(tags.values())
+
     class Meta:
         model = Recipe
         # Do not expose slug/status to front-end; server generates/controls them.
@@ -0,0 +1,154 @@
+"""Responsive variants of ``Recipe.image``.
+
+Uploads are kept as they are, but pages should not send a phone a 4000px
+photo to fill a 350px card.  When a recipe's image changes,
+:func:`refresh_variants` uses Pillow to write downscaled copies at each of
+``RECIPE_IMAGE_WIDTHS`` in every modern format this Pillow can encode
+(AVIF when a plugin provides it, WebP otherwise), plus a tiny blurred
+placeholder inlined as a data URI.  Variants are saved through the same
+storage as the original, next to it, and their names are recorded in
+``Recipe.image_variants`` so templates can build ``srcset`` without asking
+the storage anything (see ``recipes/templatetags/recipe_images.py``).
+
+The ``generate_image_variants`` management command backfills variants for
+images uploaded before this existed.
+"""
+
+import base64
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+# Preferred first: browsers take the first <source> they support.
+FORMATS = {
+    "avif": {"pil": "AVIF", "mime": "image/avif", "options": {"quality": 50}},
+    "webp": {"pil": "WEBP", "mime": "image/webp", "options": {"quality": 75, "method": 4}},
+}
+PLACEHOLDER_WIDTH = 16
+
+
+def variant_widths() -> list[int]:
+    """Widths (in px) to generate, smallest first."""
+    return sorted(getattr(settings, "RECIPE_IMAGE_WIDTHS", (320, 640, 960, 1280)))
+
+
+def available_formats() -> list[str]:
+    """Variant formats this Pillow build can write, preferred first."""
+    Image.init()
+    return [name for name, spec in FORMATS.items() if spec["pil"] in Image.SAVE]
+
+
+def _encode(image, fmt) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, FORMATS[fmt]["pil"], **FORMATS[fmt]["options"])
+    return buffer.getvalue()
+
+
+def _resized(image, width):
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def _placeholder(image) -> str:
+    """A tiny, heavily compressed copy as a data URI (a few hundred bytes)."""
+    small = _resized(image, PLACEHOLDER_WIDTH)
+    if features.check("webp"):
+        data, mime = _encode(small, "webp"), "image/webp"
+    else:
+        buffer = BytesIO()
+        small.convert("RGB").save(buffer, "JPEG", quality=40)
+        data, mime = buffer.getvalue(), "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def build_variants(field) -> dict:
+    """Write variants for the file in ``field`` and return their description.
+
+    When the file cannot be read as an image, or has more pixels than
+    Pillow agrees to decode (``Image.MAX_IMAGE_PIXELS``), only ``source``
+    is recorded, so the original is served and the next save does not try
+    again.
+    """
+    storage = field.storage
+    try:
+        with storage.open(field.name, "rb") as fh:
+            image = Image.open(fh)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (
+        OSError, UnidentifiedImageError, ValueError, Image.DecompressionBombError
+    ) as e:
+        logger.warning("Cannot build variants for %s: %s", field.name, e)
+        return {"source": field.name}
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    directory, filename = posixpath.split(field.name)
+    stem = posixpath.splitext(filename)[0]
+    # never upscale; an image narrower than every width gets one copy at its own size
+    widths = [w for w in variant_widths() if w < image.width] or [image.width]
+    formats = {}
+    for fmt in available_formats():
+        entries = []
+        for width in widths:
+            resized = image if width == image.width else _resized(image, width)
+            name = posixpath.join(directory, "variants", f"{stem}-{width}w.{fmt}")
+            saved = storage.save(name, ContentFile(_encode(resized, fmt)))
+            entries.append({"width": width, "name": saved})
+        formats[fmt] = entries
+    return {
+        "source": field.name,
+        "width": image.width,
+        "height": image.height,
+        "placeholder": _placeholder(image),
+        "formats": formats,
+    }
+
+
+def delete_variants(variants, storage) -> None:
+    """Remove the files described by ``variants`` from ``storage``."""
+    for entries in (variants or {}).get("formats", {}).values():
+        for entry in entries:
+            try:
+                storage.delete(entry["name"])
+            except Exception:  # a missing file is not worth failing a save for
+                logger.warning("Could not delete image variant %s", entry["name"])
+
+
+def needs_refresh(recipe) -> bool:
+    """True when the stored variants do not describe the current image."""
+    current = recipe.image.name if recipe.image else ""
+    return (recipe.image_variants or {}).get("source", "") != current
+
+
+def refresh_variants(recipe) -> dict:
+    """Rebuild (or clear) ``recipe``'s variants and store them on its row.
+
+    The same UPDATE bumps ``cache_version`` so cached fragments pick up the
+    new markup.
+    """
+    old = recipe.image_variants or {}
+    variants = build_variants(recipe.image) if recipe.image else {}
+    if old:
+        delete_variants(old, recipe.image.storage)
+    recipe.image_variants = variants
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image_variants=variants, cache_version=F("cache_version") + 1
+    )
+    return variants
+
+
+def srcset(recipe, fmt) -> str:
+    """``srcset`` value for one format, or "" when there are no variants."""
+    storage = recipe.image.storage
+    entries = (recipe.image_variants or {}).get("formats", {}).get(fmt, [])
+    return ", ".join(f"{storage.url(e['name'])} {e['width']}w" for e in entries)
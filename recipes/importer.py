@@ -0,0 +1,320 @@
+"""Bulk import of recipes from NDJSON or CSV.
+
+Rows are read as a stream (:func:`read_rows`) and imported a batch at a
+time by :class:`Importer`:
+
+- each row is validated by :class:`RowValidator` with ``RecipeForm``'s own
+  fields and ``clean_<field>`` hooks, without building a form per row;
+- authors are looked up by username, once per distinct name;
+- slugs come from a :class:`~recipes.slugs.SlugAllocator` that read every
+  existing slug in one query and allocates in memory from then on;
+- the batch is inserted in its own transaction, along with its tag links
+  and search index rows, as plain value tuples with ``executemany``
+  (:func:`insert_rows`).  ``bulk_create`` would build a model instance
+  per row and, on SQLite, split the batch into INSERTs of a few dozen
+  rows; together that cost more than the rest of the import.
+
+Bulk inserts send no signals, so the importer maintains the derived
+data itself: tags and the search index per batch, and the pending counts
+and cached list pages once at the end (:meth:`Importer.finish`).  Rows that
+fail validation are handed to the ``reject`` callback with their errors.
+
+Rows use the field names of ``RecipeForm`` plus ``author`` (a username),
+``status`` and ``slug``, all optional; ``ingredients``, ``steps`` and
+``tags`` may be lists.  NDJSON and CSV written by ``export_recipes`` can
+be imported as they are (their ratings and comments are ignored, and the
+CSV's formula escaping is undone) into a catalogue that does not have
+their slugs yet.  Importing them back into the catalogue they came from
+needs ``new_slugs``, which ignores the rows' slugs and allocates fresh
+ones; otherwise every row is rejected as a duplicate.
+"""
+
+import csv
+import itertools
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.forms import FileField, SlugField
+from django.utils import timezone
+
+from . import caching, pending, search
+from .export import FORMULA_PREFIXES
+from .forms import RecipeForm
+from .models import STATUS_CHOICES, Recipe, RecipeTag, Tag, normalize_tags, sort_columns
+from .slugs import SLUG_MAX_LENGTH, SlugAllocator
+
+User = get_user_model()
+
+FORMATS = ("ndjson", "csv")
+
+# Recipes per transaction.
+BATCH_SIZE = 1000
+
+# List values are joined back into the text the form expects.
+LIST_SEPARATORS = {"ingredients": "\n", "steps": "\n", "tags": ", "}
+
+STATUSES = {value for value, _ in STATUS_CHOICES}
+
+# The columns a recipe INSERT sets: all but the primary key.
+RECIPE_COLUMNS = [field for field in Recipe._meta.concrete_fields if not field.primary_key]
+
+
+def insert_rows(model, fields, rows, batch_size=5000) -> None:
+    """``INSERT`` plain value tuples for ``fields`` of ``model`` in batches."""
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(f).column) for f in fields)
+    sql = (
+        f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))})"
+    )
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while batch := list(itertools.islice(rows, batch_size)):
+            cursor.executemany(sql, batch)
+
+
+def _uncell(value):
+    """Undo the formula escaping :func:`recipes.export.csv_cell` applies."""
+    if isinstance(value, str) and value[:1] == "'":
+        if value[1:].startswith(FORMULA_PREFIXES):
+            return value[1:]
+    return value
+
+
+def read_rows(fh, fmt):
+    """Yield ``(number, row)`` for each record in ``fh``, 1-based.
+
+    ``row`` is a dict, or a :class:`ValidationError` when the record cannot
+    be parsed at all (NDJSON only; CSV records always parse).
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(fh), start=1):
+            yield number, {name: _uncell(value) for name, value in row.items()}
+        return
+    number = 0
+    for line in fh:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, ValidationError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            row = ValidationError("Each line must be a JSON object.")
+        yield number, row
+
+
+class RowValidator:
+    """Check plain dicts against ``RecipeForm``'s rules.
+
+    Building and validating a bound form costs far more than the checks
+    themselves, so one unbound form is kept and its fields' ``clean()`` and
+    its ``clean_<field>()`` hooks are run on each row, as
+    ``BaseForm._clean_fields`` does.  File fields (the image) are skipped.
+    """
+
+    def __init__(self, form_class=RecipeForm):
+        self.form = form_class()
+        self.fields = {
+            name: field
+            for name, field in self.form.fields.items()
+            if not isinstance(field, FileField)
+        }
+        self.hooks = {
+            name: getattr(self.form, f"clean_{name}")
+            for name in self.fields
+            if hasattr(self.form, f"clean_{name}")
+        }
+        self.slug_field = SlugField(max_length=SLUG_MAX_LENGTH, required=False)
+
+    def clean(self, row):
+        """Return ``(cleaned_data, errors)`` for ``row``; errors map field to messages."""
+        form = self.form
+        form.cleaned_data = cleaned = {}
+        errors = {}
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if isinstance(value, list) and name in LIST_SEPARATORS:
+                value = LIST_SEPARATORS[name].join(str(item) for item in value)
+            try:
+                cleaned[name] = field.clean(value)
+                if name in self.hooks:
+                    cleaned[name] = self.hooks[name]()
+            except ValidationError as e:
+                errors[name] = e.messages
+        try:
+            cleaned["slug"] = self.slug_field.clean(row.get("slug"))
+        except ValidationError as e:
+            errors["slug"] = e.messages
+        status = row.get("status") or None
+        if status is not None and status not in STATUSES:
+            errors["status"] = [f"Must be one of: {', '.join(sorted(STATUSES))}."]
+        cleaned["status"] = status
+        cleaned["author"] = row.get("author") or None
+        return cleaned, errors
+
+
+class Importer:
+    """Validate and insert recipes a batch at a time.
+
+    ``author`` and ``status`` are the defaults for rows that do not name
+    their own.  With ``new_slugs`` the rows' own slugs are ignored and every
+    recipe gets an allocated one.  ``reject(number, row, errors)`` is called
+    for every row that is not imported.
+    """
+
+    def __init__(self, author=None, status="draft", batch_size=BATCH_SIZE, reject=None,
+                 dry_run=False, new_slugs=False):
+        self.default_author = author
+        self.default_status = status
+        self.batch_size = max(1, batch_size)
+        self.reject = reject or (lambda number, row, errors: None)
+        self.dry_run = dry_run
+        self.new_slugs = new_slugs
+        self.validator = RowValidator()
+        self.slugs = SlugAllocator(prefetch=True)
+        self._authors = {}  # username -> pk (or None when there is no such user)
+        self._tags = {}  # slug -> pk
+        self.imported = 0
+        self.rejected = 0
+        self.published = False
+
+    def run(self, rows):
+        """Import ``(number, row)`` pairs; return the number of recipes created."""
+        batch = []
+        for number, row in rows:
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        self.finish()
+        return self.imported
+
+    def finish(self) -> None:
+        """Bring the derived data that is not kept per batch up to date."""
+        if self.imported and not self.dry_run:
+            pending.forget()
+            if self.published:
+                caching.purge_recipe_list()
+
+    # ---------- one batch ----------
+
+    def _fail(self, number, row, errors) -> None:
+        self.rejected += 1
+        self.reject(number, row, errors)
+
+    def _lookup_authors(self, names) -> None:
+        missing = {name for name in names if name not in self._authors}
+        if missing:
+            found = dict(User.objects.filter(username__in=missing).values_list("username", "pk"))
+            for name in missing:
+                self._authors[name] = found.get(name)
+
+    def _valid_recipes(self, batch) -> list:
+        """``(number, row, values)`` for the rows that pass validation.
+
+        ``values`` maps column attnames to the recipe's values.
+        """
+        cleaned_rows = []
+        for number, row in batch:
+            if isinstance(row, ValidationError):
+                self._fail(number, None, {"__all__": row.messages})
+                continue
+            if self.new_slugs:
+                cleaned, errors = self.validator.clean({**row, "slug": None})
+            else:
+                cleaned, errors = self.validator.clean(row)
+            cleaned["author"] = cleaned["author"] or self.default_author
+            if not cleaned["author"]:
+                errors["author"] = ["This field is required."]
+            if errors:
+                self._fail(number, row, errors)
+            else:
+                cleaned_rows.append((number, row, cleaned))
+
+        self._lookup_authors({cleaned["author"] for _, _, cleaned in cleaned_rows})
+        valid = []
+        # rows that bring their own slug claim it before any is allocated
+        for number, row, cleaned in cleaned_rows:
+            author_id = self._authors[cleaned.pop("author")]
+            slug = cleaned["slug"]
+            if author_id is None:
+                self._fail(number, row, {"author": ["No user with this username."]})
+            elif slug and not self.slugs.reserve(slug):
+                self._fail(number, row, {"slug": ["A recipe with this slug already exists."]})
+            else:
+                cleaned["author_id"] = author_id
+                cleaned["status"] = cleaned["status"] or self.default_status
+                valid.append((number, row, cleaned))
+        for _, _, values in valid:
+            values["slug"] = values["slug"] or self.slugs.allocate(values["title"])
+            # what Recipe.save() would store; the rows are inserted directly
+            values.update(
+                sort_columns(values["prep_minutes"], values["cook_minutes"], values["ingredients"])
+            )
+        return valid
+
+    def _import_batch(self, batch) -> None:
+        valid = self._valid_recipes(batch)
+        if not valid or self.dry_run:
+            self.imported += len(valid)
+            return
+        recipes = [values for _, _, values in valid]
+        try:
+            with transaction.atomic():
+                self._insert(recipes)
+        except IntegrityError:
+            # someone else took one of our slugs since they were read
+            self._import_one_by_one(valid)
+            return
+        self.imported += len(recipes)
+        self.published = self.published or any(r["status"] == "published" for r in recipes)
+
+    def _import_one_by_one(self, valid) -> None:
+        for number, row, values in valid:
+            try:
+                with transaction.atomic():
+                    self._insert([values])
+            except IntegrityError:
+                self._fail(number, row, {"slug": ["A recipe with this slug already exists."]})
+                continue
+            self.imported += 1
+            self.published = self.published or values["status"] == "published"
+
+    def _insert(self, recipes) -> None:
+        """Insert ``recipes`` (column values) with their tag links and search index rows."""
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        defaults = {
+            field.attname: field.get_db_prep_save(field.get_default(), connection)
+            for field in RECIPE_COLUMNS
+        }
+        defaults.update(created_at=now, updated_at=now)
+        names = list(defaults)
+        insert_rows(
+            Recipe, names, (tuple(r.get(name, defaults[name]) for name in names) for r in recipes)
+        )
+        ids = dict(
+            Recipe.objects.filter(slug__in=[r["slug"] for r in recipes]).values_list("slug", "pk")
+        )
+        parsed = {ids[r["slug"]]: normalize_tags(r["tags"]) for r in recipes}
+        tag_names = {}
+        for tags in parsed.values():
+            for slug, name in tags.items():
+                tag_names.setdefault(slug, name)
+        missing = [slug for slug in tag_names if slug not in self._tags]
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(slug=slug, name=tag_names[slug]) for slug in missing], ignore_conflicts=True
+            )
+            self._tags.update(Tag.objects.filter(slug__in=missing).values_list("slug", "pk"))
+        insert_rows(
+            RecipeTag, ("recipe", "tag"),
+            ((pk, self._tags[slug]) for pk, tags in parsed.items() for slug in tags),
+        )
+        search.index_recipes(parsed)
@@ -1,5 +1,6 @@
 """Management commands package for the recipes app.
 
-Provides scripts for seeding demo data, migrating media, and fixing local
-media paths during development.
+Provides scripts for seeding demo data, migrating media, fixing local
+media paths during development, and rebuilding derived data such as the
+search index.
 """
@@ -0,0 +1,135 @@
+"""Management command to benchmark the main views against a synthetic dataset.
+
+Usage:
+    python manage.py benchmark [--output report.json] [--baseline old.json]
+                               [--recipes N] [--comments N] [--repeat N]
+                               [--only NAME ...] [--fail-on-latency]
+                               [--concurrency N [--requests N]]
+
+A throwaway test database is created, seeded and destroyed around the run,
+so the configured database is never touched.  The command exits with an
+error when any view runs more queries than its budget in
+``recipes.benchmarks.BENCHMARKS`` (or, with ``--fail-on-latency``, when
+its median latency is over budget).
+
+The JSON API benchmarks are also listed against the HTML views they
+replace, by response size and median latency.
+
+``--concurrency N`` adds a throughput comparison of the list and detail
+views served through WSGI (sync views, N threads) and ASGI (async views,
+N concurrent tasks).
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from recipes import benchmarks
+
+
+class Command(BaseCommand):
+    """Run the view benchmarks and write a machine-readable report."""
+
+    help = "Time the main views on a seeded throwaway database and check query budgets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--baseline", help="Previous JSON report to compare against.")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per benchmark.")
+        parser.add_argument("--users", type=int, default=benchmarks.DEFAULT_DATASET["users"])
+        parser.add_argument("--recipes", type=int, default=benchmarks.DEFAULT_DATASET["recipes"])
+        parser.add_argument(
+            "--comments", type=int, default=benchmarks.DEFAULT_DATASET["comments"],
+            help="Approved comments on the benchmarked detail page.",
+        )
+        parser.add_argument(
+            "--pending-comments", type=int,
+            default=benchmarks.DEFAULT_DATASET["pending_comments"],
+        )
+        parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these benchmarks.")
+        parser.add_argument(
+            "--fail-on-latency", action="store_true",
+            help="Also fail when a median latency is over budget.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=0,
+            help="Also measure WSGI vs ASGI throughput with this many requests in flight.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per throughput measurement."
+        )
+
+    def handle(self, *args, **options):
+        """Run on a fresh test database, print a table and check the budgets."""
+        dataset = {
+            "users": options["users"],
+            "recipes": options["recipes"],
+            "comments": options["comments"],
+            "pending_comments": options["pending_comments"],
+        }
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = benchmarks.run(
+                dataset=dataset, repeat=options["repeat"], only=options["only"],
+                concurrency=options["concurrency"], requests=options["requests"],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self._print_table(report)
+        if report.get("api_vs_html"):
+            self._print_versus(report["api_vs_html"])
+        if report.get("throughput"):
+            self._print_throughput(report["throughput"])
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as fh:
+                self._print_comparison(report, json.load(fh))
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        over = [r["name"] for r in report["results"] if not r["within_query_budget"]]
+        if options["fail_on_latency"]:
+            over += [r["name"] for r in report["results"] if not r["within_latency_budget"]]
+        if over:
+            raise CommandError(f"Over budget: {', '.join(sorted(set(over)))}")
+        self.stdout.write(self.style.SUCCESS("All benchmarks within their query budgets."))
+
+    def _print_table(self, report) -> None:
+        self.stdout.write(
+            f"{'benchmark':<24}{'queries':>12}{'median ms':>14}{'p95 ms':>10}{'KB':>9}"
+        )
+        for r in report["results"]:
+            queries = f"{r['queries']}/{r['max_queries']}"
+            median = f"{r['median_ms']:.1f}/{r['latency_budget_ms']}"
+            line = (
+                f"{r['name']:<24}{queries:>12}{median:>14}{r['p95_ms']:>10.1f}"
+                f"{r['bytes'] / 1024:>9.1f}"
+            )
+            ok = r["within_query_budget"] and r["within_latency_budget"]
+            self.stdout.write(line if ok else self.style.WARNING(line))
+
+    def _print_versus(self, pairs) -> None:
+        self.stdout.write(f"\n{'api vs html':<24}{'html':>20}{'size':>8}{'speedup':>9}")
+        for p in pairs:
+            size = f"{p['bytes_ratio']:.0%}" if p["bytes_ratio"] is not None else "-"
+            speedup = f"{p['speedup']:.1f}x" if p["speedup"] is not None else "-"
+            self.stdout.write(f"{p['name']:<24}{p['versus']:>20}{size:>8}{speedup:>9}")
+
+    def _print_throughput(self, results) -> None:
+        self.stdout.write(f"\n{'throughput':<24}{'server':>8}{'req/s':>10}{'errors':>8}")
+        for r in results:
+            self.stdout.write(
+                f"{r['name']:<24}{r['server']:>8}{r['requests_per_s']:>10.1f}{r['errors']:>8}"
+            )
+
+    def _print_comparison(self, report, baseline) -> None:
+        self.stdout.write("\nChange vs baseline:")
+        for name, metric, before, after in benchmarks.compare(report, baseline):
+            if before != after:
+                self.stdout.write(f"  {name} {metric}: {before} -> {after}")
@@ -5,32 +5,101 @@ fix common issues seen during development (for example, leading
 "media/" prefixes or incorrect file locations). It can run in
 ``--dry-run`` mode to show proposed fixes without making database
 changes.
+
+The media directory is scanned once into a :class:`MediaIndex` (with
+``--workers N`` threads listing directories in parallel, which helps on
+network filesystems where every listing is a round trip), and every recipe
+is matched against that index instead of touching the filesystem itself.
+Fixes are written with batched ``bulk_update``, which sends no signals, so
+the command itself bumps the cached cards, purges the list pages and
+rebuilds the responsive variants of each repaired image.
 """
 
+import bisect
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db.models import F
+from recipes import caching, images
 from recipes.models import Recipe
-from pathlib import Path
 
+# A slug may match a file name at its start or right after one of these.
+WORD_START = re.compile(r"(?:^|[^a-z0-9])(?=[a-z0-9])")
+
+
+def _scan(directory):
+    files, subdirs = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file():
+                files.append(entry.path)
+    return files, subdirs
+
+
+class MediaIndex:
+    """Every file under ``media_root``, listed once.
+
+    ``paths`` holds the relative POSIX path of each file.  Files directly in
+    ``media_root/recipes`` are also indexed by every word-start suffix of
+    their lowercased name, kept sorted, so the files whose name contains a
+    slug at a word start are one binary search away.
+    """
+
+    def __init__(self, media_root: Path, workers: int = 1):
+        self.media_root = Path(media_root)
+        self.paths = set()
+        self._suffixes = []  # sorted (suffix, name)
+        if self.media_root.is_dir():
+            self._build(workers)
 
-def find_best_match(media_root: Path, slug: str):
-    """Find a filename in media_root/recipes that best matches the recipe slug.
-    Returns the relative path under media_root (e.g. 'recipes/xxx.webp') or None."""
-    candidates = []
-    recipes_dir = media_root / "recipes"
-    if not recipes_dir.exists():
-        return None
-    for p in recipes_dir.iterdir():
-        if not p.is_file():
-            continue
-        name = p.name.lower()
-        if slug.lower() in name:
-            candidates.append(p)
-    if not candidates:
-        return None
-    # prefer exact or startswith matches
-    candidates.sort(key=lambda p: (0 if p.name.lower().startswith(slug.lower()) else 1, -len(p.name)))
-    return Path("recipes") / candidates[0].name
+    def _build(self, workers):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            queue = [pool.submit(_scan, self.media_root)]
+            while queue:
+                files, subdirs = queue.pop().result()
+                queue.extend(pool.submit(_scan, d) for d in subdirs)
+                for path in files:
+                    self.paths.add(Path(path).relative_to(self.media_root).as_posix())
+        for path in self.paths:
+            directory, _, name = path.rpartition("/")
+            if directory != "recipes":
+                continue
+            lowered = name.lower()
+            for match in WORD_START.finditer(lowered):
+                self._suffixes.append((lowered[match.end():], name))
+        self._suffixes.sort()
+
+    def exists(self, relative: str) -> bool:
+        return relative in self.paths
+
+    def best_match(self, slug: str):
+        """Return ``recipes/<name>`` for the file that best matches ``slug``, or None.
+
+        Names starting with the slug win over names containing it later;
+        among those, the longest name wins.
+        """
+        slug = slug.lower()
+        if not slug:
+            return None
+        start = bisect.bisect_left(self._suffixes, (slug,))
+        candidates = set()
+        for suffix, name in self._suffixes[start:]:
+            if not suffix.startswith(slug):
+                break
+            candidates.add(name)
+        if not candidates:
+            return None
+        best = min(
+            candidates,
+            key=lambda n: (0 if n.lower().startswith(slug) else 1, -len(n), n),
+        )
+        return f"recipes/{best}"
 
 
 class Command(BaseCommand):
@@ -43,14 +112,22 @@ class Command(BaseCommand):
         parser.add_argument(
             "--dry-run", action="store_true", help="Do not modify DB; just show proposed changes"
         )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Threads listing the media directory"
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk update")
 
     def handle(self, *args, **options):
         dry = options.get("dry_run")
         media_root = Path(settings.MEDIA_ROOT)
-        updated = 0
-        missing = 0
         self.stdout.write(f"MEDIA_ROOT = {media_root}")
-        for r in Recipe.objects.all():
+        index = MediaIndex(media_root, workers=options["workers"])
+        self.stdout.write(f"Indexed {len(index.paths)} files.")
+
+        fixes = []
+        missing = 0
+        recipes = Recipe.objects.only("pk", "slug", "image", "image_variants")
+        for r in recipes.order_by("pk").iterator():
             raw = (r.image.name or "").strip()
             if not raw:
                 continue
@@ -61,26 +138,34 @@ class Command(BaseCommand):
                 if proposed.startswith("/"):
                     proposed = proposed[1:]
 
-            file_path = media_root / proposed
-            if file_path.exists():
+            if index.exists(proposed):
                 if proposed != raw:
                     self.stdout.write(f"Will update {r.slug}: '{raw}' -> '{proposed}'")
-                    if not dry:
-                        r.image.name = proposed
-                        r.save(update_fields=["image"])
-                        updated += 1
+                    fixes.append((r, proposed))
                 continue
 
             # not found at proposed path, try to find a best match by slug
-            match = find_best_match(media_root, r.slug)
+            match = index.best_match(r.slug)
             if match:
-                self.stdout.write(f"Found match for {r.slug}: '{raw}' -> '{match.as_posix()}'")
-                if not dry:
-                    r.image.name = match.as_posix()
-                    r.save(update_fields=["image"])
-                    updated += 1
+                self.stdout.write(f"Found match for {r.slug}: '{raw}' -> '{match}'")
+                fixes.append((r, match))
             else:
                 self.stdout.write(f"Missing file for {r.slug}: stored='{raw}'")
                 missing += 1
 
-        self.stdout.write(f"Done: updated={updated}, missing={missing}")
\ No newline at end of file
+        if not dry and fixes:
+            for r, name in fixes:
+                r.image.name = name
+                # bulk_update skips signals, so invalidate cached cards here
+                r.cache_version = F("cache_version") + 1
+            Recipe.objects.bulk_update(
+                [r for r, _ in fixes], ["image", "cache_version"],
+                batch_size=options["batch_size"],
+            )
+            # the variants still describe the old path (see recipes.images)
+            for r, _ in fixes:
+                if images.needs_refresh(r):
+                    images.refresh_variants(r)
+            caching.purge_recipe_list()
+        updated = 0 if dry else len(fixes)
+        self.stdout.write(f"Done: updated={updated}, missing={missing}")
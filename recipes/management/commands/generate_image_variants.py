@@ -0,0 +1,59 @@
+"""Management command to build responsive variants for existing recipe images.
+
+Usage:
+    python manage.py generate_image_variants [--force] [--dry-run]
+
+Images uploaded since variants were introduced get them on save; this
+backfills the rest.  Recipes whose variants already match their image are
+skipped unless ``--force`` is given.
+"""
+
+from django.core.management.base import BaseCommand
+
+from recipes import caching, images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Generate WebP/AVIF variants and placeholders for ``Recipe.image``."""
+
+    help = "Build responsive image variants for recipes that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild variants for every image.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be built.")
+
+    def handle(self, *args, **options):
+        """Walk recipes with images and (re)build their variants."""
+        formats = images.available_formats()
+        if not formats:
+            self.stderr.write("This Pillow build cannot write WebP or AVIF; nothing to do.")
+            return
+        self.stdout.write(f"Formats: {', '.join(formats)}; widths: {images.variant_widths()}")
+
+        qs = (
+            Recipe.objects.exclude(image__isnull=True).exclude(image="")
+            .only("pk", "slug", "image", "image_variants").order_by("pk")
+        )
+        built = skipped = failed = 0
+        for recipe in qs.iterator(chunk_size=200):
+            if not options["force"] and not images.needs_refresh(recipe):
+                skipped += 1
+                continue
+            if options["dry_run"]:
+                self.stdout.write(f"Would build {recipe.slug}: {recipe.image.name}")
+                built += 1
+                continue
+            if images.refresh_variants(recipe).get("formats"):
+                built += 1
+                self.stdout.write(f"Built {recipe.slug}")
+            else:
+                failed += 1
+                self.stderr.write(f"Could not read {recipe.slug}: {recipe.image.name}")
+
+        if built and not options["dry_run"]:
+            caching.purge_recipe_list()
+        verb = "Would build" if options["dry_run"] else "Built"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {built}, skipped {skipped}, failed {failed}.")
+        )
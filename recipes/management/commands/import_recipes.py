@@ -0,0 +1,102 @@
+"""Management command to bulk-import recipes from NDJSON or CSV.
+
+Usage:
+    python manage.py import_recipes FILE [--format ndjson|csv]
+        [--author USERNAME] [--status draft|published]
+        [--rejects FILE] [--batch-size N] [--new-slugs] [--dry-run]
+
+The file is read as a stream and imported ``--batch-size`` rows at a time,
+each batch in one transaction (see :mod:`recipes.importer`).  Rows are
+validated with ``RecipeForm``'s rules; rows naming no author get
+``--author``, rows naming no status get ``--status`` (``draft``, i.e.
+awaiting moderation, unless told otherwise).  Rows that cannot be imported
+are written to the ``--rejects`` file as NDJSON, with their row number and
+errors, so they can be fixed and imported again.  ``FILE`` may be ``-`` for
+standard input.  Rows keep the slugs they bring unless ``--new-slugs`` is
+given; use it to import ``export_recipes`` output back into the database
+it came from, where those slugs are taken.
+"""
+
+import json
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import importer
+from recipes.models import STATUS_CHOICES
+
+
+class Command(BaseCommand):
+    help = "Bulk-import recipes from an NDJSON or CSV file, writing invalid rows to a reject file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="NDJSON or CSV file to import ('-' for stdin).")
+        parser.add_argument(
+            "--format", choices=importer.FORMATS,
+            help="Input format (default: from the file extension, else ndjson).",
+        )
+        parser.add_argument("--author", help="Username for rows without an author.")
+        parser.add_argument(
+            "--status", choices=[value for value, _ in STATUS_CHOICES], default="draft",
+            help="Status for rows without one (default: draft).",
+        )
+        parser.add_argument(
+            "--rejects", help="Where to write rejected rows (default: FILE.rejects.ndjson)."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=importer.BATCH_SIZE,
+            help="Rows per bulk insert and transaction.",
+        )
+        parser.add_argument(
+            "--new-slugs", action="store_true",
+            help="Ignore the rows' slugs and allocate new ones (to re-import exports).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate only; write nothing to the database."
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        rejects_path = Path(
+            options["rejects"] or ("rejects.ndjson" if path == "-" else f"{path}.rejects.ndjson")
+        )
+        try:
+            # stdin is not ours to close
+            opened = (
+                nullcontext(sys.stdin) if path == "-"
+                else open(path, encoding="utf-8-sig", newline="")
+            )
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        start = time.perf_counter()
+        with opened as source, rejects_path.open("w", encoding="utf-8") as rejects:
+
+            def reject(number, row, errors):
+                rejects.write(
+                    json.dumps({"row": number, "errors": errors, "data": row}, ensure_ascii=False)
+                    + "\n"
+                )
+
+            run = importer.Importer(
+                author=options["author"], status=options["status"],
+                batch_size=options["batch_size"], reject=reject, dry_run=options["dry_run"],
+                new_slugs=options["new_slugs"],
+            )
+            run.run(importer.read_rows(source, fmt))
+
+        elapsed = time.perf_counter() - start
+        rate = run.imported / elapsed if elapsed else 0.0
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{verb} {run.imported} recipes in {elapsed:.1f}s ({rate:.0f}/s); "
+            f"rejected {run.rejected}."
+        )
+        if run.rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}.")
+        elif not options["rejects"]:
+            rejects_path.unlink(missing_ok=True)
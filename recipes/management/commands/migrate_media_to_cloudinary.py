@@ -1,19 +1,77 @@
-"""Management command to migrate Recipe.image fields through the
-configured storage backend.
+"""Management command to migrate Recipe.image files to the configured storage.
 
-This module provides a Django management command that iterates recipes
-with ImageField values and re-saves them to trigger the storage backend
-(for example, to upload local files to Cloudinary). It supports
-``--dry-run`` and ``--force`` flags.
+Usage:
+    python manage.py migrate_media_to_cloudinary [--workers N]
+        [--checkpoint FILE] [--retries N] [--backoff SECONDS]
+        [--source-root DIR] [--dry-run] [--force]
+
+Each recipe's image is read from the local media directory (``MEDIA_ROOT``
+unless ``--source-root`` is given) and saved through the storage backend of
+``Recipe.image`` (Cloudinary in production), then the recipe row is pointed
+at the name that backend returns.  Files are streamed: the open file is
+handed to the backend, which reads it in chunks, so a large library never
+has a whole image in memory per worker.
+
+With ``--workers N`` uploads run on a thread pool; database writes stay on
+the main thread.  Every finished recipe is appended to the ``--checkpoint``
+file, so rerunning after a crash or a ``Ctrl-C`` skips work already done
+(``--force`` ignores the checkpoint).  Failed uploads are retried with
+exponential backoff; missing files are not.  A summary with throughput is
+printed at the end.
 """
 
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db.models import F
+from recipes import caching
 from recipes.models import Recipe
 
+# Errors that retrying cannot fix.
+PERMANENT_ERRORS = (FileNotFoundError, IsADirectoryError, PermissionError, ValueError)
+
+
+def read_checkpoint(path: Path) -> set[int]:
+    """Return the recipe pks recorded as done in ``path`` (empty if it does not exist)."""
+    if not path.exists():
+        return set()
+    done = set()
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            pk = line.split("\t", 1)[0].strip()
+            if pk.isdigit():
+                done.add(int(pk))
+    return done
+
+
+def upload(source, target, name, retries=3, backoff=0.5):
+    """Stream ``name`` from ``source`` to ``target``; return ``(new_name, bytes)``.
+
+    Transient failures are retried up to ``retries`` times, sleeping
+    ``backoff * 2**attempt`` seconds (with jitter) in between.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with source.open(name, "rb") as fh:
+                size = source.size(name)
+                new_name = target.save(name, File(fh, name=Path(name).name))
+            return new_name, size
+        except PERMANENT_ERRORS:
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+
 
 class Command(BaseCommand):
-    help = "Migrate local media files (Recipe.image) to the configured storage (Cloudinary) by re-saving fields."
+    help = "Migrate local media files (Recipe.image) to the configured storage (Cloudinary)."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -24,48 +82,100 @@ class Command(BaseCommand):
         parser.add_argument(
             "--force",
             action="store_true",
-            help="Force re-upload even if URL looks remote (starts with http).",
+            help="Re-upload recipes the checkpoint records as done.",
+        )
+        parser.add_argument("--workers", type=int, default=1, help="Concurrent uploads.")
+        parser.add_argument(
+            "--checkpoint",
+            default="media_migration.checkpoint",
+            help="File recording finished recipes, so a rerun resumes where this one stopped.",
+        )
+        parser.add_argument("--retries", type=int, default=3, help="Retries per file on failure.")
+        parser.add_argument(
+            "--backoff", type=float, default=0.5, help="Initial retry delay in seconds (doubles)."
+        )
+        parser.add_argument(
+            "--source-root", help="Directory holding the local files (default MEDIA_ROOT)."
         )
 
     def handle(self, *args, **options):
-        dry_run = options["dry_run"]
-        force = options["force"]
+        source_root = options["source_root"] or settings.MEDIA_ROOT or settings.BASE_DIR / "media"
+        source = FileSystemStorage(location=source_root)
+        target = Recipe._meta.get_field("image").storage
+        checkpoint = Path(options["checkpoint"])
+        done = set() if options["force"] else read_checkpoint(checkpoint)
 
         qs = Recipe.objects.exclude(image__isnull=True).exclude(image__exact="")
         total = qs.count()
         self.stdout.write(f"Found {total} recipes with an image field set.")
-        if total == 0:
+        if done:
+            self.stdout.write(f"Checkpoint {checkpoint}: {len(done)} already migrated.")
+
+        todo = []
+        skipped = 0
+        for pk, slug, name in qs.order_by("pk").values_list("pk", "slug", "image").iterator():
+            if pk in done:
+                skipped += 1
+            elif not source.exists(name):
+                # nothing local to upload (already remote, or lost)
+                self.stdout.write(f"Skipping {slug}: {name} is not in {source_root}")
+                skipped += 1
+            else:
+                todo.append((pk, slug, name))
+        if options["dry_run"]:
+            for _, slug, name in todo:
+                self.stdout.write(f"Would upload {slug}: {name}")
+            self.stdout.write(f"Dry run. Would migrate={len(todo)} Skipped={skipped}")
             return
 
-        migrated = 0
-        errors = 0
-
-        for r in qs.iterator():
-            img = r.image
-            url = getattr(img, "url", None)
-            name = getattr(img, "name", None)
-
-            # Skip remote URLs unless --force
-            if url and url.startswith("http") and not force:
-                self.stdout.write(f"Skipping remote image for {r.slug}: {url}")
-                continue
-
-            self.stdout.write(f"Processing {r.slug}: field={name} url={url}")
-
-            if dry_run:
-                continue
-
-            try:
-                # Re-save the field to trigger the storage backend (uploads to Cloudinary)
-                with transaction.atomic():
-                    # read the file from storage and reassign (ensures backend.save is called)
-                    f = r.image.open("rb")
-                    content = f.read()
-                    f.close()
-                    r.image.save(name, content, save=True)
-                migrated += 1
-            except Exception as e:  # pragma: no cover - runtime errors
-                errors += 1
-                self.stderr.write(f"Error migrating {r.slug}: {e}")
-
-        self.stdout.write(f"Done. Migrated={migrated} Errors={errors}")
+        migrated = errors = size = 0
+        start = time.perf_counter()
+        with checkpoint.open("a", encoding="utf-8") as log, ThreadPoolExecutor(
+            max_workers=max(1, options["workers"])
+        ) as pool:
+            pending = {}
+            items = iter(todo)
+            # keep a bounded number of uploads in flight
+            limit = max(1, options["workers"]) * 4
+            while True:
+                for pk, slug, name in items:
+                    future = pool.submit(
+                        upload, source, target, name, options["retries"], options["backoff"]
+                    )
+                    pending[future] = (pk, slug, name)
+                    if len(pending) >= limit:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pk, slug, name = pending.pop(future)
+                    try:
+                        new_name, nbytes = future.result()
+                    except Exception as e:
+                        errors += 1
+                        self.stderr.write(f"Error migrating {slug}: {e}")
+                        continue
+                    # bump cache_version so cached cards pick up the new URL
+                    Recipe.objects.filter(pk=pk).update(
+                        image=new_name, cache_version=F("cache_version") + 1
+                    )
+                    log.write(f"{pk}\t{new_name}\n")
+                    log.flush()
+                    migrated += 1
+                    size += nbytes
+                    self.stdout.write(f"Migrated {slug}: {name} -> {new_name}")
+
+        if migrated:
+            caching.purge_recipe_list()
+        elapsed = time.perf_counter() - start
+        rate = migrated / elapsed if elapsed else 0.0
+        mb_rate = size / 1_000_000 / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"Done. Migrated={migrated} Skipped={skipped} Errors={errors} "
+            f"in {elapsed:.1f}s ({rate:.1f} files/s, {mb_rate:.2f} MB/s)"
+        )
+        if migrated:
+            self.stdout.write(
+                "Run `manage.py generate_image_variants` to rebuild responsive variants."
+            )
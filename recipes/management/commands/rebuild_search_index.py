@@ -0,0 +1,24 @@
+"""Management command to rebuild the recipe full-text search index.
+
+The index is normally kept up to date by signal handlers when recipes are
+saved or deleted.  Run this after bulk loads that bypass model signals
+(``bulk_create``, raw SQL, ``loaddata``) or to repair a damaged index.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for all recipes in bulk."
+
+    def handle(self, *args, **options):
+        backend = search.backend()
+        if backend == "none":
+            self.stdout.write("No full-text index for this database backend; nothing to do.")
+            return
+        with transaction.atomic():
+            indexed = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} recipes ({backend})."))
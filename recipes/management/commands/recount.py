@@ -0,0 +1,44 @@
+"""Management command to repair the denormalized counters on ``Recipe``.
+
+``rating_count``, ``rating_sum``, the star histogram (``ratings_1`` …
+``ratings_5``) and ``approved_comment_count`` are kept up to date
+incrementally by signal handlers.  Writes that bypass signals
+(``QuerySet.update``, ``bulk_create``, raw SQL) can make them drift; this
+command recomputes them from the ``Rating`` and ``Comment`` tables, along
+with each recipe's ``top_score`` (so it also applies changed
+``RECIPE_TOP_PRIOR_*`` settings).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute rating and comment counters on every recipe."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report recipes whose counters have drifted.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = counters.find_drift()
+        for r in drifted[:50]:
+            self.stdout.write(
+                f"Drift on {r.slug}: ratings {r.rating_count}->{r.actual_rating_count}, "
+                f"stars {r.rating_sum}->{r.actual_rating_sum}, "
+                f"comments {r.approved_comment_count}->{r.actual_approved_comment_count}"
+            )
+        total = drifted.count()
+        if options["dry_run"]:
+            self.stdout.write(f"{total} recipes have drifted counters.")
+            return
+        with transaction.atomic():
+            updated = counters.recount()
+        self.stdout.write(
+            self.style.SUCCESS(f"Recounted {updated} recipes ({total} had drifted).")
+        )
@@ -2,14 +2,69 @@
 
 Usage:
     python manage.py seed_demo
+    python manage.py seed_demo --users 1000 --recipes 20000 \
+        --comments-per-recipe 5 --ratings-per-recipe 50 --seed 1
 
-This is safe to run multiple times; it will create or update items idempotently.
+Without options it creates the small hand-written demo set; this is safe to
+run multiple times and creates or updates items idempotently.
+
+With ``--users``/``--recipes`` it generates a large synthetic dataset for
+reproducing production-scale behaviour.  The data is deterministic for a
+given ``--seed``, inserted with batched ``bulk_create`` one recipe batch at
+a time (so memory stays bounded), and names are prefixed with the seed so
+re-running skips rows that already exist.  Counters are computed while
+generating and the search index is rebuilt once at the end.
 """
 
+import itertools
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from django.db import transaction
-from recipes.models import Recipe, Comment, Rating
+from django.db import connection, transaction
+from django.utils import timezone
+from recipes import caching, counters, pending, search
+from recipes.importer import insert_rows
+from recipes.models import Recipe, Comment, Rating, RecipeTag, Tag, normalize_tags, sort_columns
+
+# Word pools for generated recipes.
+ADJECTIVES = [
+    "Smoky", "Crispy", "Creamy", "Spicy", "Zesty", "Rustic", "Golden", "Hearty",
+    "Tangy", "Herby", "Garlicky", "Sticky", "Roasted", "Grilled", "Quick", "Slow-cooked",
+]
+DISHES = [
+    "Chicken Curry", "Lentil Soup", "Tomato Pasta", "Beef Stew", "Veggie Tacos",
+    "Banana Bread", "Fried Rice", "Caesar Salad", "Mushroom Risotto", "Fish Pie",
+    "Pancakes", "Chili", "Flatbread", "Noodle Bowl", "Tofu Stir-fry", "Apple Crumble",
+]
+INGREDIENTS = [
+    "1 onion, diced", "2 cloves garlic", "1 tbsp olive oil", "400g chopped tomatoes",
+    "1 tsp cumin", "200g rice", "2 eggs", "100g butter", "250ml milk", "1 lemon",
+    "Salt and pepper", "1 bunch parsley", "300g chicken thighs", "1 can chickpeas",
+    "200g flour", "1 tsp paprika", "1 carrot, grated", "50g parmesan", "1 chilli",
+]
+STEPS = [
+    "Heat the oil in a large pan.", "Add the onion and cook until soft.",
+    "Stir in the spices and cook for a minute.", "Add the remaining ingredients.",
+    "Simmer for 20 minutes, stirring occasionally.", "Season to taste.",
+    "Bake until golden.", "Rest for five minutes before serving.",
+    "Garnish and serve warm.",
+]
+TAGS = [
+    "quick", "vegetarian", "vegan", "dinner", "breakfast", "dessert", "spicy",
+    "comfort food", "healthy", "baking", "one pot", "gluten free", "budget",
+]
+COMMENTS = [
+    "Made this tonight and loved it!", "Great recipe, will make again.",
+    "I added extra garlic — delicious.", "Too salty for my taste.",
+    "Easy to follow, thanks for sharing.", "My kids asked for seconds.",
+    "Turned out perfectly.", "Needed a bit longer in the oven.",
+]
+# Ratings skew positive, as they do on real sites.
+STARS = [1, 2, 3, 4, 5]
+STAR_CUM_WEIGHTS = list(itertools.accumulate([5, 8, 17, 35, 35]))
 
 
 class Command(BaseCommand):
@@ -17,8 +72,21 @@ class Command(BaseCommand):
 
     help = "Seed demo users, recipes, comments, and ratings."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, help="Generate this many users (bulk mode).")
+        parser.add_argument("--recipes", type=int, help="Generate this many recipes (bulk mode).")
+        parser.add_argument("--comments-per-recipe", type=int, default=3)
+        parser.add_argument("--ratings-per-recipe", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for bulk mode.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Recipes per batch.")
+
     def handle(self, *args, **options):
         """Create users, recipes, comments, and ratings, then print a summary."""
+        if options["users"] is not None or options["recipes"] is not None:
+            self._bulk_seed(options)
+            self._print_summary()
+            return
+
         with transaction.atomic():
             users = self._ensure_users()
             recipes = self._ensure_recipes(users["alice"])
@@ -249,6 +317,159 @@ class Command(BaseCommand):
                 recipe=recipe, user=users["bob"], defaults={"stars": 4 if "salad" in slug else 3}
             )
 
+    # ---------- bulk mode ----------
+
+    def _bulk_seed(self, options) -> None:
+        """Generate users, recipes, comments and ratings in batches."""
+        rng = random.Random(options["seed"])
+        prefix = f"seed{options['seed']}"
+        batch_size = max(1, options["batch_size"])
+        started = time.monotonic()
+
+        user_ids = self._bulk_users(prefix, options["users"] or 0, batch_size)
+        if not user_ids:
+            user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+        if not user_ids:
+            self.stderr.write("No users to author recipes; pass --users.")
+            return
+        per_recipe_ratings = min(options["ratings_per_recipe"], len(user_ids))
+        if per_recipe_ratings < options["ratings_per_recipe"]:
+            self.stdout.write(
+                f"Only {len(user_ids)} users: capping ratings per recipe at {per_recipe_ratings}."
+            )
+
+        total = options["recipes"] or 0
+        tag_ids = {}
+        made = {"recipes": 0, "comments": 0, "ratings": 0}
+        for start in range(0, total, batch_size):
+            numbers = range(start, min(start + batch_size, total))
+            with transaction.atomic():
+                self._bulk_recipe_batch(
+                    rng, prefix, numbers, user_ids, options["comments_per_recipe"],
+                    per_recipe_ratings, tag_ids, made,
+                )
+            self.stdout.write(
+                f"  recipes {numbers[-1] + 1}/{total} · new recipes {made['recipes']} · "
+                f"comments {made['comments']} · ratings {made['ratings']} · "
+                f"{time.monotonic() - started:.1f}s"
+            )
+
+        search.rebuild_index()
+        pending.forget()
+        caching.purge_recipe_list()
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Bulk data seeded in {time.monotonic() - started:.1f}s.\n")
+        )
+
+    def _bulk_users(self, prefix, count, batch_size) -> list[int]:
+        """Create ``count`` users (skipping existing ones) and return their ids."""
+        if not count:
+            return []
+        password = make_password("testpass123")  # hashing is slow; do it once
+        for start in range(0, count, batch_size):
+            User.objects.bulk_create(
+                [
+                    User(username=f"{prefix}-user{i}", email=f"{prefix}-user{i}@example.com",
+                         password=password)
+                    for i in range(start, min(start + batch_size, count))
+                ],
+                ignore_conflicts=True,
+            )
+        self.stdout.write(f"  users {count}")
+        return list(
+            User.objects.filter(username__startswith=f"{prefix}-user")
+            .order_by("pk")
+            .values_list("pk", flat=True)[:count]
+        )
+
+    def _bulk_recipe_batch(
+        self, rng, prefix, numbers, user_ids, comments_per_recipe, ratings_per_recipe,
+        tag_ids, made,
+    ) -> None:
+        """Insert one batch of recipes with their comments, ratings and tags."""
+        # Draw every random number first so output depends only on the seed,
+        # not on which rows already exist.
+        planned = {}
+        for i in numbers:
+            dish = rng.choice(DISHES)
+            title = f"{rng.choice(ADJECTIVES)} {dish}"
+            raters = rng.sample(range(len(user_ids)), ratings_per_recipe)
+            stars = rng.choices(STARS, cum_weights=STAR_CUM_WEIGHTS, k=ratings_per_recipe)
+            ratings = [(user_ids[u], n) for u, n in zip(raters, stars)]
+            comments = [
+                (user_ids[rng.randrange(len(user_ids))], rng.choice(COMMENTS), rng.random() < 0.9)
+                for _ in range(comments_per_recipe)
+            ]
+            recipe = Recipe(
+                author_id=user_ids[rng.randrange(len(user_ids))],
+                title=title,
+                slug=f"{prefix}-recipe-{i}",
+                excerpt=f"A {title.lower()} for any night of the week.",
+                description=f"Our take on {dish.lower()}, tested and loved.",
+                ingredients="\n".join(rng.sample(INGREDIENTS, rng.randint(4, 10))),
+                steps="\n".join(rng.sample(STEPS, rng.randint(3, 7))),
+                tags=", ".join(rng.sample(TAGS, rng.randint(1, 3))),
+                prep_minutes=rng.randint(5, 45),
+                cook_minutes=rng.randint(0, 120),
+                servings=rng.randint(1, 8),
+                status="published" if rng.random() < 0.95 else "draft",
+                # counters are known up front, so no recount is needed
+                rating_count=len(ratings),
+                rating_sum=sum(s for _, s in ratings),
+                approved_comment_count=sum(1 for c in comments if c[2]),
+                top_score=counters.top_score(len(ratings), sum(s for _, s in ratings)),
+                **{f"ratings_{star}": stars.count(star) for star in STARS},
+            )
+            # bulk_create skips save(), which keeps the sort columns
+            columns = sort_columns(recipe.prep_minutes, recipe.cook_minutes, recipe.ingredients)
+            for name, value in columns.items():
+                setattr(recipe, name, value)
+            planned[recipe.slug] = (recipe, ratings, comments)
+
+        existing = set(Recipe.objects.filter(slug__in=planned).values_list("slug", flat=True))
+        for slug in existing:
+            del planned[slug]
+        if not planned:
+            return
+        Recipe.objects.bulk_create([recipe for recipe, _, _ in planned.values()])
+        ids = dict(Recipe.objects.filter(slug__in=planned).values_list("slug", "pk"))
+
+        # Ratings and comments are the bulk of the rows; inserting plain tuples
+        # skips building a model instance and compiling SQL for each one.
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        insert_rows(
+            Rating, ("recipe", "user", "stars", "created_at"),
+            (
+                (ids[slug], user_id, stars, now)
+                for slug, (_, ratings, _) in planned.items()
+                for user_id, stars in ratings
+            ),
+        )
+        insert_rows(
+            Comment, ("recipe", "user", "body", "approved", "created_at"),
+            (
+                (ids[slug], user_id, body, approved, now)
+                for slug, (_, _, comments) in planned.items()
+                for user_id, body, approved in comments
+            ),
+        )
+
+        links = []
+        for slug, (recipe, _, _) in planned.items():
+            parsed = normalize_tags(recipe.tags)
+            missing = [t for t in parsed if t not in tag_ids]
+            if missing:
+                Tag.objects.bulk_create(
+                    [Tag(slug=t, name=parsed[t]) for t in missing], ignore_conflicts=True
+                )
+                tag_ids.update(Tag.objects.filter(slug__in=missing).values_list("slug", "pk"))
+            links.extend(RecipeTag(recipe_id=ids[slug], tag_id=tag_ids[t]) for t in parsed)
+        RecipeTag.objects.bulk_create(links, batch_size=5000)
+
+        made["recipes"] += len(planned)
+        made["ratings"] += sum(len(r) for _, r, _ in planned.values())
+        made["comments"] += sum(len(c) for _, _, c in planned.values())
+
     def _print_summary(self) -> None:
         """Print a compact summary of counts for quick verification."""
         total_recipes = Recipe.objects.count()
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:00
+
+from django.db import migrations
+
+
+PG_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(ingredients, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(steps, '')), 'D')"
+)
+
+
+def create_index(apps, schema_editor):
+    """Create and backfill the backend-specific full-text index."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX recipes_recipe_search_gin ON recipes_recipe USING GIN (search_vector)"
+        )
+        schema_editor.execute(f"UPDATE recipes_recipe SET search_vector = {PG_VECTOR_SQL}")
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5("
+            "title, ingredients, description, steps, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO recipes_recipe_fts (rowid, title, ingredients, description, steps) "
+            "SELECT id, title, ingredients, description, steps FROM recipes_recipe"
+        )
+
+
+def drop_index(apps, schema_editor):
+    """Remove the full-text index."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS recipes_recipe_search_gin")
+        schema_editor.execute("ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS recipes_recipe_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
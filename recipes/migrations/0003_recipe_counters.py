@@ -0,0 +1,55 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:30
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """Populate the new counters from the existing ratings and comments."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    Rating = apps.get_model("recipes", "Rating")
+    Comment = apps.get_model("recipes", "Comment")
+    ratings = Rating.objects.filter(recipe=models.OuterRef("pk")).order_by().values("recipe")
+    comments = (
+        Comment.objects.filter(recipe=models.OuterRef("pk"), approved=True)
+        .order_by()
+        .values("recipe")
+    )
+    zero = models.Value(0, output_field=models.IntegerField())
+    Recipe.objects.update(
+        rating_count=Coalesce(
+            models.Subquery(ratings.annotate(n=models.Count("pk")).values("n")), zero
+        ),
+        rating_sum=Coalesce(
+            models.Subquery(ratings.annotate(n=models.Sum("stars")).values("n")), zero
+        ),
+        approved_comment_count=Coalesce(
+            models.Subquery(comments.annotate(n=models.Count("pk")).values("n")), zero
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='approved_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.text import slugify
+
+
+def backfill_tags(apps, schema_editor):
+    """Create Tag rows and links from the existing comma-separated strings."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    Tag = apps.get_model("recipes", "Tag")
+    RecipeTag = apps.get_model("recipes", "RecipeTag")
+    names = {}
+    links = []
+    for recipe_id, text in Recipe.objects.values_list("id", "tags").iterator():
+        seen = set()
+        for raw in (text or "").split(","):
+            name = " ".join(raw.split())
+            slug = slugify(name)
+            if slug and slug not in seen:
+                seen.add(slug)
+                names.setdefault(slug, name)
+                links.append((recipe_id, slug))
+    Tag.objects.bulk_create([Tag(slug=s, name=n) for s, n in names.items()], batch_size=500)
+    ids = dict(Tag.objects.values_list("slug", "id"))
+    RecipeTag.objects.bulk_create(
+        [RecipeTag(recipe_id=r, tag_id=ids[s]) for r, s in links], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60)),
+                ('slug', models.SlugField(max_length=60, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_tags', to='recipes.recipe')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_tags', to='recipes.tag')),
+            ],
+            options={
+                'unique_together': {('tag', 'recipe')},
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, related_name='recipes', through='recipes.RecipeTag', to='recipes.tag'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import recipes.models
+
+
+def backfill_ratings(apps, schema_editor):
+    """Populate the star histogram and top-rated score from the existing ratings."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    Rating = apps.get_model("recipes", "Rating")
+    ratings = Rating.objects.filter(recipe=models.OuterRef("pk")).order_by().values("recipe")
+    zero = models.Value(0, output_field=models.IntegerField())
+    histogram = {
+        f"ratings_{star}": Coalesce(
+            models.Subquery(
+                ratings.filter(stars=star).annotate(n=models.Count("pk")).values("n")
+            ),
+            zero,
+        )
+        for star in range(1, 6)
+    }
+    weight = settings.RECIPE_TOP_PRIOR_WEIGHT
+    # rating_count and rating_sum are already maintained (0003)
+    top_score = models.ExpressionWrapper(
+        (models.F("rating_sum") + weight * settings.RECIPE_TOP_PRIOR_MEAN)
+        / (models.F("rating_count") + weight),
+        output_field=models.FloatField(),
+    )
+    Recipe.objects.update(top_score=top_score, **histogram)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ratings_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ratings_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ratings_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ratings_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ratings_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='top_score',
+            field=models.FloatField(default=recipes.models.prior_score, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['status', 'top_score', 'id'], name='recipe_status_top_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:39
+
+from django.db import migrations, models
+import recipes.models
+
+
+def backfill_sort_columns(apps, schema_editor):
+    """Store total time and ingredient count on the existing recipes."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    Recipe.objects.update(total_minutes=models.F("prep_minutes") + models.F("cook_minutes"))
+    rows = Recipe.objects.only("ingredients").order_by("pk").iterator(chunk_size=2000)
+    batch = []
+    for recipe in rows:
+        columns = recipes.models.sort_columns(0, 0, recipe.ingredients)
+        recipe.ingredient_count = columns["ingredient_count"]
+        batch.append(recipe)
+        if len(batch) == 2000:
+            Recipe.objects.bulk_update(batch, ["ingredient_count"])
+            batch = []
+    Recipe.objects.bulk_update(batch, ["ingredient_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_top_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['status', 'approved_comment_count', 'id'], name='recipe_status_comments_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['status', 'total_minutes', '-id'], name='recipe_status_minutes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['status', 'ingredient_count', '-id'], name='recipe_status_ingr_idx'),
+        ),
+        migrations.RunPython(backfill_sort_columns, migrations.RunPython.noop),
+    ]
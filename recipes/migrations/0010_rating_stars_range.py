@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:55
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def clamp_stars(apps, schema_editor):
+    """Bring any out-of-range ratings into 1..5 so the constraint can be added.
+
+    Run ``manage.py recount`` afterwards if any were changed.
+    """
+    Rating = apps.get_model("recipes", "Rating")
+    Rating.objects.filter(stars__lt=1).update(stars=1)
+    Rating.objects.filter(stars__gt=5).update(stars=5)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_sort_columns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rating',
+            name='stars',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.RunPython(clamp_stars, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rating',
+            constraint=models.CheckConstraint(check=models.Q(('stars__range', (1, 5))), name='rating_stars_range'),
+        ),
+    ]
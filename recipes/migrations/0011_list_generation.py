@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:23
+
+import time
+
+from django.db import migrations, models
+
+
+def create_row(apps, schema_editor):
+    """Start the generation at the current time, as ``purge_recipe_list`` moves it."""
+    ListGeneration = apps.get_model("recipes", "ListGeneration")
+    ListGeneration.objects.create(pk=1, generation=time.time_ns())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_rating_stars_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,51 @@
 """Database models for the recipe-sharing app."""
 
 
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.text import slugify
 
 # Create your models here.
 
 
 STATUS_CHOICES = (("draft", "Draft"), ("published", "Published"))
 
+STARS = range(1, 6)
+
+
+def prior_score() -> float:
+    """The "top rated" score of a recipe nobody has rated yet (see ``recipes.counters``)."""
+    return settings.RECIPE_TOP_PRIOR_MEAN
+
+
+def sort_columns(prep_minutes, cook_minutes, ingredients) -> dict[str, int]:
+    """The stored sort keys derived from a recipe's times and ingredient list."""
+    return {
+        "total_minutes": (prep_minutes or 0) + (cook_minutes or 0),
+        "ingredient_count": sum(1 for line in (ingredients or "").splitlines() if line.strip()),
+    }
+
+
+@lru_cache(maxsize=4096)
+def _tag_slug(name: str) -> str:
+    # the same few tags recur on most recipes, and slugify() is not cheap
+    return slugify(name)
+
+
+def normalize_tags(text: str) -> dict[str, str]:
+    """Parse comma-separated tags into ``{slug: display name}`` (first spelling wins)."""
+    tags = {}
+    for raw in (text or "").split(","):
+        name = " ".join(raw.split())
+        slug = _tag_slug(name)
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
 
 class Recipe(models.Model):
     """A user-authored recipe with ingredients, steps, and optional image."""
@@ -20,31 +57,113 @@ class Recipe(models.Model):
     ingredients = models.TextField(help_text="One per line")
     steps = models.TextField(help_text="One step per line")
     tags = models.CharField(max_length=250, blank=True, help_text="Comma-separated tags")
+    # Normalized copy of ``tags`` used for filtering; synced from ``tags`` on save.
+    normalized_tags = models.ManyToManyField(
+        "Tag", through="RecipeTag", related_name="recipes", blank=True
+    )
     prep_minutes = models.PositiveIntegerField(default=0)
     cook_minutes = models.PositiveIntegerField(default=0)
     servings = models.PositiveIntegerField(default=1)
     image = models.ImageField(upload_to="recipes/", blank=True, null=True)
+    # Downscaled WebP/AVIF copies of ``image`` and a placeholder (see recipes.images).
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="draft")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters maintained by ``recipes.counters``.
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    approved_comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Number of ratings with each number of stars, and the weighted average
+    # that ?sort=top orders by; kept with the counters above.
+    ratings_1 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_2 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_3 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_4 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_5 = models.PositiveIntegerField(default=0, editable=False)
+    top_score = models.FloatField(default=prior_score, editable=False)
+    # ``prep_minutes + cook_minutes`` and the number of ingredient lines, for
+    # ?sort=quickest and ?sort=fewest_ingredients; set by ``save()``.
+    total_minutes = models.PositiveIntegerField(default=0, editable=False)
+    ingredient_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever anything shown in cached fragments changes (see recipes.caching).
+    cache_version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
-        """Newest first."""
+        """Newest first; indexed for the published list and the drafts queue.
+
+        Both filter on ``status`` and page newest first on
+        ``(created_at, id)``; each other ``?sort=`` of the list has its own
+        ``(status, <stored column>, id)`` index (see ``recipes.query_plans``).
+        The ascending sorts break ties newest first, hence ``-id``.
+        """
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at", "id"], name="recipe_status_created_idx"),
+            models.Index(fields=["status", "top_score", "id"], name="recipe_status_top_idx"),
+            models.Index(
+                fields=["status", "approved_comment_count", "id"],
+                name="recipe_status_comments_idx",
+            ),
+            models.Index(
+                fields=["status", "total_minutes", "-id"], name="recipe_status_minutes_idx"
+            ),
+            models.Index(
+                fields=["status", "ingredient_count", "-id"], name="recipe_status_ingr_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         """Readable name in admin/shell."""
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded values so signal handlers can see what changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Recompute the stored sort columns when what they derive from is written."""
+        sources = {"prep_minutes", "cook_minutes", "ingredients"}
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or sources & set(update_fields):
+            derived = sort_columns(self.prep_minutes, self.cook_minutes, self.ingredients)
+            for name, value in derived.items():
+                setattr(self, name, value)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+
     def tag_list(self) -> list[str]:
-        """Return tags as a clean list."""
-        return [t.strip() for t in self.tags.split(",") if t.strip()]
+        """Return tag names (uses prefetched ``normalized_tags`` when available)."""
+        return [t.name for t in self.normalized_tags.all()]
+
+    def sync_tags(self) -> None:
+        """Point ``normalized_tags`` at the tags named in ``tags``, creating any new ones."""
+        parsed = normalize_tags(self.tags)
+        existing = Tag.objects.filter(slug__in=parsed)
+        missing = set(parsed) - {t.slug for t in existing}
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(slug=slug, name=parsed[slug]) for slug in missing],
+                ignore_conflicts=True,
+            )
+        self.normalized_tags.set(Tag.objects.filter(slug__in=parsed))
 
     @property
     def average_rating(self) -> float:
-        """Average star rating rounded to 1 dp."""
-        agg = self.ratings.aggregate(models.Avg("stars"))
-        return round(agg["stars__avg"] or 0, 1)
+        """Average star rating rounded to 1 dp, from the stored counters."""
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+
+    def rating_distribution(self) -> list[tuple[int, int, int]]:
+        """``(stars, count, percent of ratings)`` from 5 stars down to 1, from the counters."""
+        total = self.rating_count
+        counts = [(star, getattr(self, f"ratings_{star}")) for star in reversed(STARS)]
+        return [(star, n, round(100 * n / total) if total else 0) for star, n in counts]
 
 
 class Comment(models.Model):
@@ -56,26 +175,112 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        """Oldest → newest for conversation flow."""
+        """Oldest → newest for conversation flow.
+
+        Approved and unapproved comments are never listed together, so each
+        side has its own partial index: a recipe's approved comments paged
+        on ``(created_at, id)``, and the moderation queue of unapproved ones
+        (a small set) newest first.  Django writes ``approved=True`` as a
+        bare ``WHERE "approved"``, which a composite index could not seek
+        on, but which implies the partial index's condition.
+        """
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["recipe", "created_at", "id"],
+                condition=models.Q(approved=True),
+                name="comment_approved_idx",
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(approved=False),
+                name="comment_pending_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         """Readable name in admin/shell."""
         return f"Comment by {self.user} on {self.recipe}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded values so signal handlers can see what changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
 
 class Rating(models.Model):
     """A 1–5 star rating that a user gives to a recipe (one per user)."""
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="ratings")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    stars = models.PositiveSmallIntegerField()
+    stars = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(min(STARS)), MaxValueValidator(max(STARS))]
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        """Enforce one rating per (user, recipe)."""
+        """Enforce one rating per (user, recipe), of 1 to 5 stars.
+
+        The counters keep a column per number of stars, so the database
+        refuses any other value, however it is written.
+        """
         unique_together = ("recipe", "user")
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(stars__range=(min(STARS), max(STARS))),
+                name="rating_stars_range",
+            ),
+        ]
 
     def __str__(self) -> str:
         """Readable name in admin/shell."""
         return f"{self.stars}★ by {self.user} on {self.recipe}"
-    
\ No newline at end of file
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded values so signal handlers can see what changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class Tag(models.Model):
+    """A normalized recipe tag; ``slug`` is the unique, indexed lookup key."""
+    name = models.CharField(max_length=60)
+    slug = models.SlugField(max_length=60, unique=True)
+
+    class Meta:
+        """Alphabetical."""
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        """Readable name in admin/shell."""
+        return self.name
+
+
+class RecipeTag(models.Model):
+    """Through-table linking recipes to tags."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="recipe_tags")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="recipe_tags")
+
+    class Meta:
+        """One link per pair; the unique index leads with ``tag`` for ``?tag=`` joins."""
+        unique_together = ("tag", "recipe")
+
+    def __str__(self) -> str:
+        """Readable name in admin/shell."""
+        return f"{self.recipe} #{self.tag}"
+
+
+class ListGeneration(models.Model):
+    """The one row holding the recipe-list generation (see ``recipes.caching``).
+
+    It lives in the database rather than the cache so that every worker
+    sees a purge at once, whatever the cache backend.
+    """
+    generation = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        """Readable name in admin/shell."""
+        return f"List generation {self.generation}"
@@ -0,0 +1,111 @@
+"""Batch moderation of pending recipes and comments.
+
+Each function takes the ids a moderator ticked, keeps only the rows that
+are still pending, and changes them with one ``UPDATE`` or ``DELETE``
+statement per batch.  The derived data the per-row signal handlers would
+otherwise maintain one row at a time (recipe counters, fragment-cache
+versions, cached pages, the pending counts in the navbar and the search
+index) is then updated once for the whole batch.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching, counters, pending, search
+from .models import Comment, Recipe
+from .signals import batch_delete
+
+# Ids per statement; keeps IN (...) lists well inside every backend's limits.
+BATCH_SIZE = 500
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def approve_comments(ids) -> int:
+    """Approve the pending comments among ``ids``; return how many were approved."""
+    total = 0
+    for batch in _batches(ids):
+        with transaction.atomic():
+            rows = list(
+                Comment.objects.select_for_update()
+                .filter(pk__in=batch, approved=False)
+                .values_list("pk", "recipe_id", "recipe__slug", "recipe__status")
+            )
+            if not rows:
+                continue
+            approved = [pk for pk, _, _, _ in rows]
+            Comment.objects.filter(pk__in=approved).update(approved=True)
+            counters.apply_comment_deltas(
+                Counter(recipe_id for _, recipe_id, _, _ in rows),
+                listed=any(status == "published" for _, _, _, status in rows),
+            )
+        pending.adjust(comments=-len(rows))
+        caching.purge_detail_pages({slug for _, _, slug, _ in rows})
+        total += len(rows)
+    return total
+
+
+def reject_comments(ids) -> int:
+    """Delete the pending comments among ``ids``; return how many were deleted."""
+    total = 0
+    for batch in _batches(ids):
+        with transaction.atomic(), batch_delete():
+            # pending comments are not counted on the recipe or shown on any page
+            deleted = Comment.objects.filter(pk__in=batch, approved=False).delete()[1]
+            count = deleted.get(Comment._meta.label, 0)
+        pending.adjust(comments=-count)
+        total += count
+    return total
+
+
+def approve_recipes(ids) -> int:
+    """Publish the draft recipes among ``ids``; return how many were published."""
+    total = 0
+    for batch in _batches(ids):
+        with transaction.atomic():
+            rows = list(
+                Recipe.objects.select_for_update()
+                .filter(pk__in=batch, status="draft")
+                .values_list("pk", "slug")
+            )
+            if not rows:
+                continue
+            Recipe.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+                status="published",
+                updated_at=timezone.now(),
+                cache_version=F("cache_version") + 1,
+            )
+        pending.adjust(recipes=-len(rows))
+        caching.purge_detail_pages([slug for _, slug in rows])
+        caching.purge_recipe_list()
+        total += len(rows)
+    return total
+
+
+def reject_recipes(ids) -> int:
+    """Delete the draft recipes among ``ids`` with everything attached to them."""
+    total = 0
+    for batch in _batches(ids):
+        with transaction.atomic(), batch_delete():
+            rows = list(
+                Recipe.objects.select_for_update()
+                .filter(pk__in=batch, status="draft")
+                .values_list("pk", "slug")
+            )
+            if not rows:
+                continue
+            pks = [pk for pk, _ in rows]
+            pending_comments = Comment.objects.filter(recipe__in=pks, approved=False).count()
+            Recipe.objects.filter(pk__in=pks).delete()
+            search.remove_recipes(pks)
+        pending.adjust(recipes=-len(rows), comments=-pending_comments)
+        caching.purge_detail_pages([slug for _, slug in rows])
+        total += len(rows)
+    return total
@@ -0,0 +1,173 @@
+"""Keyset (cursor) pagination.
+
+Offset pagination runs ``COUNT(*)`` on every page and makes the database
+walk and discard ``OFFSET n`` rows, so deep pages get slower the deeper
+they are.  :class:`CursorPaginator` instead remembers the sort key of the
+last row shown and seeks past it (``WHERE (created_at, id) < (...)``),
+which costs the same on page 1 and page 5000 and never needs a count.
+
+Cursors are opaque tokens signed with ``SECRET_KEY`` so clients cannot
+forge arbitrary seek positions.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+CURSOR_SALT = "recipes.pagination.cursor"
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor token is malformed or has been tampered with."""
+
+
+class CursorPage:
+    """One page of results plus the cursors for its neighbours.
+
+    Mirrors the parts of :class:`django.core.paginator.Page` that templates
+    use (``has_next``, ``has_previous``, ``has_other_pages``, iteration).
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def has_next(self) -> bool:
+        """True if there is a page after this one."""
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        """True if there is a page before this one."""
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        """True if either neighbour exists."""
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate ``queryset`` by seeking on its ordering.
+
+    The ordering defaults to the queryset's own ``order_by`` (or the model's
+    ``Meta.ordering``); a primary-key tie-breaker is appended when missing so
+    that every row has a unique position.  Ordering may name annotations as
+    well as model fields, and rows may be model instances or ``.values()``
+    dicts.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        ordering = list(
+            ordering or queryset.query.order_by or queryset.model._meta.ordering or []
+        )
+        if not ordering or ordering[-1].lstrip("-") not in ("pk", "id"):
+            ordering.append("-pk" if ordering and ordering[0].startswith("-") else "pk")
+        self.ordering = ordering
+        self.keys = [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+    # ---------- tokens ----------
+
+    def encode_cursor(self, row, previous=False) -> str:
+        """Return a signed token pointing just past (or before) ``row``."""
+        values = [self._dump(self._value(row, name)) for name, _ in self.keys]
+        return signing.dumps({"v": values, "p": previous}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, token):
+        """Return ``(values, previous)`` from a token, or raise :class:`InvalidCursor`."""
+        try:
+            data = signing.loads(token, salt=CURSOR_SALT)
+            raw, previous = data["v"], bool(data["p"])
+            if len(raw) != len(self.keys):
+                raise InvalidCursor("Cursor does not match this ordering.")
+            values = [self._load(name, value) for (name, _), value in zip(self.keys, raw)]
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError) as e:
+            raise InvalidCursor(str(e)) from e
+        return values, previous
+
+    @staticmethod
+    def _value(row, name):
+        if isinstance(row, dict):
+            return row["id" if name == "pk" else name]
+        return getattr(row, name)
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def _load(self, name, value):
+        model = self.queryset.model
+        try:
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value  # annotation: JSON value is already the right type
+        return field.to_python(value)
+
+    # ---------- paging ----------
+
+    def _seek(self, values, backwards):
+        """Build ``(k1, k2, ...) > (v1, v2, ...)`` in the given direction."""
+        condition = Q()
+        for i, (name, desc) in enumerate(self.keys):
+            after = desc == backwards  # ascending key moving forwards => greater than
+            lookup = f"{name}__{'gt' if after else 'lt'}"
+            term = Q(**{lookup: values[i]})
+            for j, (prev_name, _) in enumerate(self.keys[:i]):
+                term &= Q(**{prev_name: values[j]})
+            condition |= term
+        return condition
+
+    def _query(self, cursor):
+        """Return ``(queryset, previous)`` fetching one row more than a page after ``cursor``."""
+        ordering = self.ordering
+        qs = self.queryset
+        previous = False
+        if cursor:
+            values, previous = self.decode_cursor(cursor)
+            qs = qs.filter(self._seek(values, backwards=previous))
+        if previous:
+            ordering = [f[1:] if f.startswith("-") else f"-{f}" for f in ordering]
+        return qs.order_by(*ordering)[: self.per_page + 1], previous
+
+    def _page(self, rows, cursor, previous) -> CursorPage:
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if previous:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        if not rows:
+            return CursorPage(rows)
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], previous=True) if has_previous else None,
+        )
+
+    def page(self, cursor=None) -> CursorPage:
+        """Return the page that starts after ``cursor`` (or the first page)."""
+        qs, previous = self._query(cursor)
+        return self._page(list(qs), cursor, previous)
+
+    async def apage(self, cursor=None) -> CursorPage:
+        """Async version of :meth:`page`, for async views."""
+        qs, previous = self._query(cursor)
+        return self._page([row async for row in qs], cursor, previous)
@@ -0,0 +1,130 @@
+"""Cached counts of recipes and comments awaiting moderation.
+
+The staff navbar shows how many recipes are still drafts and how many
+comments are unapproved.  Counting those rows on every staff page render
+(admin included) costs two ``COUNT(*)`` queries, so the numbers are kept in
+the shared cache instead and adjusted with ``cache.incr``/``cache.decr``
+when a recipe enters or leaves ``draft`` or a comment's ``approved`` flag
+flips (see :mod:`recipes.signals`).
+
+The entries expire after ``RECIPE_PENDING_COUNTS_TIMEOUT`` seconds; the next
+read then recounts from the database.  That periodic reconcile repairs any
+drift from writes that skip signals, such as ``QuerySet.update()``.
+"""
+
+from typing import Dict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Comment, Recipe
+
+RECIPES_KEY = "recipes:pending:recipes"
+COMMENTS_KEY = "recipes:pending:comments"
+
+
+def counts_timeout() -> int:
+    """Seconds between reconciles of the cached counts."""
+    return getattr(settings, "RECIPE_PENDING_COUNTS_TIMEOUT", 60 * 10)
+
+
+def _querysets():
+    return {
+        RECIPES_KEY: Recipe.objects.filter(status="draft"),
+        COMMENTS_KEY: Comment.objects.filter(approved=False),
+    }
+
+
+def reconcile(keys=None) -> Dict[str, int]:
+    """Recount ``keys`` (default: both) from the database and cache the result."""
+    querysets = _querysets()
+    values = {key: querysets[key].count() for key in (keys or querysets)}
+    cache.set_many(values, counts_timeout())
+    return values
+
+
+def get_counts() -> Dict[str, int]:
+    """Return ``{"recipes": n, "comments": n}``, recounting only missing entries."""
+    values = cache.get_many([RECIPES_KEY, COMMENTS_KEY])
+    missing = [key for key in (RECIPES_KEY, COMMENTS_KEY) if key not in values]
+    if missing:
+        values.update(reconcile(missing))
+    # a decrement racing a reconcile can briefly overshoot
+    return {
+        "recipes": max(values[RECIPES_KEY], 0),
+        "comments": max(values[COMMENTS_KEY], 0),
+    }
+
+
+async def aget_counts() -> Dict[str, int]:
+    """:func:`get_counts` for async views: a recount runs in a worker thread."""
+    values = cache.get_many([RECIPES_KEY, COMMENTS_KEY])
+    missing = [key for key in (RECIPES_KEY, COMMENTS_KEY) if key not in values]
+    if missing:
+        values.update(await sync_to_async(reconcile)(missing))
+    return {
+        "recipes": max(values[RECIPES_KEY], 0),
+        "comments": max(values[COMMENTS_KEY], 0),
+    }
+
+
+def _adjust(key, delta) -> None:
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass  # not cached yet: the next read counts from the database
+
+
+def adjust(recipes=0, comments=0) -> None:
+    """Apply a batch's net change to the cached counts."""
+    _adjust(RECIPES_KEY, recipes)
+    _adjust(COMMENTS_KEY, comments)
+
+
+def forget() -> None:
+    """Drop both counts so the next read recounts them."""
+    cache.delete_many([RECIPES_KEY, COMMENTS_KEY])
+
+
+def recipe_saved(recipe, created: bool) -> None:
+    """Account for a recipe that may have entered or left ``draft``."""
+    loaded = getattr(recipe, "_loaded_values", {})
+    if created:
+        was_draft = False
+    elif "status" in loaded:
+        was_draft = loaded["status"] == "draft"
+    else:
+        # previous status unknown (e.g. deferred field)
+        cache.delete(RECIPES_KEY)
+        return
+    _adjust(RECIPES_KEY, (recipe.status == "draft") - was_draft)
+    if hasattr(recipe, "_loaded_values"):
+        recipe._loaded_values["status"] = recipe.status
+
+
+def recipe_deleted(recipe) -> None:
+    """Account for a deleted recipe."""
+    if recipe.status == "draft":
+        _adjust(RECIPES_KEY, -1)
+
+
+def comment_saved(comment, created: bool) -> None:
+    """Account for a comment whose ``approved`` flag may have flipped."""
+    loaded = getattr(comment, "_loaded_values", {})
+    if created:
+        was_pending = False
+    elif "approved" in loaded:
+        was_pending = not loaded["approved"]
+    else:
+        cache.delete(COMMENTS_KEY)
+        return
+    _adjust(COMMENTS_KEY, (not comment.approved) - was_pending)
+
+
+def comment_deleted(comment) -> None:
+    """Account for a deleted comment (including ones cascading from a recipe)."""
+    if not comment.approved:
+        _adjust(COMMENTS_KEY, -1)
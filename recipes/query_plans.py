@@ -0,0 +1,168 @@
+"""Query plans of the hot read queries, checked for full scans.
+
+The indexes in ``recipes.models`` are designed for the handful of queries
+in :data:`HOT_QUERIES`, which run on nearly every page view or moderation
+request.  :func:`explain` asks the database how it would run one of them
+(``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on PostgreSQL) and
+:func:`problems` reads the plan for the two ways a query stops scaling
+with the catalogue:
+
+- a full scan of a table (SQLite ``SCAN <table>`` without an index,
+  PostgreSQL ``Seq Scan``);
+- sorting every matching row to return the first page (SQLite ``USE TEMP
+  B-TREE FOR ORDER BY``, a PostgreSQL ``Sort`` node), where the order
+  should have come from an index.
+
+Queries whose sort cannot come from an index list ``"sort"`` in their
+``allow``.  ``test_query_plans`` runs :func:`check` on the test database,
+so dropping or reshaping an index these queries rely on fails the suite.
+
+PostgreSQL prefers a sequential scan for a table of a few rows whatever
+its indexes, so on small test tables :func:`explain` turns sequential
+scans and sorts off for the ``EXPLAIN`` (``small_tables=True``); the plan
+then shows whether a suitable index exists at all.  SQLite plans without
+``ANALYZE`` statistics and needs no such help.
+"""
+
+import re
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+
+from .models import Comment, Recipe
+from .pagination import CursorPaginator
+from .views import (
+    LIST_SORTS, RecipeListView, _comment_paginator, _detail_queryset, filter_recipes,
+)
+
+# Cursor position used for the "next page" variants; the plan does not
+# depend on the values.
+_SEEK = {
+    "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc), "top_score": 4.0,
+    "approved_comment_count": 3, "total_minutes": 30, "ingredient_count": 6, "id": 1,
+}
+
+
+class HotQuery:
+    """A queryset to explain and the plan problems it is allowed to have."""
+
+    def __init__(self, name, build, allow=()):
+        self.name = name
+        self.build = build  # callable() -> queryset
+        self.allow = frozenset(allow)
+
+    def __repr__(self):
+        return f"<HotQuery {self.name}>"
+
+
+def _page_query(paginator, after=False):
+    """The query ``paginator`` runs for its first (or a later) page."""
+    return paginator._query(paginator.encode_cursor(_SEEK) if after else None)[0]
+
+
+def _page(queryset, per_page, ordering, after=False):
+    return _page_query(CursorPaginator(queryset, per_page, ordering), after)
+
+
+def _published():
+    return Recipe.objects.filter(status="published").select_related("author")
+
+
+def _pending_recipes():
+    return Recipe.objects.filter(status="draft").select_related("author")
+
+
+def _pending_comments():
+    return Comment.objects.filter(approved=False).select_related("recipe", "user")
+
+
+_MODERATION_ORDER = ["-created_at", "-id"]
+
+HOT_QUERIES = [
+    HotQuery("recipe_list", lambda: _page(
+        _published(), RecipeListView.paginate_by, ["-created_at", "-id"]
+    )),
+    HotQuery("recipe_list_next_page", lambda: _page(
+        _published(), RecipeListView.paginate_by, ["-created_at", "-id"], after=True
+    )),
+    # every ?sort= choice, on a later page
+    *(
+        HotQuery(f"recipe_list_{sort}", lambda ordering=ordering: _page(
+            _published(), RecipeListView.paginate_by, list(ordering), after=True
+        ))
+        for sort, (_, ordering) in LIST_SORTS.items() if sort != "newest"
+    ),
+    # offset pagination: the Meta ordering, sliced
+    HotQuery("recipe_list_offset", lambda: _published()[18:18 + RecipeListView.paginate_by]),
+    # the tag's recipes are found through RecipeTag, then sorted by date
+    HotQuery(
+        "recipe_list_tag",
+        lambda: filter_recipes(_published(), None, "soup")[:RecipeListView.paginate_by],
+        allow={"sort"},
+    ),
+    HotQuery(
+        "recipe_detail",
+        lambda: _detail_queryset(SimpleNamespace(user=AnonymousUser())).filter(slug="soup"),
+    ),
+    HotQuery("recipe_comments", lambda: _page_query(_comment_paginator(Recipe(pk=1)))),
+    HotQuery("recipe_comments_next_page", lambda: _page_query(
+        _comment_paginator(Recipe(pk=1)), after=True
+    )),
+    HotQuery("pending_recipes", lambda: _page(
+        _pending_recipes(), settings.RECIPE_MODERATION_PER_PAGE, _MODERATION_ORDER
+    )),
+    HotQuery("pending_comments", lambda: _page(
+        _pending_comments(), settings.RECIPE_MODERATION_PER_PAGE, _MODERATION_ORDER
+    )),
+    HotQuery("pending_comments_next_page", lambda: _page(
+        _pending_comments(), settings.RECIPE_MODERATION_PER_PAGE, _MODERATION_ORDER, after=True
+    )),
+]
+
+
+def explain(queryset, small_tables=False) -> list[str]:
+    """The database's plan for ``queryset``, one line per step."""
+    if connection.vendor == "postgresql" and small_tables:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+            plan = queryset.explain()
+    else:
+        plan = queryset.explain()
+    return plan.splitlines()
+
+
+_PATTERNS = {
+    "sqlite": (
+        ("scan", re.compile(r"\bSCAN (?!CONSTANT ROW)(\S+)$")),
+        ("sort", re.compile(r"\bUSE TEMP B-TREE FOR (?:ORDER BY|RIGHT PART OF ORDER BY)")),
+    ),
+    "postgresql": (
+        ("scan", re.compile(r"\bSeq Scan on (\S+)")),
+        ("sort", re.compile(r"^\s*(?:->\s*)?(?:Incremental )?Sort\b(?! Key| Method| Space)")),
+    ),
+}
+
+
+def problems(plan, vendor=None, allow=()) -> list[str]:
+    """The lines of ``plan`` that scan a whole table or sort every row, less ``allow``."""
+    patterns = _PATTERNS.get(vendor or connection.vendor, ())
+    found = []
+    for line in plan:
+        for kind, pattern in patterns:
+            if kind not in allow and pattern.search(line):
+                found.append(f"{kind}: {line.strip()}")
+    return found
+
+
+def check(queries=None, small_tables=False) -> dict:
+    """``{name: problems}`` for every hot query whose plan has any."""
+    report = {}
+    for query in HOT_QUERIES if queries is None else queries:
+        found = problems(explain(query.build(), small_tables), allow=query.allow)
+        if found:
+            report[query.name] = found
+    return report
@@ -0,0 +1,182 @@
+"""Full-text search index for recipes.
+
+The index is an inverted index maintained next to ``recipes_recipe``:
+
+- on PostgreSQL it is a weighted ``tsvector`` column (``search_vector``)
+  with a GIN index;
+- on SQLite it is an FTS5 virtual table (``recipes_recipe_fts``) whose
+  ``rowid`` is the recipe id.
+
+Both are created by migration ``0002_recipe_search_index`` and kept in sync
+by the ``Recipe`` save/delete signal handlers in :mod:`recipes.signals`.
+Fields are ranked title > ingredients > description > steps.  Other
+database backends fall back to the old ``icontains`` filters.
+"""
+
+import re
+
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "recipes_recipe_fts"
+RECIPE_TABLE = "recipes_recipe"
+
+# Fields that feed the index, in weight order (highest first).
+INDEXED_FIELDS = ("title", "ingredients", "description", "steps")
+
+# bm25() column weights for the FTS5 table, same order as INDEXED_FIELDS.
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+PG_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(ingredients, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(steps, '')), 'D')"
+)
+
+
+def backend() -> str:
+    """Return which index implementation the current database uses."""
+    if connection.vendor == "postgresql":
+        return "postgres"
+    if connection.vendor == "sqlite":
+        return "fts5"
+    return "none"
+
+
+def tokenize(q: str) -> list[str]:
+    """Split a raw search string into index-safe word tokens."""
+    return TOKEN_RE.findall(q.lower())
+
+
+def index_recipe(recipe) -> None:
+    """(Re)index a single saved recipe."""
+    kind = backend()
+    with connection.cursor() as cursor:
+        if kind == "postgres":
+            cursor.execute(
+                f"UPDATE {RECIPE_TABLE} SET search_vector = {PG_VECTOR_SQL} WHERE id = %s",
+                [recipe.pk],
+            )
+        elif kind == "fts5":
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [recipe.pk] + [getattr(recipe, f) or "" for f in INDEXED_FIELDS],
+            )
+
+
+def index_recipes(pks) -> None:
+    """(Re)index several saved recipes with one statement per step."""
+    pks = list(pks)
+    if not pks:
+        return
+    kind = backend()
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        if kind == "postgres":
+            cursor.execute(
+                f"UPDATE {RECIPE_TABLE} SET search_vector = {PG_VECTOR_SQL} "
+                f"WHERE id IN ({placeholders})",
+                pks,
+            )
+        elif kind == "fts5":
+            columns = ", ".join(INDEXED_FIELDS)
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", pks)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {RECIPE_TABLE} WHERE id IN ({placeholders})",
+                pks,
+            )
+
+
+def remove_recipe(pk) -> None:
+    """Drop a deleted recipe from the index (the tsvector goes with the row)."""
+    remove_recipes([pk])
+
+
+def remove_recipes(pks) -> None:
+    """Drop several deleted recipes from the index in one statement."""
+    pks = list(pks)
+    if pks and backend() == "fts5":
+        placeholders = ", ".join(["%s"] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", pks)
+
+
+def rebuild_index() -> int:
+    """Rebuild the whole index in bulk and return the number of rows indexed."""
+    kind = backend()
+    with connection.cursor() as cursor:
+        if kind == "postgres":
+            cursor.execute(f"UPDATE {RECIPE_TABLE} SET search_vector = {PG_VECTOR_SQL}")
+            return cursor.rowcount
+        if kind == "fts5":
+            columns = ", ".join(INDEXED_FIELDS)
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {RECIPE_TABLE}"
+            )
+            return cursor.rowcount
+    return 0
+
+
+def _legacy_filter(queryset, q):
+    """Unindexed substring match, used when no index is available."""
+    return queryset.filter(
+        models.Q(title__icontains=q)
+        | models.Q(description__icontains=q)
+        | models.Q(ingredients__icontains=q)
+        | models.Q(steps__icontains=q)
+    )
+
+
+def search(queryset, q: str):
+    """Filter ``queryset`` to recipes matching ``q`` and annotate ``search_rank``.
+
+    Every word in ``q`` must match (as a prefix) somewhere in the indexed
+    fields.  Higher ``search_rank`` means a better match; callers decide
+    how to order the results.
+    """
+    tokens = tokenize(q)
+    kind = backend()
+    if not tokens or kind == "none":
+        return _legacy_filter(queryset, q).annotate(
+            search_rank=models.Value(0.0, output_field=models.FloatField())
+        )
+
+    if kind == "postgres":
+        tsquery = " & ".join(f"{t}:*" for t in tokens)
+        return queryset.filter(
+            RawSQL(
+                f"{RECIPE_TABLE}.search_vector @@ to_tsquery('english', %s)",
+                [tsquery],
+                output_field=models.BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({RECIPE_TABLE}.search_vector, to_tsquery('english', %s))",
+                [tsquery],
+                output_field=models.FloatField(),
+            )
+        )
+
+    match = " ".join(f'"{t}"*' for t in tokens)
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    return queryset.filter(
+        pk__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        )
+    ).annotate(
+        # bm25() is lower-is-better, negate it so both backends sort descending.
+        search_rank=RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {RECIPE_TABLE}.id)",
+            [match],
+            output_field=models.FloatField(),
+        )
+    )
@@ -1,13 +1,24 @@
-"""Simple user session signals for UX messaging.
+"""Signal handlers for UX messaging and derived recipe data.
 
 Handlers in this module attach to Django's authentication signals and add
-flash messages when users log in or out.  The handlers are connected at
-import-time so that ``RecipesConfig.ready`` can safely import this
-module to register them.
+flash messages when users log in or out, and to model signals to keep the
+full-text search index, the normalized tags, the denormalized counters and
+the fragment-cache version on ``Recipe`` in step with the underlying rows,
+along with the cached moderation counts in :mod:`recipes.pending` and the
+responsive image variants in :mod:`recipes.images`.  The handlers are
+connected at import-time so that ``RecipesConfig.ready`` can safely import
+this module to register them.
 """
 
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.contrib import messages
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from . import caching, counters, images, pending, search
+from .models import Comment, Rating, Recipe, Tag
 
 
 def handle_login(sender, request, user, **kwargs):
@@ -42,6 +53,132 @@ def handle_logout(sender, request, user, **kwargs):
         pass
 
 
+def handle_recipe_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidate cached fragments and list pages, rebuild image variants, reindex and resync tags after save.
+
+    Reindexing and tag sync are skipped when none of the fields they depend
+    on were written.
+    """
+    written = set(update_fields) if update_fields is not None else None
+    listed = instance.status == "published" or (
+        getattr(instance, "_loaded_values", {}).get("status") == "published"
+    )
+    if written is None or "status" in written:
+        pending.recipe_saved(instance, created)
+    if (written is None or "image" in written) and images.needs_refresh(instance):
+        images.refresh_variants(instance)
+    if written != {"cache_version"}:
+        caching.bump_version(instance.pk)
+        if listed:
+            # the catalogue changed: move list pages (and their ETags) on
+            caching.purge_recipe_list()
+    if written is None or written & set(search.INDEXED_FIELDS):
+        search.index_recipe(instance)
+    if written is not None and "tags" not in written:
+        return
+    loaded = getattr(instance, "_loaded_values", {})
+    if created or loaded.get("tags") != instance.tags:
+        instance.sync_tags()
+        if hasattr(instance, "_loaded_values"):
+            instance._loaded_values["tags"] = instance.tags
+
+
+# Set while a batch operation (see recipes.moderation) deletes many rows and
+# updates the derived data once for the whole batch itself.
+_batch_delete = ContextVar("recipes_batch_delete", default=False)
+
+
+@contextmanager
+def batch_delete():
+    """Skip the per-row delete handlers for deletes made inside the block."""
+    token = _batch_delete.set(True)
+    try:
+        yield
+    finally:
+        _batch_delete.reset(token)
+
+
+def handle_recipe_deleted(sender, instance, **kwargs):
+    """Remove a deleted recipe from the search index, the pending count and the list pages."""
+    if _batch_delete.get():
+        return
+    search.remove_recipe(instance.pk)
+    pending.recipe_deleted(instance)
+    if instance.status == "published":
+        caching.purge_recipe_list()
+
+
+def _deleting_recipe(origin) -> bool:
+    """True when a delete cascades from a recipe, whose counters are moot."""
+    model = getattr(origin, "model", type(origin))
+    return model is Recipe
+
+
+def handle_rating_saved(sender, instance, created, **kwargs):
+    """Update the recipe's rating counters."""
+    counters.rating_saved(instance, created)
+
+
+def handle_rating_deleted(sender, instance, origin=None, **kwargs):
+    """Update the recipe's rating counters unless the recipe itself is going."""
+    if not _batch_delete.get() and not _deleting_recipe(origin):
+        counters.rating_deleted(instance)
+
+
+def handle_comment_saved(sender, instance, created, **kwargs):
+    """Update the pending count and the recipe's approved-comment counter."""
+    # before counters, which records the new approval state as loaded
+    pending.comment_saved(instance, created)
+    counters.comment_saved(instance, created)
+
+
+def handle_comment_deleted(sender, instance, origin=None, **kwargs):
+    """Update the pending count, and the recipe's counter unless the recipe is going."""
+    if _batch_delete.get():
+        return
+    pending.comment_deleted(instance)
+    if not _deleting_recipe(origin):
+        counters.comment_deleted(instance)
+
+
+def _tag_changed(recipes) -> None:
+    """Invalidate the cards of ``recipes`` and, if any is listed, the list pages."""
+    caching.bump_versions(recipes)
+    if recipes.filter(status="published").exists():
+        caching.purge_recipe_list()
+
+
+def handle_tag_saved(sender, instance, created, **kwargs):
+    """A renamed tag changes every card and list page that shows it."""
+    if not created:
+        _tag_changed(Recipe.objects.filter(normalized_tags=instance))
+
+
+def handle_tag_deleting(sender, instance, **kwargs):
+    """Note the tag's recipes, as its links are deleted along with it."""
+    instance._recipe_ids = list(
+        Recipe.objects.filter(normalized_tags=instance).values_list("pk", flat=True)
+    )
+
+
+def handle_tag_deleted(sender, instance, **kwargs):
+    """A deleted tag drops off every card and list page that showed it."""
+    recipe_ids = getattr(instance, "_recipe_ids", None)
+    if recipe_ids:
+        _tag_changed(Recipe.objects.filter(pk__in=recipe_ids))
+
+
 # Connect handlers to Django auth signals.
 user_logged_in.connect(handle_login)
 user_logged_out.connect(handle_logout)
+
+# Keep derived data in sync with the models.
+post_save.connect(handle_recipe_saved, sender=Recipe)
+post_delete.connect(handle_recipe_deleted, sender=Recipe)
+post_save.connect(handle_rating_saved, sender=Rating)
+post_delete.connect(handle_rating_deleted, sender=Rating)
+post_save.connect(handle_comment_saved, sender=Comment)
+post_delete.connect(handle_comment_deleted, sender=Comment)
+post_save.connect(handle_tag_saved, sender=Tag)
+pre_delete.connect(handle_tag_deleting, sender=Tag)
+post_delete.connect(handle_tag_deleted, sender=Tag)
@@ -0,0 +1,156 @@
+"""Unique slug allocation for recipes.
+
+A new recipe gets ``slugify(title)``, or ``<base>-1``, ``<base>-2``, ...
+when that is taken.  Rather than probing each candidate with its own query,
+:func:`unique_slug` reads every existing ``<base>`` / ``<base>-<n>`` slug in
+one query, served by an index on ``slug``: ``LIKE '<base>-%'`` on
+PostgreSQL (its ``_like`` pattern index), and on SQLite, which cannot use an
+index for ``LIKE``, the range ``slug >= '<base>-' AND slug < '<base>.'``.
+The range is only right where text sorts byte by byte, as it does on
+SQLite; PostgreSQL's locale collations skip punctuation when sorting.
+
+Two requests can still pick the same slug at the same moment; the unique
+constraint catches that and :func:`save_with_unique_slug` allocates again
+and retries.  :class:`SlugAllocator` serves bulk paths that create many
+recipes at once, remembering what it has handed out so it only queries
+once per distinct base.
+"""
+
+import re
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import Recipe
+
+SLUG_MAX_LENGTH = Recipe._meta.get_field("slug").max_length
+# room left after the base for "-<n>"
+SUFFIX_ROOM = 10
+FALLBACK_BASE = "recipe"
+SUFFIXED = re.compile(r"^(.*)-(\d+)$")
+
+
+def base_slug(title) -> str:
+    """Return the slug a recipe called ``title`` would get if it were free."""
+    base = slugify(title or "")[: SLUG_MAX_LENGTH - SUFFIX_ROOM].strip("-")
+    return base or FALLBACK_BASE
+
+
+def _suffixed(base, using) -> Q:
+    """Match every slug starting with ``<base>-``."""
+    if connections[using].vendor == "sqlite":
+        # bytewise order: "-" sorts just before "."
+        return Q(slug__gte=f"{base}-", slug__lt=f"{base}.")
+    return Q(slug__startswith=f"{base}-")
+
+
+def taken_suffixes(base, queryset=None) -> set[int]:
+    """Return the suffixes in use for ``base`` (0 meaning the bare base), in one query."""
+    queryset = Recipe.objects.all() if queryset is None else queryset
+    pattern = re.compile(rf"^{re.escape(base)}-(\d+)$")
+    taken = set()
+    slugs = queryset.filter(Q(slug=base) | _suffixed(base, queryset.db))
+    for slug in slugs.values_list("slug", flat=True):
+        if slug == base:
+            taken.add(0)
+        elif match := pattern.match(slug):
+            taken.add(int(match.group(1)))
+    return taken
+
+
+def _first_free(taken, n=0) -> int:
+    while n in taken:
+        n += 1
+    return n
+
+
+def _with_suffix(base, n) -> str:
+    return base if n == 0 else f"{base}-{n}"
+
+
+def unique_slug(title, queryset=None) -> str:
+    """Return the first free slug for ``title``: its base, else ``<base>-<n>``."""
+    base = base_slug(title)
+    return _with_suffix(base, _first_free(taken_suffixes(base, queryset)))
+
+
+def save_with_unique_slug(recipe, attempts=5, **save_kwargs):
+    """Give ``recipe`` a free slug from its title and save it.
+
+    If another writer claims the same slug between allocation and insert,
+    the unique constraint fails inside a savepoint and a fresh slug is
+    allocated, up to ``attempts`` times.
+    """
+    for attempt in range(attempts):
+        recipe.slug = unique_slug(recipe.title)
+        try:
+            with transaction.atomic():
+                recipe.save(**save_kwargs)
+            return recipe
+        except IntegrityError:
+            # only retry when the slug is what collided
+            if attempt == attempts - 1 or not Recipe.objects.filter(slug=recipe.slug).exists():
+                raise
+
+
+class SlugAllocator:
+    """Hand out unique slugs for many new recipes without re-querying.
+
+    Each distinct base is looked up once; later titles with the same base
+    continue from the suffixes already handed out.  Slugs passed to
+    :meth:`reserve` (for rows that bring their own) are never handed out.
+
+    With ``prefetch=True`` every slug in ``queryset`` is read up front in a
+    single query, and allocation never queries again: worth it when the
+    titles are many and mostly distinct, as in a bulk import.
+    """
+
+    def __init__(self, queryset=None, prefetch=False):
+        self.queryset = Recipe.objects.all() if queryset is None else queryset
+        self._taken = {}
+        self._next = {}  # base -> lowest suffix that may still be free
+        self._used = set()  # every slug reserved or handed out here
+        self._complete = False
+        if prefetch:
+            for slug in self.queryset.values_list("slug", flat=True).iterator():
+                for base, n in self._readings(slug):
+                    self._taken.setdefault(base, set()).add(n)
+            self._complete = True
+
+    @staticmethod
+    def _readings(slug):
+        """``slug`` may be a bare base or "<base>-<n>": both ``(base, n)`` readings."""
+        readings = [(slug, 0)]
+        if match := SUFFIXED.match(slug):
+            readings.append((match.group(1), int(match.group(2))))
+        return readings
+
+    def _suffixes(self, base) -> set[int]:
+        if base not in self._taken:
+            self._taken[base] = set() if self._complete else taken_suffixes(base, self.queryset)
+        return self._taken[base]
+
+    def reserve(self, slug) -> bool:
+        """Mark ``slug`` as used; return False if it already was."""
+        readings = self._readings(slug)
+        used = slug in self._used or any(n in self._suffixes(base) for base, n in readings)
+        for base, n in readings:
+            self._suffixes(base).add(n)
+        self._used.add(slug)
+        return not used
+
+    def allocate(self, title) -> str:
+        """Return a slug for ``title`` that is free and not handed out before."""
+        base = base_slug(title)
+        suffixes = self._suffixes(base)
+        while True:
+            # "<base>-<n>" may also have been handed out as the bare base of
+            # another title (e.g. "Soup 2" next to the third "Soup")
+            n = _first_free(suffixes, self._next.get(base, 0))
+            suffixes.add(n)
+            self._next[base] = n + 1
+            slug = _with_suffix(base, n)
+            if slug not in self._used:
+                self._used.add(slug)
+                return slug
@@ -0,0 +1,35 @@
+"""Template tags for responsive recipe images.
+
+``{% recipe_picture recipe sizes="..." %}`` renders a ``<picture>`` with one
+``<source srcset>`` per variant format recorded by :mod:`recipes.images`,
+falling back to the original upload.  The placeholder is painted as the
+image's background until the real file arrives, and ``width``/``height``
+are set so the layout does not jump.
+"""
+
+from django import template
+
+from ..images import FORMATS, srcset
+
+register = template.Library()
+
+
+@register.inclusion_tag("recipes/_recipe_picture.html")
+def recipe_picture(recipe, sizes="100vw", css_class="", loading="lazy"):
+    """Render ``recipe.image`` as a responsive, lazily loaded ``<picture>``."""
+    variants = recipe.image_variants or {}
+    sources = []
+    for fmt in variants.get("formats", {}):
+        value = srcset(recipe, fmt)
+        if value and fmt in FORMATS:
+            sources.append({"type": FORMATS[fmt]["mime"], "srcset": value})
+    return {
+        "recipe": recipe,
+        "sources": sources,
+        "sizes": sizes,
+        "css_class": css_class,
+        "loading": loading,
+        "width": variants.get("width"),
+        "height": variants.get("height"),
+        "placeholder": variants.get("placeholder"),
+    }
@@ -0,0 +1,162 @@
+"""Tests for the read-only JSON API."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import api, caching, moderation
+from .models import Comment, Rating, Recipe
+
+
+User = get_user_model()
+
+
+class TestRecipeApi(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        for i in range(5):
+            Recipe.objects.create(
+                author=self.alice, title=f"Soup {i}", slug=f"soup-{i}", description="d",
+                ingredients="Water\n\nSalt ", steps="Boil", tags="Soup, quick" if i % 2 else "soup",
+                status="published",
+            )
+        Recipe.objects.create(
+            author=self.alice, title="Secret soup", slug="secret", description="d",
+            ingredients="x", steps="y", status="draft",
+        )
+        self.soup = Recipe.objects.get(slug="soup-0")
+
+    def test_list_serializes_published_recipes_from_a_single_query(self):
+        with self.assertNumQueries(2):  # list generation, then the page
+            response = self.client.get(reverse("api_recipe_list"))
+        self.assertEqual(response["Content-Type"], "application/json")
+        results = response.json()["results"]
+        self.assertEqual([r["slug"] for r in results], [f"soup-{i}" for i in range(4, -1, -1)])
+        self.assertEqual(list(results[0]), list(api.LIST_FIELDS))
+        self.assertEqual(results[0]["author"], "alice")
+        self.assertEqual(results[1]["tags"], ["Soup", "quick"])
+        self.assertEqual(results[0]["url"], reverse("api_recipe_detail", args=["soup-4"]))
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse("api_recipe_list"), {"fields": "title,ingredients"})
+        self.assertEqual(
+            response.json()["results"][-1], {"title": "Soup 0", "ingredients": ["Water", "Salt"]}
+        )
+        response = self.client.get(reverse("api_recipe_list"), {"fields": "title,nope"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Unknown field(s): nope."})
+
+    def test_cursor_pagination_walks_every_recipe_once(self):
+        url, seen = f"{reverse('api_recipe_list')}?limit=2&fields=slug", []
+        while url:
+            data = self.client.get(url).json()
+            seen += [r["slug"] for r in data["results"]]
+            url = data["next"]
+        self.assertEqual(seen, [f"soup-{i}" for i in range(4, -1, -1)])
+        for bad in ({"limit": "500"}, {"limit": "x"}, {"cursor": "bad"}):
+            self.assertEqual(self.client.get(reverse("api_recipe_list"), bad).status_code, 400)
+
+    def test_list_filters(self):
+        response = self.client.get(reverse("api_recipe_list"), {"tag": "quick", "fields": "slug"})
+        self.assertEqual(response.json()["results"], [{"slug": "soup-3"}, {"slug": "soup-1"}])
+        response = self.client.get(reverse("api_recipe_list"), {"q": "soup 2", "fields": "slug"})
+        self.assertEqual(response.json()["results"], [{"slug": "soup-2"}])
+
+    def test_list_pages_are_cached_until_the_catalogue_changes(self):
+        url = reverse("api_recipe_list")
+        first = self.client.get(url)
+        self.assertEqual(first["Cache-Control"], "public, max-age=60")
+        with self.assertNumQueries(2):  # the list generation, once per request
+            self.assertEqual(self.client.get(url).content, first.content)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        recipe = Recipe.objects.get(slug="soup-4")
+        recipe.title = "Stew"
+        recipe.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["title"], "Stew")
+
+    def test_list_follows_changes_made_by_another_worker(self):
+        url = reverse("api_recipe_list")
+        first = self.client.get(url, {"fields": "slug"})
+        # a worker with its own per-process cache publishes a recipe
+        other_worker = LocMemCache("other-worker", {})
+        with mock.patch.object(caching, "cache", other_worker), \
+                mock.patch.object(api, "cache", other_worker):
+            recipe = Recipe.objects.get(slug="secret")
+            recipe.status = "published"
+            recipe.save()
+        response = self.client.get(url, {"fields": "slug"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0], {"slug": "secret"})
+
+    def test_list_comment_counts_follow_approvals(self):
+        url = reverse("api_recipe_list")
+        params = {"fields": "slug,comment_count", "sort": "most_commented", "limit": 1}
+        first = self.client.get(url, params)
+        self.assertEqual(first.json()["results"][0]["comment_count"], 0)
+        pending = [
+            Comment.objects.create(
+                recipe=self.soup, user=self.bob, body=f"Hi {i}", approved=False
+            )
+            for i in range(3)
+        ]
+        moderation.approve_comments([c.pk for c in pending])
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"], [{"slug": "soup-0", "comment_count": 3}]
+        )
+
+    def test_detail(self):
+        url = reverse("api_recipe_detail", args=["soup-0"])
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "title,steps,average_rating"})
+        self.assertEqual(
+            response.json(), {"title": "Soup 0", "steps": ["Boil"], "average_rating": 0}
+        )
+        draft = self.client.get(reverse("api_recipe_detail", args=["secret"]))
+        self.assertEqual(draft.status_code, 404)
+        self.assertEqual(self.client.post(url).status_code, 405)
+
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Rating.objects.create(recipe=self.soup, user=self.bob, stars=5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()["average_rating"], 5.0)
+
+    def test_comments_lists_approved_comments_oldest_first(self):
+        for i in range(3):
+            Comment.objects.create(recipe=self.soup, user=self.bob, body=f"Nice {i}")
+        Comment.objects.create(recipe=self.soup, user=self.bob, body="Spam", approved=False)
+        url = reverse("api_recipe_comments", args=["soup-0"])
+        with self.assertNumQueries(2):
+            data = self.client.get(url, {"limit": 2}).json()
+        self.assertEqual([c["body"] for c in data["results"]], ["Nice 0", "Nice 1"])
+        self.assertEqual(data["results"][0]["user"], "bob")
+        data = self.client.get(data["next"]).json()
+        self.assertEqual([c["body"] for c in data["results"]], ["Nice 2"])
+        self.assertIsNone(data["next"])
+        self.assertIsNotNone(data["previous"])
+
+    def test_ratings_summary(self):
+        Rating.objects.create(recipe=self.soup, user=self.alice, stars=4)
+        Rating.objects.create(recipe=self.soup, user=self.bob, stars=5)
+        response = self.client.get(reverse("api_recipe_ratings", args=["soup-0"]))
+        self.assertEqual(response.json(), {
+            "count": 2,
+            "average": 4.5,
+            "distribution": {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1},
+        })
+
+    @override_settings(ROOT_URLCONF="recipesite.urls_async")
+    def test_available_in_asgi_mode(self):
+        self.assertEqual(self.client.get(reverse("api_recipe_list")).status_code, 200)
@@ -0,0 +1,126 @@
+"""Tests for the async list/detail views served in ASGI mode."""
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from .models import Comment, Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF="recipesite.urls_async")
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.staff = User.objects.create_user(username="staff", password="pass", is_staff=True)
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                author=self.alice, title=f"Soup {i}", slug=f"soup-{i}", description="Warm",
+                ingredients="Water", steps="Boil", tags="soup, quick" if i % 2 else "soup",
+                status="published",
+            )
+        self.recipe = recipe
+        self.draft = Recipe.objects.create(
+            author=self.alice, title="Secret", slug="secret", description="d",
+            ingredients="x", steps="y", status="draft",
+        )
+        Comment.objects.create(recipe=recipe, user=self.alice, body="Lovely", approved=True)
+        Comment.objects.create(recipe=recipe, user=self.alice, body="Hidden", approved=False)
+        self.member_client = AsyncClient()
+        self.member_client.force_login(self.alice)
+        self.staff_client = AsyncClient()
+        self.staff_client.force_login(self.staff)
+
+    def test_read_routes_are_async(self):
+        self.assertTrue(iscoroutinefunction(resolve(reverse("recipe_list")).func))
+        self.assertTrue(iscoroutinefunction(resolve(reverse("recipe_detail", args=["x"])).func))
+
+    async def test_list_pages_and_filters(self):
+        response = await self.async_client.get(reverse("recipe_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["recipes"]), 9)
+        self.assertContains(response, "Page 1 of 2")
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+
+        response = await self.async_client.get(reverse("recipe_list"), {"page": "2", "tag": "quick"})
+        self.assertEqual(response.status_code, 404)  # 6 quick recipes fit on one page
+        response = await self.async_client.get(reverse("recipe_list"), {"tag": "quick"})
+        self.assertEqual(len(response.context["recipes"]), 6)
+        response = await self.async_client.get(reverse("recipe_list"), {"page": "last"})
+        self.assertEqual(len(response.context["recipes"]), 3)
+
+    @override_settings(RECIPE_LIST_PAGINATION="cursor")
+    async def test_list_cursor_pagination(self):
+        response = await self.async_client.get(reverse("recipe_list"))
+        next_url = response.context["next_page_url"]
+        response = await self.async_client.get(reverse("recipe_list") + next_url)
+        self.assertEqual(len(response.context["recipes"]), 3)
+        response = await self.async_client.get(reverse("recipe_list"), {"cursor": "bogus"})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_anonymous_pages_are_cached(self):
+        first = await self.async_client.get(reverse("recipe_list"))
+        second = await self.async_client.get(reverse("recipe_list"))
+        self.assertEqual((first["X-Page-Cache"], second["X-Page-Cache"]), ("MISS", "HIT"))
+        member = await self.member_client.get(reverse("recipe_list"))
+        self.assertEqual(member["X-Page-Cache"], "BYPASS")
+        self.assertContains(member, "Hello, alice")
+
+    @override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+    def test_same_queries_as_the_sync_views(self):
+        detail = reverse("recipe_detail", args=[self.recipe.slug])
+        for url in (reverse("recipe_list"), detail):
+            with self.subTest(url):
+                with CaptureQueriesContext(connection) as sync_queries:
+                    with self.settings(ROOT_URLCONF="recipesite.urls"):
+                        self.client.get(url)
+                cache.clear()
+                with CaptureQueriesContext(connection) as async_queries:
+                    async_to_sync(self.async_client.get)(url)
+                self.assertEqual(len(async_queries), len(sync_queries))
+
+    async def test_detail(self):
+        url = reverse("recipe_detail", args=[self.recipe.slug])
+        response = await self.async_client.get(url)
+        self.assertContains(response, "Lovely")
+        self.assertNotContains(response, "Hidden")
+        self.assertIsNone(response.context["user_stars"])
+        response = await self.async_client.get(reverse("recipe_detail", args=["missing"]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse("recipe_detail", args=[self.draft.slug]))
+        self.assertRedirects(response, reverse("recipe_list"), fetch_redirect_response=False)
+        response = await self.member_client.get(reverse("recipe_detail", args=[self.draft.slug]))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_staff_see_pending_counts(self):
+        response = await self.staff_client.get(reverse("recipe_list"))
+        self.assertEqual(response.context["pending_recipes_count"], 1)
+        self.assertEqual(response.context["pending_comments_count"], 1)
+        response = await self.member_client.get(reverse("recipe_list"))
+        self.assertEqual(response.context["pending_comments_count"], 0)
+
+    async def test_posts_fall_back_to_the_sync_view(self):
+        url = reverse("recipe_detail", args=[self.recipe.slug])
+        response = await self.member_client.post(url, {"body": "Async comment"})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertTrue(await Comment.objects.filter(body="Async comment", approved=False).aexists())
+        mine = await Comment.objects.aget(body="Async comment")
+        response = await self.member_client.get(url, {"edit": str(mine.pk)})
+        self.assertEqual(response.context["edit_comment_id"], str(mine.pk))
+
+    @override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+    async def test_conditional_get(self):
+        for url in (reverse("recipe_list"), reverse("recipe_detail", args=[self.recipe.slug])):
+            await self.member_client.get(url)  # sets the CSRF cookie
+            first = await self.member_client.get(url)
+            again = await self.member_client.get(url, headers={"If-None-Match": first["ETag"]})
+            self.assertEqual(again.status_code, 304)
+            anonymous = await self.async_client.get(url, headers={"If-None-Match": first["ETag"]})
+            self.assertEqual(anonymous.status_code, 200)
@@ -0,0 +1,41 @@
+"""Run the view benchmarks on a small dataset to keep their query budgets honest."""
+
+from django.test import TestCase, TransactionTestCase
+
+from . import benchmarks
+
+
+class TestBenchmarkBudgets(TestCase):
+    def test_every_view_stays_within_its_query_budget(self):
+        report = benchmarks.run(
+            dataset={"users": 5, "recipes": 30, "comments": 10, "pending_comments": 5},
+            repeat=1,
+        )
+        self.assertEqual(
+            {r["name"] for r in report["results"]}, {b.name for b in benchmarks.BENCHMARKS}
+        )
+        for result in report["results"]:
+            with self.subTest(result["name"]):
+                self.assertLess(result["status"], 400)
+                self.assertLessEqual(result["queries"], result["max_queries"])
+
+    def test_compare_reports_changed_metrics(self):
+        before = {"results": [{"name": "recipe_list", "queries": 5, "median_ms": 9, "p95_ms": 12}]}
+        after = {"results": [{"name": "recipe_list", "queries": 4, "median_ms": 9, "p95_ms": 10}]}
+        changes = {(m, b, a) for _, m, b, a in benchmarks.compare(after, before) if b != a}
+        self.assertEqual(changes, {("queries", 5, 4), ("p95_ms", 12, 10)})
+
+
+class TestThroughput(TransactionTestCase):
+    # threads need committed rows, so no wrapping transaction here
+    def test_wsgi_and_asgi_paths_serve_every_request(self):
+        fixtures = benchmarks.seed(users=3, recipes=12, comments=5, pending_comments=2)
+        results = benchmarks.throughput(fixtures, concurrency=3, requests=6)
+        self.assertEqual(
+            {(r["name"], r["server"]) for r in results},
+            {(name, server) for name in benchmarks.THROUGHPUT_VIEWS for server in ("wsgi", "asgi")},
+        )
+        for result in results:
+            with self.subTest(result["name"], server=result["server"]):
+                self.assertEqual(result["errors"], 0)
+                self.assertGreater(result["requests_per_s"], 0)
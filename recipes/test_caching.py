@@ -0,0 +1,179 @@
+"""Tests for versioned fragment caching of recipe cards and detail sections."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Comment, Rating, Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)  # exercise fragments, not whole pages
+class TestFragmentCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.user, title="Soup", slug="soup", description="Warm",
+            ingredients="Water\nSalt", steps="Boil", status="published",
+        )
+
+    def _list(self):
+        return self.client.get(reverse("recipe_list")).content.decode()
+
+    def _detail(self):
+        return self.client.get(reverse("recipe_detail", args=["soup"])).content.decode()
+
+    def test_unchanged_card_is_served_from_cache(self):
+        self.assertIn("Soup", self._list())
+        # a write that bypasses the model does not bump the version...
+        Recipe.objects.filter(pk=self.recipe.pk).update(title="Stew")
+        self.assertIn("Soup", self._list())
+        # ...while a normal save does
+        self.recipe.refresh_from_db()
+        self.recipe.save()
+        page = self._list()
+        self.assertIn("Stew", page)
+        self.assertNotIn("Soup", page)
+
+    def test_rating_change_invalidates_card(self):
+        self.assertNotIn("Avg rating", self._list())
+        Rating.objects.create(recipe=self.recipe, user=self.user, stars=4)
+        self.assertIn("Avg rating: 4.0", self._list())
+
+    def test_detail_sections_follow_recipe_and_comment_changes(self):
+        self.assertIn("No comments yet.", self._detail())
+        comment = Comment.objects.create(
+            recipe=self.recipe, user=self.user, body="Lovely", approved=False
+        )
+        self.assertNotIn("Lovely", self._detail())
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.approved = True
+        comment.save()
+        self.assertIn("Lovely", self._detail())
+
+        self.recipe.refresh_from_db()
+        self.recipe.ingredients = "Leeks"
+        self.recipe.save()
+        self.assertIn("Leeks", self._detail())
+
+    def test_logged_in_users_get_their_own_comment_controls(self):
+        comment = Comment.objects.create(recipe=self.recipe, user=self.user, body="Mine")
+        delete_url = reverse("comment_delete", args=[comment.pk])
+        self.assertNotIn(delete_url, self._detail())
+        self.client.login(username="alice", password="pass")
+        self.assertIn(delete_url, self._detail())
+
+
+class TestAnonymousPageCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.staff = User.objects.create_user(username="staff", password="pass", is_staff=True)
+        self.recipe = Recipe.objects.create(
+            author=self.user, title="Soup", slug="soup", description="Warm",
+            ingredients="Water", steps="Boil", status="published",
+        )
+        self.draft = Recipe.objects.create(
+            author=self.user, title="Secret Pie", slug="pie", description="Sweet",
+            ingredients="Apples", steps="Bake", status="draft",
+        )
+
+    def test_second_anonymous_get_is_a_hit_without_queries(self):
+        url = reverse("recipe_detail", args=["soup"])
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp["X-Page-Cache"], "HIT")
+        self.assertIn(b"Soup", resp.content)
+
+    def test_list_key_ignores_unknown_and_empty_params(self):
+        self.client.get(reverse("recipe_list"), {"tag": "x", "q": ""})
+        resp = self.client.get(reverse("recipe_list"), {"utm_source": "mail", "tag": "x"})
+        self.assertEqual(resp["X-Page-Cache"], "HIT")
+
+    def test_sessions_and_flash_messages_bypass(self):
+        self.client.login(username="alice", password="pass")
+        self.assertEqual(self.client.get(reverse("recipe_list"))["X-Page-Cache"], "BYPASS")
+        self.client.logout()
+        self.client.cookies.clear()
+        self.client.cookies["messages"] = "pending"
+        self.client.get(reverse("recipe_list"))  # invalid cookie: no messages, cached
+        self.client.cookies.clear()
+        self.client.post(reverse("recipe_detail", args=["soup"]), {"rating": "3"})
+        # the anonymous rating attempt left a flash message in a cookie
+        self.assertIn("messages", self.client.cookies)
+        self.assertEqual(self.client.get(reverse("recipe_list"))["X-Page-Cache"], "BYPASS")
+
+    def test_approve_recipe_purges_list_pages(self):
+        self.assertNotIn(b"Secret Pie", self.client.get(reverse("recipe_list")).content)
+        staff = self.client_class()
+        staff.login(username="staff", password="pass")
+        staff.post(reverse("approve_recipe", args=["pie"]))
+        resp = self.client.get(reverse("recipe_list"))
+        self.assertEqual(resp["X-Page-Cache"], "MISS")
+        self.assertIn(b"Secret Pie", resp.content)
+
+    def test_approve_comment_purges_detail_page(self):
+        url = reverse("recipe_detail", args=["soup"])
+        comment = Comment.objects.create(
+            recipe=self.recipe, user=self.user, body="Lovely", approved=False
+        )
+        self.assertNotIn(b"Lovely", self.client.get(url).content)
+        staff = self.client_class()
+        staff.login(username="staff", password="pass")
+        staff.post(reverse("approve_comment", args=[comment.pk]))
+        self.assertIn(b"Lovely", self.client.get(url).content)
+
+    def test_approving_comments_moves_the_most_commented_list(self):
+        stew = Recipe.objects.create(
+            author=self.user, title="Stew", slug="stew", description="Thick",
+            ingredients="Beans", steps="Simmer", status="published",
+        )
+        Comment.objects.create(recipe=stew, user=self.user, body="Yum")
+        pending = [
+            Comment.objects.create(
+                recipe=self.recipe, user=self.user, body=f"Hi {i}", approved=False
+            )
+            for i in range(3)
+        ]
+        url = reverse("recipe_list")
+
+        def slugs(resp):
+            return [r.slug for r in resp.context["recipes"]]
+
+        first = self.client.get(url, {"sort": "most_commented"})
+        self.assertEqual(slugs(first), ["stew", "soup"])
+        staff = self.client_class()
+        staff.login(username="staff", password="pass")
+        staff.post(reverse("bulk_moderate_comments"), {
+            "action": "approve", "ids": [c.pk for c in pending[:2]],
+        })
+        resp = self.client.get(
+            url, {"sort": "most_commented"}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual((resp.status_code, resp["X-Page-Cache"]), (200, "MISS"))
+        self.assertNotEqual(resp["ETag"], first["ETag"])
+        self.assertEqual(slugs(resp), ["soup", "stew"])
+        # a single approval through the signal handlers moves it on too
+        staff.post(reverse("approve_comment", args=[pending[2].pk]))
+        again = self.client.get(
+            url, {"sort": "most_commented"}, HTTP_IF_NONE_MATCH=resp["ETag"]
+        )
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again["ETag"], resp["ETag"])
+
+    def test_recipe_edit_purges_detail_page(self):
+        url = reverse("recipe_detail", args=["soup"])
+        self.client.get(url)
+        author = self.client_class()
+        author.login(username="alice", password="pass")
+        author.post(reverse("recipe_edit", args=["soup"]), {
+            "title": "Soup", "description": "Warm", "ingredients": "Water",
+            "steps": "Boil", "prep_minutes": 1, "cook_minutes": 1, "servings": 1,
+        })
+        # edits send the recipe back to draft, so visitors are now redirected
+        self.assertEqual(self.client.get(url).status_code, 302)
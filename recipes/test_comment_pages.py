@@ -0,0 +1,96 @@
+"""Tests for the paginated comment list on the recipe detail page."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Comment, Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_COMMENTS_PER_PAGE=3, RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestCommentPages(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.alice, title="Soup", slug="soup", description="d",
+            ingredients="Water", steps="Boil", status="published",
+        )
+        self.comments = [
+            Comment.objects.create(
+                recipe=self.recipe, user=self.bob if i % 2 else self.alice, body=f"Comment {i}"
+            )
+            for i in range(7)
+        ]
+        Comment.objects.create(recipe=self.recipe, user=self.bob, body="Hidden", approved=False)
+
+    def test_detail_renders_first_page_and_a_link_to_the_rest(self):
+        resp = self.client.get(reverse("recipe_detail", args=["soup"]))
+        self.assertEqual(
+            [c.body for c in resp.context["comments"]], ["Comment 0", "Comment 1", "Comment 2"]
+        )
+        self.assertNotContains(resp, "Comment 3")
+        self.assertContains(resp, 'id="load-more-comments"')
+        self.assertTrue(
+            resp.context["comments_next_url"].startswith(reverse("recipe_comments", args=["soup"]))
+        )
+
+    def test_fragment_pages_walk_every_approved_comment_once(self):
+        url = self.client.get(reverse("recipe_detail", args=["soup"])).context["comments_next_url"]
+        seen = []
+        while url:
+            with self.assertNumQueries(2):  # recipe, page
+                resp = self.client.get(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            seen.extend(c.body for c in resp.context["comments"])
+            url = resp["X-Next-Page"]
+        self.assertEqual(seen, [f"Comment {i}" for i in range(3, 7)])
+
+    def test_json_format_and_edit_controls(self):
+        self.client.login(username="bob", password="pass")
+        detail = self.client.get(reverse("recipe_detail", args=["soup"]))
+        resp = self.client.get(detail.context["comments_next_url"] + "&format=json")
+        data = resp.json()
+        self.assertEqual(
+            [c["body"] for c in data["comments"]], ["Comment 3", "Comment 4", "Comment 5"]
+        )
+        self.assertEqual([c["editable"] for c in data["comments"]], [True, False, True])
+        self.assertIsNotNone(data["next"])
+
+        fragment = self.client.get(
+            detail.context["comments_next_url"], HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        self.assertContains(fragment, f'data-pk="{self.comments[3].pk}"')
+        self.assertContains(fragment, reverse("comment_delete", args=[self.comments[3].pk]))
+        self.assertNotContains(fragment, f'data-pk="{self.comments[4].pk}"')
+
+    def test_without_javascript_the_link_walks_full_pages(self):
+        resp = self.client.get(reverse("recipe_detail", args=["soup"]))
+        seen = []
+        for _ in range(2):
+            resp = self.client.get(resp.context["comments_next_url"])
+            self.assertTemplateUsed(resp, "recipes/recipe_comments.html")
+            self.assertContains(resp, reverse("recipe_detail", args=["soup"]))
+            self.assertIn("X-Requested-With", resp["Vary"])
+            seen.extend(c.body for c in resp.context["comments"])
+        self.assertEqual(seen, [f"Comment {i}" for i in range(3, 7)])
+        self.assertIsNone(resp.context["comments_next_url"])
+        self.assertNotContains(resp, 'id="load-more-comments"')
+
+    def test_edit_prefill_works_for_comments_beyond_the_first_page(self):
+        self.client.login(username="bob", password="pass")
+        comment = self.comments[5]
+        resp = self.client.get(reverse("recipe_detail", args=["soup"]), {"edit": comment.pk})
+        self.assertEqual(resp.context["edit_comment_id"], str(comment.pk))
+        self.assertEqual(resp.context["comment_form"].initial["body"], "Comment 5")
+
+    def test_bad_cursor_and_unpublished_recipe_are_404(self):
+        url = reverse("recipe_comments", args=["soup"])
+        self.assertEqual(self.client.get(url, {"cursor": "bogus"}).status_code, 404)
+        self.recipe.status = "draft"
+        self.recipe.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
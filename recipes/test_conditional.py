@@ -0,0 +1,142 @@
+"""Tests for conditional GET (ETag / Last-Modified) on the recipe pages."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import caching
+from .models import Comment, Rating, Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.alice, title="Soup", slug="soup", description="d",
+            ingredients="Water", steps="Boil", status="published",
+        )
+        self.url = reverse("recipe_detail", args=[self.recipe.slug])
+
+    def _etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_detail_validators_and_304_without_rendering(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertNotIn("private", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+        with self.assertNumQueries(1):  # the recipe row only
+            again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(again.templates, [])
+        self.assertEqual(again["ETag"], response["ETag"])
+
+        since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+    def test_detail_etag_follows_ratings_and_comments(self):
+        before = self._etag(self.url)
+        Rating.objects.create(recipe=self.recipe, user=self.bob, stars=4)
+        after_rating = self._etag(self.url)
+        self.assertNotEqual(before, after_rating)
+        comment = Comment.objects.create(recipe=self.recipe, user=self.bob, body="Hi", approved=False)
+        self.assertEqual(self._etag(self.url), after_rating)  # pending comments are not shown
+        comment.approved = True
+        comment.save()
+        after_comment = self.client.get(self.url, HTTP_IF_NONE_MATCH=after_rating)
+        self.assertEqual(after_comment.status_code, 200)
+        self.assertContains(after_comment, "Hi")
+
+    def test_personal_pages_get_personal_etags(self):
+        anonymous = self._etag(self.url)
+        self.client.login(username="alice", password="pass")
+        self.client.get(self.url)  # sets the CSRF cookie, which the ETag covers
+        response = self.client.get(self.url)
+        self.assertNotEqual(response["ETag"], anonymous)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("private", response["Cache-Control"])
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self.client.login(username="bob", password="pass")
+        other = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(other.status_code, 200)
+
+    def test_pending_messages_are_never_skipped(self):
+        self.client.login(username="bob", password="pass")
+        etag = self._etag(self.url)
+        self.client.post(self.url, {"rating": "9"})  # queues an error message
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Invalid rating value.")
+
+    def test_unpublished_recipes_are_not_revalidated(self):
+        self.recipe.status = "draft"
+        self.recipe.save()
+        self.client.login(username="alice", password="pass")
+        self.assertNotIn("ETag", self.client.get(self.url))
+
+    def test_list_uses_the_catalogue_version(self):
+        url = reverse("recipe_list")
+        etag = self._etag(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+        # an edit anywhere (here: outside any view) moves every list page on
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        recipe.title = "Tomato soup"
+        recipe.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Tomato soup")
+
+
+class TestConditionalPageCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        alice = User.objects.create_user(username="alice", password="pass")
+        Recipe.objects.create(
+            author=alice, title="Soup", slug="soup", description="d",
+            ingredients="Water", steps="Boil", status="published",
+        )
+
+    def test_cached_pages_are_revalidated_from_their_own_validators(self):
+        for url in (reverse("recipe_list"), reverse("recipe_detail", args=["soup"])):
+            with self.subTest(url):
+                first = self.client.get(url)
+                self.assertEqual(first["X-Page-Cache"], "MISS")
+                hit = self.client.get(url)
+                self.assertEqual((hit["X-Page-Cache"], hit["ETag"]), ("HIT", first["ETag"]))
+                # a list page reads the list generation for its cache key
+                with self.assertNumQueries(1 if url == reverse("recipe_list") else 0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+                self.assertEqual(response.status_code, 304)
+
+    def test_a_purge_in_another_worker_moves_the_list_pages_on(self):
+        urls = (reverse("recipe_list"), reverse("api_recipe_list"))
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        # a worker with its own per-process cache publishes a recipe
+        with mock.patch.object(caching, "cache", LocMemCache("other-worker", {})):
+            caching.purge_recipe_list()
+        for url in urls:
+            with self.subTest(url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etags[url])
+        self.assertEqual(self.client.get(urls[0])["X-Page-Cache"], "HIT")
@@ -0,0 +1,194 @@
+"""Tests for the denormalized rating and comment counters on ``Recipe``."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import counters
+from .models import Comment, Rating, Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestRecipeCounters(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.alice,
+            title="Soup",
+            slug="soup",
+            description="Warm soup",
+            ingredients="Water",
+            steps="Boil",
+            status="published",
+        )
+
+    def _counters(self):
+        self.recipe.refresh_from_db()
+        return (
+            self.recipe.rating_count,
+            self.recipe.rating_sum,
+            self.recipe.approved_comment_count,
+        )
+
+    def test_rating_create_update_delete(self):
+        Rating.objects.create(recipe=self.recipe, user=self.alice, stars=4)
+        Rating.objects.create(recipe=self.recipe, user=self.bob, stars=1)
+        self.assertEqual(self._counters(), (2, 5, 0))
+        Rating.objects.update_or_create(
+            recipe=self.recipe, user=self.bob, defaults={"stars": 5}
+        )
+        self.assertEqual(self._counters(), (2, 9, 0))
+        Rating.objects.get(user=self.alice).delete()
+        self.assertEqual(self._counters(), (1, 5, 0))
+
+    def test_comment_approval_flips(self):
+        comment = Comment.objects.create(
+            recipe=self.recipe, user=self.bob, body="Nice", approved=False
+        )
+        self.assertEqual(self._counters(), (0, 0, 0))
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.approved = True
+        comment.save()
+        self.assertEqual(self._counters(), (0, 0, 1))
+        comment.approved = False
+        comment.save()
+        self.assertEqual(self._counters(), (0, 0, 0))
+        Comment.objects.create(recipe=self.recipe, user=self.bob, body="Again")
+        self.assertEqual(self._counters(), (0, 0, 1))
+        Comment.objects.get(body="Again").delete()
+        self.assertEqual(self._counters(), (0, 0, 0))
+
+    def test_average_rating_reads_stored_counters(self):
+        Rating.objects.create(recipe=self.recipe, user=self.alice, stars=4)
+        Rating.objects.create(recipe=self.recipe, user=self.bob, stars=3)
+        self.recipe.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.recipe.average_rating, 3.5)
+
+    def test_list_page_has_no_per_card_aggregates(self):
+        for i in range(5):
+            Recipe.objects.create(
+                author=self.alice, title=f"R{i}", slug=f"r{i}", description="d",
+                ingredients="i", steps="s", status="published",
+            )
+        Rating.objects.create(recipe=self.recipe, user=self.bob, stars=5)
+        # list generation + count + page + tags prefetch + tag facets
+        with self.assertNumQueries(5):
+            self.client.get(reverse("recipe_list"))
+
+    def test_recount_repairs_drift(self):
+        Rating.objects.create(recipe=self.recipe, user=self.alice, stars=4)
+        Comment.objects.create(recipe=self.recipe, user=self.bob, body="Nice")
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            rating_count=7, rating_sum=0, approved_comment_count=3
+        )
+        out = StringIO()
+        call_command("recount", stdout=out)
+        self.assertIn("1 had drifted", out.getvalue())
+        self.assertEqual(self._counters(), (1, 4, 1))
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0, RECIPE_TOP_PRIOR_MEAN=3.5, RECIPE_TOP_PRIOR_WEIGHT=10)
+class TestTopRated(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass") for i in range(6)
+        ]
+        self.one_vote, self.many_votes, self.unrated = [
+            Recipe.objects.create(
+                author=self.users[0], title=title, slug=slug, description="d",
+                ingredients="i", steps="s", status="published",
+            )
+            for title, slug in [("One vote", "one"), ("Many votes", "many"), ("Unrated", "fresh")]
+        ]
+
+    def _rate(self, user, recipe, stars):
+        self.client.force_login(user)
+        self.client.post(reverse("recipe_detail", args=[recipe.slug]), {"rating": stars})
+
+    def test_histogram_and_score_follow_the_rating_form(self):
+        self._rate(self.users[0], self.one_vote, 5)
+        self._rate(self.users[1], self.one_vote, 3)
+        self._rate(self.users[0], self.one_vote, 4)  # update_or_create moves 5★ to 4★
+        recipe = Recipe.objects.get(pk=self.one_vote.pk)
+        self.assertEqual(
+            [recipe.ratings_1, recipe.ratings_2, recipe.ratings_3, recipe.ratings_4,
+             recipe.ratings_5],
+            [0, 0, 1, 1, 0],
+        )
+        self.assertAlmostEqual(recipe.top_score, (7 + 35) / 12)
+        self.assertAlmostEqual(recipe.top_score, counters.top_score(2, 7))
+        self.assertEqual(recipe.rating_distribution()[1], (4, 1, 50))
+
+        Rating.objects.get(user=self.users[1]).delete()
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.ratings_3, recipe.ratings_4), (0, 1))
+        self.assertAlmostEqual(recipe.top_score, (4 + 35) / 11)
+        self.assertFalse(counters.find_drift().exists())
+
+    def test_one_perfect_vote_does_not_outrank_many_good_ones(self):
+        Rating.objects.create(recipe=self.one_vote, user=self.users[0], stars=5)
+        for user, stars in zip(self.users, [5, 5, 5, 5, 5, 4]):
+            Rating.objects.create(recipe=self.many_votes, user=user, stars=stars)
+        one_vote = Recipe.objects.get(pk=self.one_vote.pk)
+        self.assertEqual(one_vote.average_rating, 5.0)
+        self.assertEqual(Recipe.objects.get(slug="fresh").top_score, 3.5)
+
+        response = self.client.get(reverse("recipe_list"), {"sort": "top"})
+        self.assertEqual([r.slug for r in response.context["recipes"]], ["many", "one", "fresh"])
+        self.assertIn(("Top rated", "?sort=top", True), response.context["sort_links"])
+        with self.settings(RECIPE_LIST_PAGINATION="cursor"):
+            response = self.client.get(reverse("recipe_list"), {"sort": "top"})
+        self.assertEqual([r.slug for r in response.context["recipes"]], ["many", "one", "fresh"])
+        response = self.client.get(reverse("api_recipe_list"), {"sort": "top", "fields": "slug"})
+        self.assertEqual(
+            response.json()["results"], [{"slug": "many"}, {"slug": "one"}, {"slug": "fresh"}]
+        )
+
+    def test_detail_page_shows_the_distribution_without_aggregates(self):
+        for user, stars in zip(self.users, [5, 5, 4, 1]):
+            Rating.objects.create(recipe=self.many_votes, user=user, stars=stars)
+        response = self.client.get(reverse("recipe_detail", args=["many"]))
+        self.assertContains(response, 'class="rating-distribution')
+        self.assertContains(response, 'style="width: 50%"')
+        self.assertNotContains(
+            self.client.get(reverse("recipe_detail", args=["fresh"])), "rating-distribution"
+        )
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse("api_recipe_ratings", args=["many"])).json()
+        self.assertEqual(data["distribution"], {"1": 1, "2": 0, "3": 0, "4": 1, "5": 2})
+
+    def test_recount_repairs_the_histogram_and_score(self):
+        Rating.objects.create(recipe=self.one_vote, user=self.users[0], stars=2)
+        Recipe.objects.filter(pk=self.one_vote.pk).update(ratings_2=0, ratings_5=3, top_score=0)
+        self.assertTrue(counters.find_drift().exists())
+        counters.recount()
+        recipe = Recipe.objects.get(pk=self.one_vote.pk)
+        self.assertEqual((recipe.ratings_2, recipe.ratings_5), (1, 0))
+        self.assertAlmostEqual(recipe.top_score, (2 + 35) / 11)
+
+    def test_stars_outside_one_to_five_are_refused(self):
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(admin)
+        response = self.client.post(reverse("admin:recipes_rating_add"), {
+            "recipe": self.one_vote.pk, "user": self.users[0].pk, "stars": 6,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("stars", response.context["adminform"].form.errors)
+        for stars in [0, 6]:
+            with self.subTest(stars=stars), self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    Rating.objects.create(recipe=self.one_vote, user=self.users[1], stars=stars)
+        self.assertFalse(Rating.objects.exists())
+        self.assertFalse(counters.find_drift().exists())
@@ -0,0 +1,130 @@
+"""Tests for the streaming catalogue export (command and staff endpoint)."""
+
+import csv
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from . import export, importer
+from .models import Comment, Rating, Recipe
+
+
+User = get_user_model()
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        self.staff = User.objects.create_user(username="staff", password="pass", is_staff=True)
+        self.recipes = [
+            Recipe.objects.create(
+                author=self.alice, title=f"Soup {i}", slug=f"soup-{i}", description="d",
+                ingredients="Water\nSalt", steps="Boil", tags="Soup, quick",
+                status="draft" if i == 2 else "published",
+            )
+            for i in range(3)
+        ]
+        soup = self.recipes[0]
+        Rating.objects.create(recipe=soup, user=self.alice, stars=4)
+        Rating.objects.create(recipe=soup, user=self.bob, stars=5)
+        Comment.objects.create(recipe=soup, user=self.bob, body="Lovely, really")
+        Comment.objects.create(recipe=soup, user=self.bob, body="Spam", approved=False)
+
+    def _export(self, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export")
+            call_command("export_recipes", output=path, stderr=io.StringIO(), **options)
+            with open(path, encoding="utf-8", newline="") as fh:
+                return fh.read()
+
+    def test_records_are_read_a_chunk_at_a_time(self):
+        # per chunk: recipes, comments
+        with self.assertNumQueries(4):
+            records = list(export.iter_records(chunk_size=2))
+        self.assertEqual([r["slug"] for r in records], ["soup-0", "soup-1", "soup-2"])
+        first = records[0]
+        self.assertEqual(first["author"], "alice")
+        self.assertEqual(first["tags"], ["Soup", "quick"])
+        self.assertEqual(first["ratings"], {
+            "count": 2, "average": 4.5,
+            "distribution": {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1},
+        })
+        self.assertEqual([c["body"] for c in first["comments"]], ["Lovely, really"])
+        self.assertIsNone(records[1]["ratings"]["average"])
+
+    def test_command_writes_ndjson(self):
+        lines = self._export(chunk_size=1, status="published").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r["slug"] for r in records], ["soup-0", "soup-1"])
+        self.assertEqual(records[0]["comments"][0]["user"], "bob")
+
+    def test_command_writes_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self._export(format="csv"))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["tags"], "Soup, quick")
+        self.assertEqual(rows[0]["ingredients"], "Water\nSalt")
+        self.assertEqual((rows[0]["ratings_4"], rows[0]["ratings_5"]), ("1", "1"))
+        self.assertEqual(rows[0]["comment_count"], "1")
+        self.assertEqual(json.loads(rows[0]["comments"])[0]["body"], "Lovely, really")
+
+    def test_comments_are_read_a_page_at_a_time(self):
+        stew = self.recipes[1]
+        for i in range(5):
+            Comment.objects.create(recipe=stew, user=self.alice, body=f"Note {i}")
+        # recipes, then pages of two of the six approved comments (the last one empty)
+        with mock.patch.object(export, "COMMENT_CHUNK_SIZE", 2), self.assertNumQueries(5):
+            records = list(export.iter_records())
+        comments = {r["slug"]: [c["body"] for c in r["comments"]] for r in records}
+        self.assertEqual(comments, {
+            "soup-0": ["Lovely, really"],
+            "soup-1": [f"Note {i}" for i in range(5)],
+            "soup-2": [],
+        })
+
+    def test_csv_cells_are_not_spreadsheet_formulas(self):
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(
+            title="=HYPERLINK(\"http://x\")", ingredients="-2 eggs\nSalt"
+        )
+        text = self._export(format="csv")
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(rows[0]["title"], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(rows[0]["ingredients"], "'-2 eggs\nSalt")
+        self.assertEqual(rows[0]["description"], "d")
+        # the importer reads the cells back as they were
+        _, row = next(importer.read_rows(io.StringIO(text), "csv"))
+        self.assertEqual(
+            (row["title"], row["ingredients"]), ("=HYPERLINK(\"http://x\")", "-2 eggs\nSalt")
+        )
+
+    def test_endpoint_streams_for_staff_only(self):
+        url = reverse("export_recipes")
+        self.client.login(username="alice", password="pass")
+        self.assertRedirects(self.client.get(url), reverse("recipe_list"))
+
+        self.client.login(username="staff", password="pass")
+        response = self.client.get(url, {"format": "csv", "status": "published"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="recipes.csv"', response["Content-Disposition"])
+        body = b"".join(response.streaming_content).decode()
+        rows = csv.DictReader(io.StringIO(body))
+        self.assertEqual([r["slug"] for r in rows], ["soup-0", "soup-1"])
+
+        response = self.client.get(url)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+
+    def test_buffered_sends_the_first_line_alone(self):
+        pieces = list(export.buffered(["a\n", "b\n", "c\n"], size=3))
+        self.assertEqual(pieces, ["a\n", "b\nc\n"])
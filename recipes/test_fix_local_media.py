@@ -0,0 +1,90 @@
+"""Tests for the ``fix_local_media`` management command."""
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .management.commands.fix_local_media import MediaIndex
+from .images import needs_refresh
+from .models import Recipe
+
+
+User = get_user_model()
+
+
+class TestFixLocalMedia(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        for name in (
+            "recipes/soup.jpg",
+            "recipes/soup-deluxe.jpg",
+            "recipes/IMG_1234_lentil-stew.webp",
+            "recipes/pancake.png",
+            "recipes/old/cake.jpg",
+            "other/readme.txt",
+        ):
+            path = Path(self.media, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x")
+        self.alice = User.objects.create_user(username="alice", password="pass")
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _recipe(self, slug, image):
+        return Recipe.objects.create(
+            author=self.alice, title=slug, slug=slug, description="d",
+            ingredients="x", steps="y", image=image,
+        )
+
+    def test_index_lookup(self):
+        index = MediaIndex(Path(self.media), workers=3)
+        self.assertEqual(len(index.paths), 6)
+        self.assertTrue(index.exists("recipes/old/cake.jpg"))
+        # a name starting with the slug wins; the longest such name first
+        self.assertEqual(index.best_match("soup"), "recipes/soup-deluxe.jpg")
+        self.assertEqual(index.best_match("lentil-stew"), "recipes/IMG_1234_lentil-stew.webp")
+        # only files directly in recipes/ are candidates, matched at word starts
+        self.assertIsNone(index.best_match("cake"))
+        self.assertIsNone(index.best_match("missing"))
+
+    def test_fixes_are_applied_in_bulk(self):
+        prefixed = self._recipe("soup", "media/recipes/soup.jpg")
+        moved = self._recipe("lentil-stew", "recipes/lentil.jpg")
+        fine = self._recipe("pancake", "recipes/pancake.png")
+        lost = self._recipe("bread", "recipes/bread.jpg")
+        versions = dict(Recipe.objects.values_list("pk", "cache_version"))
+
+        out = StringIO()
+        call_command("fix_local_media", "--dry-run", stdout=out)
+        self.assertIn("Done: updated=0, missing=1", out.getvalue())
+        self.assertEqual(Recipe.objects.get(pk=moved.pk).image.name, "recipes/lentil.jpg")
+
+        out = StringIO()
+        # read the recipes, one bulk UPDATE, the variants of each fixed image,
+        # then the list generation
+        with self.assertNumQueries(5):
+            call_command("fix_local_media", "--workers", "2", "--batch-size", "10", stdout=out)
+        self.assertIn("Done: updated=2, missing=1", out.getvalue())
+        self.assertIn("Missing file for bread", out.getvalue())
+        images = dict(Recipe.objects.values_list("pk", "image"))
+        self.assertEqual(images[prefixed.pk], "recipes/soup.jpg")
+        self.assertEqual(images[moved.pk], "recipes/IMG_1234_lentil-stew.webp")
+        self.assertEqual(images[fine.pk], "recipes/pancake.png")
+        self.assertEqual(images[lost.pk], "recipes/bread.jpg")
+        self.assertEqual(
+            Recipe.objects.get(pk=moved.pk).cache_version, versions[moved.pk] + 2
+        )
+        for recipe in Recipe.objects.filter(pk__in=[prefixed.pk, moved.pk]):
+            self.assertFalse(needs_refresh(recipe))
@@ -0,0 +1,117 @@
+"""Tests for responsive image variants (``recipes.images``)."""
+
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from . import images
+from .models import Recipe
+
+
+User = get_user_model()
+
+
+def _jpeg(width=1000, height=600, name="photo.jpg"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class TestImageVariants(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(
+            MEDIA_ROOT=self.media,
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            },
+            RECIPE_IMAGE_WIDTHS=(320, 640, 1280),
+            RECIPE_PAGE_CACHE_TIMEOUT=0,
+        )
+        self.override.enable()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _recipe(self, **kwargs):
+        return Recipe.objects.create(
+            author=self.alice, title="Soup", slug="soup", description="d",
+            ingredients="Water", steps="Boil", status="published", **kwargs,
+        )
+
+    def test_upload_builds_smaller_variants_and_a_placeholder(self):
+        recipe = self._recipe(image=_jpeg())
+        recipe.refresh_from_db()
+        variants = recipe.image_variants
+        self.assertEqual(variants["source"], recipe.image.name)
+        self.assertEqual((variants["width"], variants["height"]), (1000, 600))
+        self.assertTrue(variants["placeholder"].startswith("data:image/"))
+        self.assertLess(len(variants["placeholder"]), 1500)
+        self.assertIn("webp", variants["formats"])
+        for fmt, entries in variants["formats"].items():
+            # never upscaled past the 1000px original
+            self.assertEqual([e["width"] for e in entries], [320, 640])
+            for entry in entries:
+                with recipe.image.storage.open(entry["name"]) as fh:
+                    self.assertEqual(Image.open(fh).width, entry["width"])
+
+    def test_templates_emit_srcset_sizes_and_lazy_loading(self):
+        recipe = self._recipe(image=_jpeg())
+        list_page = self.client.get(reverse("recipe_list"))
+        self.assertContains(list_page, 'type="image/webp"')
+        self.assertContains(list_page, "320w")
+        self.assertContains(list_page, 'sizes="(min-width: 768px) 33vw, 100vw"')
+        self.assertContains(list_page, 'loading="lazy"')
+        self.assertContains(list_page, 'width="1000" height="600"')
+        detail = self.client.get(reverse("recipe_detail", args=[recipe.slug]))
+        self.assertContains(detail, 'loading="eager"')
+
+    def test_replacing_the_image_replaces_its_variants(self):
+        recipe = self._recipe(image=_jpeg())
+        recipe.refresh_from_db()
+        old = [e["name"] for e in recipe.image_variants["formats"]["webp"]]
+        recipe.image = _jpeg(400, 400, "other.jpg")
+        recipe.save()
+        recipe.refresh_from_db()
+        storage = recipe.image.storage
+        self.assertFalse(any(storage.exists(name) for name in old))
+        self.assertEqual([e["width"] for e in recipe.image_variants["formats"]["webp"]], [320])
+
+    def test_unreadable_file_keeps_the_original(self):
+        recipe = self._recipe(image=SimpleUploadedFile("broken.jpg", b"not an image"))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, {"source": recipe.image.name})
+        self.assertFalse(images.needs_refresh(recipe))
+
+    def test_oversized_image_is_saved_without_variants(self):
+        # Pillow refuses images over twice MAX_IMAGE_PIXELS as decompression bombs
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            recipe = self._recipe(image=_jpeg())
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, {"source": recipe.image.name})
+
+    def test_backfill_command(self):
+        recipe = self._recipe(image=_jpeg())
+        Recipe.objects.filter(pk=recipe.pk).update(image_variants={})
+        out = StringIO()
+        call_command("generate_image_variants", "--dry-run", stdout=out)
+        self.assertIn("Would build 1", out.getvalue())
+        call_command("generate_image_variants", stdout=out)
+        recipe.refresh_from_db()
+        self.assertIn("webp", recipe.image_variants["formats"])
+        out = StringIO()
+        call_command("generate_image_variants", stdout=out)
+        self.assertIn("Built 0, skipped 1", out.getvalue())
@@ -0,0 +1,186 @@
+"""Tests for the bulk recipe importer (``recipes.importer`` and ``import_recipes``)."""
+
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from . import export, importer
+from .forms import RecipeForm
+from .models import Recipe, Tag
+from .views import filter_recipes
+
+
+User = get_user_model()
+
+
+def _row(**fields):
+    row = {
+        "title": "Tomato Soup", "description": "Warming", "ingredients": ["Tomatoes", "Salt"],
+        "steps": ["Chop", "Simmer"], "tags": ["Soup", "quick"], "prep_minutes": 5,
+        "cook_minutes": 20, "servings": 2,
+    }
+    row.update(fields)
+    return row
+
+
+def _ndjson(*rows):
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+
+class TestImporter(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        Recipe.objects.create(
+            author=self.alice, title="Tomato Soup", slug="tomato-soup", description="d",
+            ingredients="x", steps="y", status="published",
+        )
+
+    def _import(self, rows, fmt="ndjson", **options):
+        rejected = []
+        run = importer.Importer(
+            reject=lambda number, row, errors: rejected.append((number, errors)), **options
+        )
+        run.run(importer.read_rows(rows, fmt))
+        return run, rejected
+
+    def test_imports_a_batch_with_tags_and_search_rows(self):
+        run, rejected = self._import(
+            _ndjson(_row(), _row(author="bob", status="published"), _row(title="Leek Pie")),
+            author="alice", batch_size=2,
+        )
+        self.assertEqual((run.imported, rejected), (3, []))
+        soups = Recipe.objects.filter(title="Tomato Soup").order_by("pk")
+        self.assertEqual(
+            [(r.slug, r.author.username, r.status) for r in soups],
+            [("tomato-soup", "alice", "published"), ("tomato-soup-1", "alice", "draft"),
+             ("tomato-soup-2", "bob", "published")],
+        )
+        imported = soups[1]
+        self.assertEqual(imported.ingredients, "Tomatoes\nSalt")
+        self.assertEqual((imported.total_minutes, imported.ingredient_count), (25, 2))
+        self.assertEqual(imported.tag_list(), ["Soup", "quick"])
+        self.assertEqual(imported.image_variants, {})
+        self.assertEqual(sorted(imported.normalized_tags.values_list("slug", flat=True)),
+                         ["quick", "soup"])
+        self.assertEqual(Tag.objects.filter(slug="soup").count(), 1)
+        found = filter_recipes(Recipe.objects.all(), "leek", None)
+        self.assertEqual([r.slug for r in found], ["leek-pie"])
+
+    def test_rows_are_checked_like_the_recipe_form(self):
+        bad = _row(title="", servings="lots", prep_minutes=-1)
+        form = RecipeForm(data={
+            key: "\n".join(value) if isinstance(value, list) else value
+            for key, value in bad.items()
+        })
+        self.assertFalse(form.is_valid())
+        cleaned, errors = importer.RowValidator().clean(bad)
+        self.assertEqual(errors, form.errors)
+
+        run, rejected = self._import(
+            io.StringIO(
+                json.dumps(bad) + "\n"
+                + "not json\n"
+                + json.dumps(_row(author="nobody")) + "\n"
+                + json.dumps(_row(slug="tomato-soup", author="bob")) + "\n"
+                + json.dumps(_row(status="gone", author="bob")) + "\n"
+                + json.dumps(_row()) + "\n"
+            ),
+        )
+        self.assertEqual(run.imported, 0)
+        errors = dict(rejected)
+        self.assertEqual(sorted(errors), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(set(errors[1]), {"title", "servings", "prep_minutes", "author"})
+        self.assertEqual(errors[3], {"author": ["No user with this username."]})
+        self.assertIn("slug", errors[4])
+        self.assertEqual(list(errors[5]), ["status"])
+        self.assertEqual(errors[6], {"author": ["This field is required."]})
+
+    def test_bring_your_own_slugs_are_kept_and_not_handed_out(self):
+        run, rejected = self._import(
+            _ndjson(_row(), _row(slug="tomato-soup-1"), _row(title="Soup 2", slug="")),
+            author="alice",
+        )
+        self.assertEqual(run.imported, 3)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list("slug", flat=True)),
+            ["soup-2", "tomato-soup", "tomato-soup-1", "tomato-soup-2"],
+        )
+
+    def test_dry_run_validates_without_writing(self):
+        run, rejected = self._import(
+            _ndjson(_row(), _row(servings="lots")), author="alice", dry_run=True
+        )
+        self.assertEqual((run.imported, len(rejected)), (1, 1))
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_csv(self):
+        rows = io.StringIO(
+            "title,description,ingredients,steps,tags,prep_minutes,cook_minutes,servings,author\r\n"
+            'Leek Pie,Crisp,"Leeks\nPastry",Bake,"Pie, vegetarian",10,30,4,bob\r\n'
+        )
+        run, rejected = self._import(rows, fmt="csv")
+        self.assertEqual((run.imported, rejected), (1, []))
+        pie = Recipe.objects.get(slug="leek-pie")
+        self.assertEqual((pie.author, pie.servings, pie.status), (self.bob, 4, "draft"))
+        self.assertEqual(pie.ingredients, "Leeks\nPastry")
+
+    def test_exported_catalogue_imports_back(self):
+        lines = list(export.render(export.iter_records()))
+        Recipe.objects.all().delete()
+        run, rejected = self._import(io.StringIO("".join(lines)))
+        self.assertEqual((run.imported, rejected), (1, []))
+        soup = Recipe.objects.get()
+        self.assertEqual(
+            (soup.slug, soup.author, soup.status), ("tomato-soup", self.alice, "published")
+        )
+
+    def test_exported_catalogue_imports_into_its_own_site_with_new_slugs(self):
+        text = "".join(export.render(export.iter_records()))
+        run, rejected = self._import(io.StringIO(text))
+        self.assertEqual(run.imported, 0)
+        self.assertIn("slug", rejected[0][1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export.ndjson")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(text)
+            call_command("import_recipes", path, "--new-slugs", stdout=io.StringIO())
+        self.assertEqual(
+            list(Recipe.objects.order_by("pk").values_list("slug", "status")),
+            [("tomato-soup", "published"), ("tomato-soup-1", "published")],
+        )
+
+    def test_command_writes_rejects(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "recipes.ndjson")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(json.dumps(_row()) + "\n" + json.dumps(_row(servings="lots")) + "\n")
+            out = io.StringIO()
+            call_command("import_recipes", path, author="alice", status="published", stdout=out)
+            self.assertIn("Imported 1 recipes", out.getvalue())
+            with open(f"{path}.rejects.ndjson", encoding="utf-8") as fh:
+                rejects = [json.loads(line) for line in fh]
+        self.assertEqual(len(rejects), 1)
+        self.assertEqual(rejects[0]["row"], 2)
+        self.assertIn("servings", rejects[0]["errors"])
+        self.assertEqual(rejects[0]["data"]["servings"], "lots")
+        self.assertTrue(Recipe.objects.filter(slug="tomato-soup-1", status="published").exists())
+
+    def test_command_reads_stdin_without_closing_it(self):
+        stdin = io.StringIO(json.dumps(_row()) + "\n")
+        with tempfile.TemporaryDirectory() as tmp, mock.patch("sys.stdin", stdin):
+            call_command(
+                "import_recipes", "-", author="alice",
+                rejects=os.path.join(tmp, "rejects.ndjson"), stdout=io.StringIO(),
+            )
+        self.assertFalse(stdin.closed)
+        self.assertTrue(Recipe.objects.filter(slug="tomato-soup-1").exists())
@@ -0,0 +1,110 @@
+"""Tests for the ``migrate_media_to_cloudinary`` management command.
+
+A second local ``FileSystemStorage`` stands in for Cloudinary.
+"""
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .models import Recipe
+
+
+User = get_user_model()
+
+
+def _flaky(save):
+    """Wrap ``FileSystemStorage._save`` to fail each file's first upload, like a dropped connection."""
+    failed = set()
+
+    def _save(self, name, content):
+        if name not in failed:
+            failed.add(name)
+            raise ConnectionError("connection reset")
+        return save(self, name, content)
+
+    return _save
+
+
+class TestMigrateMedia(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.source = tempfile.mkdtemp()
+        self.target = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "done.checkpoint")
+        self.override = override_settings(MEDIA_ROOT=self.target)
+        self.override.enable()
+        alice = User.objects.create_user(username="alice", password="pass")
+        os.makedirs(os.path.join(self.source, "recipes"))
+        for i in range(5):
+            name = f"recipes/photo{i}.jpg"
+            with open(os.path.join(self.source, name), "wb") as fh:
+                fh.write(os.urandom(2048))
+            # rows point at files that only exist locally, as before a migration
+            Recipe.objects.bulk_create([Recipe(
+                author=alice, title=f"R{i}", slug=f"r{i}", description="d",
+                ingredients="x", steps="y", status="published", image=name,
+            )])
+
+    def tearDown(self):
+        self.override.disable()
+        for path in (self.source, self.target, os.path.dirname(self.checkpoint)):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _migrate(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "migrate_media_to_cloudinary", "--source-root", self.source,
+            "--checkpoint", self.checkpoint, "--backoff", "0", *args, stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_uploads_with_workers_and_records_a_checkpoint(self):
+        out, err = self._migrate("--workers", "3")
+        self.assertIn("Migrated=5 Skipped=0 Errors=0", out)
+        self.assertIn("files/s", out)
+        self.assertEqual(err, "")
+        for recipe in Recipe.objects.all():
+            with open(os.path.join(self.target, recipe.image.name), "rb") as fh:
+                with open(os.path.join(self.source, recipe.image.name), "rb") as original:
+                    self.assertEqual(fh.read(), original.read())
+        with open(self.checkpoint) as fh:
+            self.assertEqual(len(fh.readlines()), 5)
+
+    def test_rerun_resumes_from_the_checkpoint(self):
+        first = Recipe.objects.order_by("pk")[:2]
+        with open(self.checkpoint, "w") as fh:
+            fh.writelines(f"{r.pk}\t{r.image.name}\n" for r in first)
+        out, _ = self._migrate()
+        self.assertIn("Migrated=3 Skipped=2", out)
+        self.assertFalse(os.path.exists(os.path.join(self.target, first[0].image.name)))
+        out, _ = self._migrate()
+        self.assertIn("Migrated=0 Skipped=5", out)
+        out, _ = self._migrate("--force")
+        self.assertIn("Migrated=5", out)
+
+    def test_transient_errors_are_retried(self):
+        save = FileSystemStorage._save
+        with mock.patch.object(FileSystemStorage, "_save", _flaky(save)):
+            out, err = self._migrate("--workers", "2")
+        self.assertIn("Migrated=5 Skipped=0 Errors=0", out)
+        with mock.patch.object(FileSystemStorage, "_save", _flaky(save)):
+            out, err = self._migrate("--force", "--retries", "0")
+        self.assertIn("Migrated=0 Skipped=0 Errors=5", out)
+        self.assertIn("connection reset", err)
+
+    def test_missing_files_and_dry_run(self):
+        os.remove(os.path.join(self.source, "recipes", "photo0.jpg"))
+        out, _ = self._migrate("--dry-run")
+        self.assertIn("Skipping r0", out)
+        self.assertIn("Would migrate=4 Skipped=1", out)
+        self.assertFalse(os.listdir(self.target))
+        self.assertFalse(os.path.exists(self.checkpoint))
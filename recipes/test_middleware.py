@@ -0,0 +1,69 @@
+"""Tests for the request timing middleware in ``recipesite.middleware``."""
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from recipesite.middleware import RequestTimingMiddleware
+
+from .models import Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestRequestTiming(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username="alice", password="pass")
+        Recipe.objects.create(
+            author=author, title="Soup", slug="soup", description="d",
+            ingredients="Water", steps="Boil", status="published",
+        )
+
+    def _metrics(self, response):
+        metrics = {}
+        for part in response["Server-Timing"].split(", "):
+            name, *params = part.split(";")
+            metrics[name] = dict(p.split("=", 1) for p in params)
+        return metrics
+
+    def test_server_timing_reports_queries_db_template_and_total(self):
+        with self.assertNumQueries(5) as ctx:
+            response = self.client.get(reverse("recipe_list"))
+        metrics = self._metrics(response)
+        self.assertEqual(metrics["db"]["desc"], f'"{len(ctx.captured_queries)} queries"')
+        self.assertGreater(float(metrics["tpl"]["dur"]), 0)
+        self.assertGreaterEqual(float(metrics["total"]["dur"]), float(metrics["tpl"]["dur"]))
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_is_logged_with_url_name(self):
+        with self.assertLogs("recipesite.performance", "WARNING") as logs:
+            self.client.get(reverse("recipe_detail", args=["soup"]))
+        record = logs.records[0]
+        self.assertEqual(record.url_name, "recipe_detail")
+        self.assertEqual(record.status, 200)
+        self.assertIn('"url_name": "recipe_detail"', record.getMessage())
+
+    def test_fast_request_is_not_logged(self):
+        with self.assertNoLogs("recipesite.performance"):
+            self.client.get(reverse("recipe_list"))
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_disabled_middleware_adds_no_header(self):
+        response = self.client.get(reverse("recipe_list"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(ROOT_URLCONF="recipesite.urls_async")
+    async def test_async_chain_is_timed_without_a_thread_hop(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(RequestTimingMiddleware(get_response)))
+        response = await AsyncClient().get(reverse("recipe_list"))
+        metrics = self._metrics(response)
+        self.assertNotEqual(metrics["db"]["desc"], '"0 queries"')
+        self.assertGreater(float(metrics["tpl"]["dur"]), 0)
@@ -0,0 +1,170 @@
+"""Tests for the moderation queues and the batch actions in ``recipes.moderation``."""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import counters, moderation, pending, search
+from .models import Comment, Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_MODERATION_PER_PAGE=4, RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestModeration(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username="staff", password="pass", is_staff=True)
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.recipes = [
+            Recipe.objects.create(
+                author=self.alice, title=f"Soup {i}", slug=f"soup-{i}", description="d",
+                ingredients="Water", steps="Boil", status="published",
+            )
+            for i in range(3)
+        ]
+        self.spam = [
+            Comment.objects.create(
+                recipe=self.recipes[i % 3], user=self.alice, body=f"Spam {i}", approved=False
+            )
+            for i in range(9)
+        ]
+        self.drafts = [
+            Recipe.objects.create(
+                author=self.alice, title=f"Draft {i}", slug=f"draft-{i}", description="d",
+                ingredients="Flour", steps="Bake",
+            )
+            for i in range(5)
+        ]
+        self.client.login(username="staff", password="pass")
+
+    def _counts(self):
+        return pending.get_counts()
+
+    def test_queue_pages_with_fixed_query_count(self):
+        self.client.get(reverse("pending_comments"))  # warm the navbar counts
+        url, seen = reverse("pending_comments"), []
+        while url:
+            # session, user, page with recipe and user joined, and on the
+            # first page the queue's highest id
+            with self.assertNumQueries(3 if seen else 4):
+                resp = self.client.get(url)
+            seen.extend(c.body for c in resp.context["comments"])
+            url = resp.context["next_page_url"]
+            if url:
+                url = reverse("pending_comments") + url
+        self.assertEqual(seen, [f"Spam {i}" for i in reversed(range(9))])
+
+    def test_approve_comments_updates_counters_once_per_batch(self):
+        self._counts()
+        ids = [c.pk for c in self.spam]
+        # lock+read, update, counters, list generation, then the savepoint pair
+        with self.assertNumQueries(6):
+            self.assertEqual(moderation.approve_comments(ids), 9)
+        self.assertFalse(Comment.objects.filter(approved=False).exists())
+        self.assertFalse(counters.find_drift().exists())
+        for recipe in self.recipes:
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.approved_comment_count, 3)
+        self.assertEqual(self._counts()["comments"], 0)
+        # already approved rows are left alone
+        self.assertEqual(moderation.approve_comments(ids), 0)
+
+    def test_reject_comments_only_deletes_pending_ones(self):
+        self._counts()
+        visible = Comment.objects.create(recipe=self.recipes[0], user=self.alice, body="Fine")
+        ids = [c.pk for c in self.spam[:5]] + [visible.pk]
+        self.assertEqual(moderation.reject_comments(ids), 5)
+        self.assertTrue(Comment.objects.filter(pk=visible.pk).exists())
+        self.assertEqual(self._counts()["comments"], 4)
+        self.assertEqual(pending.reconcile()[pending.COMMENTS_KEY], 4)
+
+    def test_bulk_view_approves_ticked_and_all(self):
+        resp = self.client.post(reverse("bulk_moderate_comments"), {
+            "action": "approve", "ids": [self.spam[0].pk, self.spam[1].pk],
+        }, follow=True)
+        self.assertContains(resp, "2 comments approved.")
+        self.assertEqual(Comment.objects.filter(approved=False).count(), 7)
+        upto = self.client.get(reverse("pending_comments")).context["upto"]
+        late = Comment.objects.create(
+            recipe=self.recipes[0], user=self.alice, body="Posted after", approved=False
+        )
+        resp = self.client.post(
+            reverse("bulk_moderate_comments"), {"action": "reject_all", "upto": upto},
+            follow=True,
+        )
+        self.assertContains(resp, "7 comments rejected and removed.")
+        # only what was pending when the queue was opened
+        self.assertEqual(list(Comment.objects.filter(approved=False)), [late])
+        self.assertEqual(Comment.objects.count(), 3)
+        resp = self.client.post(
+            reverse("bulk_moderate_comments"), {"action": "reject_all"}, follow=True
+        )
+        self.assertContains(resp, "Reload the comment queue and try again.")
+        self.assertTrue(Comment.objects.filter(pk=late.pk).exists())
+
+    def test_later_pages_keep_the_first_page_limit(self):
+        # the newest id, but dated before everything else: on the last page
+        backdated = Comment.objects.create(
+            recipe=self.recipes[0], user=self.alice, body="Backdated", approved=False
+        )
+        Comment.objects.filter(pk=backdated.pk).update(
+            created_at=self.spam[0].created_at - timedelta(days=1)
+        )
+        first = self.client.get(reverse("pending_comments"))
+        self.assertNotIn(backdated, first.context["comments"])
+        self.assertEqual(first.context["upto"], backdated.pk)
+        late = Comment.objects.create(
+            recipe=self.recipes[0], user=self.alice, body="Posted after", approved=False
+        )
+        url, pages = first.context["next_page_url"], 1
+        while url:
+            page = self.client.get(reverse("pending_comments") + url)
+            self.assertEqual(page.context["upto"], backdated.pk)
+            url, pages = page.context["next_page_url"], pages + 1
+        self.assertEqual(pages, 3)
+
+        resp = self.client.post(
+            reverse("bulk_moderate_comments"),
+            {"action": "approve_all", "upto": first.context["upto"]}, follow=True,
+        )
+        self.assertContains(resp, "10 comments approved.")
+        self.assertEqual(list(Comment.objects.filter(approved=False)), [late])
+
+    def test_bulk_view_requires_a_selection_and_staff(self):
+        resp = self.client.post(
+            reverse("bulk_moderate_comments"), {"action": "approve"}, follow=True
+        )
+        self.assertContains(resp, "Select at least one comment first.")
+        self.client.login(username="alice", password="pass")
+        self.client.post(
+            reverse("bulk_moderate_comments"), {"action": "approve_all", "upto": self.spam[-1].pk}
+        )
+        self.assertEqual(Comment.objects.filter(approved=False).count(), 9)
+
+    def test_approve_and_reject_recipes(self):
+        self._counts()
+        self.assertEqual(moderation.approve_recipes([d.pk for d in self.drafts[:2]]), 2)
+        self.assertEqual(Recipe.objects.filter(status="draft").count(), 3)
+        self.assertEqual(self._counts()["recipes"], 3)
+
+        Comment.objects.create(recipe=self.drafts[4], user=self.alice, body="Hm", approved=False)
+        resp = self.client.post(
+            reverse("bulk_moderate_recipes"),
+            {"action": "reject_all", "upto": self.drafts[-1].pk}, follow=True,
+        )
+        self.assertContains(resp, "3 recipes rejected and removed.")
+        self.assertFalse(Recipe.objects.filter(status="draft").exists())
+        self.assertEqual(self._counts(), {"recipes": 0, "comments": 9})
+        self.assertEqual(pending.reconcile()[pending.COMMENTS_KEY], 9)
+        if search.backend() == "fts5":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {search.FTS_TABLE} WHERE rowid = %s", [self.drafts[4].pk]
+                )
+                self.assertEqual(cursor.fetchone()[0], 0)
@@ -0,0 +1,96 @@
+"""Tests for keyset (cursor) pagination of the recipe list."""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Recipe
+from .pagination import CursorPaginator, InvalidCursor
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_LIST_PAGINATION="cursor", RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestCursorPagination(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="alice", password="pass")
+        now = timezone.now()
+        for i in range(20):
+            r = Recipe.objects.create(
+                author=user, title=f"Cake {i}", slug=f"cake-{i}", description="d",
+                ingredients="flour", steps="bake", tags="sweet" if i % 2 else "savory",
+                status="published",
+            )
+            # pairs of recipes share a timestamp to exercise the id tie-breaker
+            Recipe.objects.filter(pk=r.pk).update(created_at=now - timedelta(minutes=i // 2))
+
+    def setUp(self):
+        cache.clear()
+
+    def _walk(self, params):
+        seen, url, pages = [], reverse("recipe_list"), 0
+        query = dict(params)
+        while True:
+            resp = self.client.get(url, query)
+            self.assertEqual(resp.status_code, 200)
+            seen += [r.slug for r in resp.context["recipes"]]
+            pages += 1
+            next_url = resp.context.get("next_page_url")
+            if not next_url:
+                return seen, pages, resp
+            query = {}
+            url = reverse("recipe_list") + next_url
+
+    def test_walks_every_row_once_in_order_without_count(self):
+        expected = list(
+            Recipe.objects.order_by("-created_at", "-id").values_list("slug", flat=True)
+        )
+        seen, pages, _ = self._walk({})
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+        # list generation + page + tags prefetch + facets; no COUNT(*)
+        with self.assertNumQueries(4):
+            self.client.get(reverse("recipe_list"))
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse("recipe_list"))
+        second = self.client.get(reverse("recipe_list") + first.context["next_page_url"])
+        back = self.client.get(reverse("recipe_list") + second.context["previous_page_url"])
+        self.assertEqual(
+            [r.pk for r in back.context["recipes"]], [r.pk for r in first.context["recipes"]]
+        )
+        self.assertNotIn("previous_page_url", back.context)
+
+    def test_filters_are_kept_across_pages(self):
+        seen, _, _ = self._walk({"tag": "sweet"})
+        self.assertEqual(len(seen), 10)
+        seen, _, _ = self._walk({"q": "cake"})
+        self.assertEqual(len(set(seen)), 20)
+
+    def test_tampered_cursor_is_404(self):
+        resp = self.client.get(reverse("recipe_list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 404)
+        paginator = CursorPaginator(Recipe.objects.all(), 9)
+        with self.assertRaises(InvalidCursor):
+            paginator.decode_cursor(paginator.encode_cursor(Recipe.objects.first()) + "x")
+
+
+class TestOffsetPaginationLinks(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_page_links_keep_filters(self):
+        user = User.objects.create_user(username="bob", password="pass")
+        for i in range(10):
+            Recipe.objects.create(
+                author=user, title=f"Pie {i}", slug=f"pie-{i}", description="d",
+                ingredients="i", steps="s", tags="pie", status="published",
+            )
+        resp = self.client.get(reverse("recipe_list"), {"tag": "pie"})
+        self.assertEqual(resp.context["next_page_url"], "?tag=pie&page=2")
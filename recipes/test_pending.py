@@ -0,0 +1,100 @@
+"""Tests for the cached moderation counts behind the staff navbar."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from . import pending
+from .context_processors import pending_counts
+from .models import Comment, Recipe
+
+
+User = get_user_model()
+
+
+class TestPendingCounts(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username="staff", password="pass", is_staff=True)
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.alice, title="Soup", slug="soup", description="d",
+            ingredients="Water", steps="Boil", status="published",
+        )
+
+    def _render_counts(self):
+        request = RequestFactory().get("/")
+        request.user = self.staff
+        return pending_counts(request)
+
+    def _assert_cached_counts(self, recipes, comments):
+        self.assertEqual(pending.get_counts(), {"recipes": recipes, "comments": comments})
+        # the cached values must also agree with a fresh count
+        self.assertEqual(
+            pending.reconcile(),
+            {pending.RECIPES_KEY: recipes, pending.COMMENTS_KEY: comments},
+        )
+
+    def test_staff_render_runs_no_queries_once_warm(self):
+        self._render_counts()
+        with self.assertNumQueries(0):
+            counts = self._render_counts()
+        self.assertEqual(counts, {"pending_recipes_count": 0, "pending_comments_count": 0})
+
+    def test_non_staff_get_zero(self):
+        request = RequestFactory().get("/")
+        request.user = self.alice
+        with self.assertNumQueries(0):
+            self.assertEqual(pending_counts(request)["pending_recipes_count"], 0)
+
+    def test_recipe_draft_transitions(self):
+        pending.get_counts()  # warm the cache
+        draft = Recipe.objects.create(
+            author=self.alice, title="Stew", slug="stew", description="d",
+            ingredients="Beef", steps="Simmer",
+        )
+        self._assert_cached_counts(1, 0)
+        draft.status = "published"
+        draft.save()
+        self._assert_cached_counts(0, 0)
+        draft.status = "draft"
+        draft.save()
+        self._assert_cached_counts(1, 0)
+        draft.title = "Beef stew"
+        draft.save()
+        self._assert_cached_counts(1, 0)
+        draft.delete()
+        self._assert_cached_counts(0, 0)
+
+    def test_comment_approval_flips(self):
+        pending.get_counts()
+        comment = Comment.objects.create(
+            recipe=self.recipe, user=self.alice, body="Nice", approved=False
+        )
+        self._assert_cached_counts(0, 1)
+        comment.approved = True
+        comment.save()
+        self._assert_cached_counts(0, 0)
+        comment.approved = False
+        comment.save()
+        self._assert_cached_counts(0, 1)
+        comment.delete()
+        self._assert_cached_counts(0, 0)
+
+    def test_recipe_delete_drops_its_pending_comments(self):
+        Comment.objects.create(
+            recipe=self.recipe, user=self.alice, body="Nice", approved=False
+        )
+        pending.get_counts()
+        self.recipe.delete()
+        self._assert_cached_counts(0, 0)
+
+    def test_expired_counts_are_reconciled(self):
+        pending.get_counts()
+        # bypasses signals, so the cached count drifts until it is recounted
+        Comment.objects.bulk_create(
+            [Comment(recipe=self.recipe, user=self.alice, body="x", approved=False)]
+        )
+        self.assertEqual(pending.get_counts()["comments"], 0)
+        pending.forget()
+        self.assertEqual(pending.get_counts()["comments"], 1)
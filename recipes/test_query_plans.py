@@ -0,0 +1,46 @@
+"""Query-plan regression tests: the hot queries must be served by indexes."""
+
+from django.db import connection
+from django.test import TestCase
+
+from . import query_plans
+
+
+class TestQueryPlans(TestCase):
+    def test_hot_queries_neither_scan_nor_sort_whole_tables(self):
+        self.assertEqual(query_plans.check(small_tables=True), {})
+
+    def test_a_dropped_index_is_caught(self):
+        with connection.cursor() as cursor:
+            # DDL is transactional on SQLite and PostgreSQL: undone with the test
+            cursor.execute("DROP INDEX recipe_status_created_idx")
+        report = query_plans.check(small_tables=True)
+        self.assertIn("recipe_list", report)
+        self.assertIn("pending_recipes", report)
+        self.assertNotIn("recipe_comments", report)
+
+    def test_problems_reads_sqlite_and_postgres_plans(self):
+        sqlite_plan = [
+            "5 0 0 SCAN recipes_recipe",
+            "9 0 0 SEARCH auth_user USING INTEGER PRIMARY KEY (rowid=?)",
+            "12 0 0 SCAN recipes_comment USING INDEX comment_pending_idx",
+            "52 0 0 USE TEMP B-TREE FOR ORDER BY",
+        ]
+        self.assertEqual(query_plans.problems(sqlite_plan, "sqlite"), [
+            "scan: 5 0 0 SCAN recipes_recipe",
+            "sort: 52 0 0 USE TEMP B-TREE FOR ORDER BY",
+        ])
+        self.assertEqual(
+            query_plans.problems(sqlite_plan, "sqlite", allow={"scan", "sort"}), []
+        )
+        postgres_plan = [
+            "Limit  (cost=10.1..10.2 rows=10 width=8)",
+            "  ->  Sort  (cost=10.1..10.5 rows=150 width=8)",
+            "        Sort Key: created_at DESC, id DESC",
+            "        ->  Seq Scan on recipes_recipe  (cost=0.0..7.0 rows=150 width=8)",
+            "              Filter: ((status)::text = 'published'::text)",
+        ]
+        self.assertEqual(
+            [problem.split(":")[0] for problem in query_plans.problems(postgres_plan, "postgresql")],
+            ["sort", "scan"],
+        )
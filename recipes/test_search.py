@@ -0,0 +1,70 @@
+"""Tests for the full-text search index behind the recipe list ``?q=``."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import search
+from .models import Recipe
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestRecipeSearch(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.soup = self._recipe(
+            "Tomato Soup", ingredients="Tomatoes\nSalt", steps="Boil\nBlend"
+        )
+        self.salad = self._recipe(
+            "Green Salad", ingredients="Lettuce\nTomato", steps="Chop\nToss"
+        )
+        self.pasta = self._recipe(
+            "Pasta Bake", ingredients="Pasta\nCheese", steps="Serve with tomato"
+        )
+
+    def _recipe(self, title, **kwargs):
+        defaults = {"description": "Tasty", "status": "published"}
+        defaults.update(kwargs)
+        return Recipe.objects.create(
+            author=self.user, title=title, slug=title.lower().replace(" ", "-"), **defaults
+        )
+
+    def _search(self, q):
+        resp = self.client.get(reverse("recipe_list"), {"q": q})
+        self.assertEqual(resp.status_code, 200)
+        return [r.slug for r in resp.context["recipes"]]
+
+    def test_ranks_title_above_ingredients_above_steps(self):
+        self.assertEqual(self._search("tomato"), ["tomato-soup", "green-salad", "pasta-bake"])
+
+    def test_all_words_must_match_as_prefixes(self):
+        self.assertEqual(self._search("past chee"), ["pasta-bake"])
+        self.assertEqual(self._search("pasta lettuce"), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.soup.title = "Leek Soup"
+        self.soup.save()
+        self.assertIn("tomato-soup", self._search("leek"))
+        self.salad.delete()
+        self.assertNotIn("green-salad", self._search("lettuce"))
+
+    def test_punctuation_only_query_falls_back(self):
+        self.assertEqual(self._search("!!!"), [])
+
+    def test_rebuild_command_restores_index(self):
+        if search.backend() != "fts5":
+            self.skipTest("FTS5 index only")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.FTS_TABLE}")
+        self.assertEqual(self._search("tomato"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self._search("tomato")), 3)
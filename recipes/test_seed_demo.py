@@ -0,0 +1,43 @@
+"""Tests for the bulk mode of the ``seed_demo`` management command."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from . import counters
+from .models import Comment, Rating, Recipe, RecipeTag
+
+
+class TestBulkSeedDemo(TestCase):
+    def _seed(self, **options):
+        options = {
+            "users": 6, "recipes": 25, "comments_per_recipe": 2, "ratings_per_recipe": 4,
+            "seed": 7, "batch_size": 10, **options,
+        }
+        call_command("seed_demo", stdout=StringIO(), **options)
+
+    def test_generates_requested_rows_with_consistent_counters(self):
+        self._seed()
+        self.assertEqual(Recipe.objects.count(), 25)
+        self.assertEqual(Rating.objects.count(), 25 * 4)
+        self.assertEqual(Comment.objects.count(), 25 * 2)
+        self.assertFalse(counters.find_drift().exists())
+        self.assertEqual(
+            RecipeTag.objects.values("recipe").distinct().count(), Recipe.objects.count()
+        )
+
+    def test_same_seed_is_deterministic_and_rerun_skips_existing(self):
+        self._seed()
+        first = list(Recipe.objects.order_by("slug").values_list("slug", "title", "rating_sum"))
+        self._seed()
+        self.assertEqual(Recipe.objects.count(), 25)
+        self.assertEqual(Rating.objects.count(), 25 * 4)
+        Recipe.objects.all().delete()
+        self._seed()
+        again = list(Recipe.objects.order_by("slug").values_list("slug", "title", "rating_sum"))
+        self.assertEqual(first, again)
+
+    def test_ratings_are_capped_at_the_number_of_users(self):
+        self._seed(users=3, recipes=5, ratings_per_recipe=10)
+        self.assertEqual(Rating.objects.count(), 5 * 3)
@@ -0,0 +1,107 @@
+"""Tests for unique slug allocation in ``recipes.slugs``."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from . import slugs
+from .models import Recipe
+
+
+User = get_user_model()
+
+
+class TestSlugAllocation(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="pass")
+
+    def _recipe(self, slug, title="Banana Bread"):
+        return Recipe.objects.create(
+            author=self.alice, title=title, slug=slug, description="d",
+            ingredients="Bananas", steps="Bake",
+        )
+
+    def test_first_free_suffix_in_one_query(self):
+        for slug in ["banana-bread", "banana-bread-1", "banana-bread-2", "banana-bread-4",
+                     "banana-bread-muffins", "banana-breadx"]:
+            self._recipe(slug)
+        with self.assertNumQueries(1):
+            self.assertEqual(slugs.unique_slug("Banana Bread"), "banana-bread-3")
+        self.assertEqual(slugs.unique_slug("Banana Muffins"), "banana-muffins")
+        self.assertEqual(slugs.unique_slug("!!!"), "recipe")
+
+    def test_prefix_match_does_not_depend_on_collation(self):
+        for slug in ["banana-bread", "banana-bread-2", "banana-bread-x-7", "banana-breads-1"]:
+            self._recipe(slug)
+        # PostgreSQL's locale collations ignore "-" when sorting, so a range
+        # on the slug is only used where text sorts bytewise (SQLite)
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            self.assertEqual(slugs.taken_suffixes("banana-bread"), {0, 2})
+        self.assertEqual(slugs.taken_suffixes("banana-bread"), {0, 2})
+
+    def test_long_titles_leave_room_for_a_suffix(self):
+        slug = slugs.unique_slug("x" * 500)
+        self.assertLessEqual(len(slug) + len("-123456789"), slugs.SLUG_MAX_LENGTH)
+
+    def test_save_retries_when_a_concurrent_writer_takes_the_slug(self):
+        recipe = Recipe(
+            author=self.alice, title="Banana Bread", description="d",
+            ingredients="Bananas", steps="Bake",
+        )
+        real = slugs.unique_slug
+        calls = []
+
+        def racing_unique_slug(title, queryset=None):
+            slug = real(title, queryset)
+            if not calls:
+                self._recipe(slug)  # another request inserts it first
+            calls.append(slug)
+            return slug
+
+        with mock.patch.object(slugs, "unique_slug", side_effect=racing_unique_slug):
+            slugs.save_with_unique_slug(recipe)
+        self.assertEqual(calls, ["banana-bread", "banana-bread-1"])
+        self.assertEqual(recipe.slug, "banana-bread-1")
+        self.assertEqual(Recipe.objects.filter(title="Banana Bread").count(), 2)
+
+    def test_allocator_remembers_what_it_handed_out(self):
+        self._recipe("soup")
+        allocator = slugs.SlugAllocator()
+        self.assertTrue(allocator.reserve("stew-2"))
+        self.assertFalse(allocator.reserve("soup"))
+        # "soup" was looked up by reserve(); nothing more to ask the database
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [allocator.allocate("Soup"), allocator.allocate("soup"), allocator.allocate("Soup!")],
+                ["soup-1", "soup-2", "soup-3"],
+            )
+        self.assertEqual(
+            [allocator.allocate("Stew"), allocator.allocate("Stew"), allocator.allocate("Stew")],
+            ["stew", "stew-1", "stew-3"],
+        )
+
+    def test_prefetching_allocator_never_queries_again(self):
+        for slug in ["soup", "soup-1", "soup-2"]:
+            self._recipe(slug)
+        allocator = slugs.SlugAllocator(prefetch=True)
+        with self.assertNumQueries(0):
+            self.assertFalse(allocator.reserve("soup-1"))
+            self.assertEqual(allocator.allocate("Stew 4"), "stew-4")
+            # the third Stew must not reuse "stew-4", taken as a bare base above
+            self.assertEqual(
+                [allocator.allocate("Stew") for _ in range(6)],
+                ["stew", "stew-1", "stew-2", "stew-3", "stew-5", "stew-6"],
+            )
+            self.assertEqual(allocator.allocate("Soup"), "soup-3")
+
+    def test_recipe_create_view_allocates_a_suffix(self):
+        self._recipe("banana-bread")
+        self.client.login(username="alice", password="pass")
+        response = self.client.post(reverse("recipe_create"), {
+            "title": "Banana Bread", "description": "d", "ingredients": "Bananas",
+            "steps": "Bake", "prep_minutes": 1, "cook_minutes": 1, "servings": 1,
+        })
+        self.assertRedirects(response, reverse("recipe_detail", args=["banana-bread-1"]))
@@ -0,0 +1,116 @@
+"""Tests for the normalized ``Tag`` model and the ``?tag=`` filter."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import importer
+from .forms import RecipeForm
+from .models import Recipe, Tag
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestTags(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+
+    def _recipe(self, slug, tags):
+        return Recipe.objects.create(
+            author=self.user, title=slug, slug=slug, description="d",
+            ingredients="i", steps="s", tags=tags, status="published",
+        )
+
+    def test_save_syncs_normalized_tags(self):
+        r = self._recipe("pie", "Pie,  Sweet Things , pie,")
+        self.assertEqual(sorted(Tag.objects.values_list("slug", flat=True)), ["pie", "sweet-things"])
+        self.assertEqual(r.tag_list(), ["Pie", "Sweet Things"])
+        r.tags = "sweet things"
+        r.save()
+        self.assertEqual(list(r.normalized_tags.values_list("slug", flat=True)), ["sweet-things"])
+
+    def test_tag_filter_is_exact_not_substring(self):
+        self._recipe("apple-pie", "pie")
+        self._recipe("croissant", "pastries")
+        resp = self.client.get(reverse("recipe_list"), {"tag": "pie"})
+        self.assertEqual([r.slug for r in resp.context["recipes"]], ["apple-pie"])
+
+    def test_facets_count_filtered_results(self):
+        self._recipe("a", "pie, sweet")
+        self._recipe("b", "sweet")
+        self._recipe("c", "savory")
+        resp = self.client.get(reverse("recipe_list"), {"tag": "sweet"})
+        facets = {t.slug: t.recipe_count for t in resp.context["tag_facets"]}
+        self.assertEqual(facets, {"sweet": 2, "pie": 1})
+
+    @override_settings(RECIPE_PAGE_CACHE_TIMEOUT=300)
+    def test_facets_are_cached_per_filter_until_the_list_changes(self):
+        self._recipe("a", "pie, sweet")
+        self._recipe("b", "sweet")
+        url = reverse("recipe_list")
+        self.client.get(url, {"tag": "sweet"})
+        # list generation + count + page + tags prefetch; facets cached
+        with self.assertNumQueries(4):
+            resp = self.client.get(url, {"tag": "Sweet", "sort": "quickest"})
+        facets = {t.slug: t.recipe_count for t in resp.context["tag_facets"]}
+        self.assertEqual(facets, {"sweet": 2, "pie": 1})
+        resp = self.client.get(url, {"tag": "pie", "sort": "quickest"})
+        self.assertEqual({t.slug for t in resp.context["tag_facets"]}, {"sweet", "pie"})
+
+        self._recipe("c", "sweet")  # publishing purges the list pages
+        resp = self.client.get(url, {"tag": "sweet", "sort": "top"})
+        facets = {t.slug: t.recipe_count for t in resp.context["tag_facets"]}
+        self.assertEqual(facets, {"sweet": 3, "pie": 1})
+
+    @override_settings(RECIPE_PAGE_CACHE_TIMEOUT=300)
+    def test_renaming_or_deleting_a_tag_moves_the_list_pages_on(self):
+        self._recipe("pie", "Pie")
+        draft = Tag.objects.create(name="Draft only", slug="draft-only")
+        url = reverse("recipe_list")
+        first = self.client.get(url)
+        draft.name = "Still draft"
+        draft.save()  # on no published recipe
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "HIT")
+
+        tag = Tag.objects.get(slug="pie")
+        tag.name = "Pies"
+        tag.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual((response.status_code, response["X-Page-Cache"]), (200, "MISS"))
+        self.assertContains(response, ">Pies<")
+
+        tag.delete()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertNotContains(response, ">Pies<")
+
+    def test_form_accepts_comma_separated_tags(self):
+        form = RecipeForm({
+            "title": "Cake", "description": "d", "ingredients": "i", "steps": "s",
+            "tags": " Dessert,dessert ,  Easy  Bake", "prep_minutes": 1,
+            "cook_minutes": 1, "servings": 1,
+        })
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["tags"], "Dessert, Easy Bake")
+
+    def test_tags_longer_than_a_tag_row_are_refused(self):
+        long_tag = "x" * 61
+        data = {
+            "title": "Cake", "description": "d", "ingredients": "i", "steps": "s",
+            "tags": f"Dessert, {long_tag}", "prep_minutes": 1, "cook_minutes": 1,
+            "servings": 1,
+        }
+        self.assertTrue(RecipeForm({**data, "tags": "Dessert, " + "x" * 60}).is_valid())
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("recipe_create"), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("tags", response.context["form"].errors)
+        self.assertFalse(Recipe.objects.exists())
+
+        _, errors = importer.RowValidator().clean({**data, "tags": [long_tag]})
+        self.assertIn("tags", errors)
+        self.assertFalse(Tag.objects.exists())
@@ -1,6 +1,7 @@
 """View tests (GET and POST) adapted from the bootcamp walkthrough."""
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -62,3 +63,125 @@ class TestRecipeViews(TestCase):
         self.client.login(username="staff", password="pass")
         resp2 = self.client.get(reverse("pending_recipes"))
         self.assertEqual(resp2.status_code, 200)
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestRecipeDetailQueries(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.user, title="Soup", slug="soup", description="Warm soup",
+            ingredients="Water", steps="Boil", status="published",
+        )
+        Rating.objects.create(recipe=self.recipe, user=self.user, stars=4)
+
+    def _add_comments(self, n):
+        start = Comment.objects.count()
+        for i in range(start, start + n):
+            commenter = User.objects.create_user(username=f"commenter{i}", password="pass")
+            Comment.objects.create(recipe=self.recipe, user=commenter, body=f"Comment {i}")
+
+    def _get(self):
+        cache.clear()  # measure the cold path, not cached fragments
+        return self.client.get(reverse("recipe_detail", args=[self.recipe.slug]))
+
+    def test_anonymous_query_count_does_not_grow_with_comments(self):
+        self._add_comments(2)
+        # recipe with author, comments with their authors
+        with self.assertNumQueries(2):
+            self._get()
+        self._add_comments(10)
+        with self.assertNumQueries(2):
+            resp = self._get()
+        self.assertContains(resp, "commenter11")
+
+    def test_logged_in_query_count_includes_own_rating(self):
+        self._add_comments(10)
+        self.client.login(username="alice", password="pass")
+        # session, user, recipe with author and own stars, comments with authors
+        with self.assertNumQueries(4):
+            resp = self._get()
+        self.assertEqual(resp.context["user_stars"], 4)
+        self.assertContains(resp, 'value="4" checked')
+
+
+@override_settings(RECIPE_PAGE_CACHE_TIMEOUT=0)
+class TestListSorts(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="alice", password="pass")
+        for i in range(12):
+            kind = "Soup" if i % 2 else "Salad"
+            recipe = Recipe.objects.create(
+                author=user, title=f"{kind} {i}", slug=f"{kind.lower()}-{i}", description="d",
+                # ties on every key, to exercise the id tie-breaker
+                ingredients="\n".join(["Salt", "", *[f"Item {n}" for n in range(i % 4)]]),
+                steps="s", tags=kind, prep_minutes=5 * (i % 3), cook_minutes=10 * (i % 2),
+                status="published",
+            )
+            for _ in range(i % 3):
+                Comment.objects.create(recipe=recipe, user=user, body="Nice", approved=True)
+        Recipe.objects.create(
+            author=user, title="Soup draft", slug="soup-draft", description="d",
+            ingredients="i", steps="s", tags="Soup", status="draft",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _expected(self, key, kind=None):
+        recipes = Recipe.objects.filter(status="published")
+        if kind:
+            recipes = recipes.filter(title__startswith=kind)
+        return [r.slug for r in sorted(recipes, key=lambda r: (key(r), -r.pk))]
+
+    def _walk(self, params):
+        seen, url, query = [], reverse("recipe_list"), dict(params)
+        while True:
+            resp = self.client.get(url, query)
+            seen += [r.slug for r in resp.context["recipes"]]
+            if not resp.context.get("next_page_url"):
+                return seen
+            url, query = reverse("recipe_list") + resp.context["next_page_url"], {}
+
+    def test_sort_columns_follow_saves(self):
+        recipe = Recipe.objects.get(slug="soup-3")
+        self.assertEqual((recipe.total_minutes, recipe.ingredient_count), (10, 4))
+        recipe.cook_minutes, recipe.ingredients = 30, "Water"
+        recipe.save(update_fields=["cook_minutes", "ingredients"])
+        recipe = Recipe.objects.get(slug="soup-3")
+        self.assertEqual((recipe.total_minutes, recipe.ingredient_count), (30, 1))
+
+    def test_each_sort_pages_through_in_order_with_filters(self):
+        keys = {
+            "most_commented": lambda r: -r.approved_comment_count,
+            "quickest": lambda r: r.total_minutes,
+            "fewest_ingredients": lambda r: r.ingredient_count,
+        }
+        for pagination in ["offset", "cursor"]:
+            with self.settings(RECIPE_LIST_PAGINATION=pagination):
+                for sort, key in keys.items():
+                    with self.subTest(sort=sort, pagination=pagination):
+                        self.assertEqual(self._walk({"sort": sort}), self._expected(key))
+                        self.assertEqual(
+                            self._walk({"sort": sort, "tag": "soup"}), self._expected(key, "Soup")
+                        )
+                        self.assertEqual(
+                            self._walk({"sort": sort, "q": "salad"}), self._expected(key, "Salad")
+                        )
+
+    def test_sort_links_and_api(self):
+        response = self.client.get(reverse("recipe_list"), {"sort": "quickest", "tag": "soup"})
+        self.assertIn(
+            ("Fewest ingredients", "?tag=soup&sort=fewest_ingredients", False),
+            response.context["sort_links"],
+        )
+        self.assertIn(("Quickest", "?tag=soup&sort=quickest", True), response.context["sort_links"])
+        response = self.client.get(
+            reverse("api_recipe_list"), {"sort": "quickest", "fields": "slug", "limit": 5}
+        )
+        self.assertEqual(
+            [row["slug"] for row in response.json()["results"]],
+            self._expected(lambda r: r.total_minutes)[:5],
+        )
@@ -1,6 +1,6 @@
 """URL routes for recipes app."""
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.RecipeListView.as_view(), name="recipe_list"),
@@ -8,12 +8,21 @@ urlpatterns = [
     path("recipe/<slug:slug>/edit/", views.recipe_edit, name="recipe_edit"),
     path("recipe/<slug:slug>/delete/", views.recipe_delete, name="recipe_delete"),
     path("recipe/<slug:slug>/", views.recipe_detail, name="recipe_detail"),
+    path("recipe/<slug:slug>/comments/", views.recipe_comments, name="recipe_comments"),
     path("comment/<int:pk>/edit/", views.comment_edit, name="comment_edit"),
     path("comment/<int:pk>/delete/", views.comment_delete, name="comment_delete"),
+    # Read-only JSON API
+    path("api/recipes/", api.recipe_list, name="api_recipe_list"),
+    path("api/recipes/<slug:slug>/", api.recipe_detail, name="api_recipe_detail"),
+    path("api/recipes/<slug:slug>/comments/", api.recipe_comments, name="api_recipe_comments"),
+    path("api/recipes/<slug:slug>/ratings/", api.recipe_ratings, name="api_recipe_ratings"),
     path("accounts/signup/", views.signup_view, name="signup"),
     # Staff approval routes
     path("staff/pending/recipes/", views.pending_recipes, name="pending_recipes"),
     path("staff/pending/comments/", views.pending_comments, name="pending_comments"),
+    path("staff/pending/recipes/bulk/", views.bulk_moderate_recipes, name="bulk_moderate_recipes"),
+    path("staff/pending/comments/bulk/", views.bulk_moderate_comments, name="bulk_moderate_comments"),
+    path("staff/export/recipes/", views.export_recipes, name="export_recipes"),
     path("staff/recipe/<slug:slug>/approve/", views.approve_recipe, name="approve_recipe"),
     path("staff/recipe/<slug:slug>/reject/", views.reject_recipe, name="reject_recipe"),
     path("staff/comment/<int:pk>/approve/", views.approve_comment, name="approve_comment"),
@@ -1,59 +1,331 @@
 """List & detail views for recipes."""
 
-from django.http import HttpResponse
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse,
+)
 from django.db import models
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
+from django.utils.decorators import method_decorator
+from django.utils.cache import patch_vary_headers
 from django.views.generic import ListView
-from .models import Recipe, Rating
+from .models import Recipe, Rating, Tag
 from .models import Comment
 from .forms import CommentForm
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
+from django.template.defaultfilters import pluralize
 from django.utils.text import slugify
 from django.urls import reverse
 from django.views.generic.edit import CreateView
 from .forms import RecipeForm
+from . import caching, conditional, export, moderation, pending, search, slugs
+from .pagination import CursorPage, CursorPaginator, InvalidCursor
 
 # Create your views here.
 
 
-class RecipeListView(ListView):
-    """Paginated list of published recipes with optional search/tag filter."""
+LIST_QUERY_PARAMS = ("q", "tag", "sort", "page", "cursor")
+
+# ?sort= choices: label and ordering, each served by a (status, ..., id)
+# index (see Recipe.Meta).  Without ?sort= the list is newest first, or
+# best match first for ?q=.
+LIST_SORTS = {
+    "newest": ("Newest", ("-created_at", "-id")),
+    "top": ("Top rated", ("-top_score", "-id")),
+    "most_commented": ("Most commented", ("-approved_comment_count", "-id")),
+    "quickest": ("Quickest", ("total_minutes", "-id")),
+    "fewest_ingredients": ("Fewest ingredients", ("ingredient_count", "-id")),
+}
+
+# Tag facets depend only on ?q= and ?tag=, so they are cached per list
+# generation and filter for as long as a list page may be.
+FACETS_KEY_PREFIX = "recipes:facets"
+
+
+def filter_recipes(queryset, q=None, tag=None, sort=None):
+    """Apply the list's ``?q=`` search, ``?tag=`` filter and ``?sort=`` order to ``queryset``."""
+    if q:
+        # indexed full-text search, best matches first
+        queryset = search.search(queryset, q).order_by("-search_rank", "-created_at")
+    if tag:
+        # exact match on the normalized slug (indexed join, no substring hits)
+        queryset = queryset.filter(normalized_tags__slug=slugify(tag))
+    if sort in LIST_SORTS:
+        queryset = queryset.order_by(*LIST_SORTS[sort][1])
+    return queryset
+
+
+class RecipeListBase(ListView):
+    """Paginated list of published recipes with optional search/tag filter.
+
+    Pagination is offset-based (``?page=``) unless
+    ``settings.RECIPE_LIST_PAGINATION == "cursor"``, in which case pages are
+    addressed by signed keyset cursors (``?cursor=``) and no count is run.
+    """
     model = Recipe
     template_name = "recipes/recipe_list.html"
     context_object_name = "recipes"
     paginate_by = 9
 
+    @property
+    def pagination_mode(self) -> str:
+        """``"offset"`` or ``"cursor"``, read per request so tests can override it."""
+        return getattr(settings, "RECIPE_LIST_PAGINATION", "offset")
+
     def get_queryset(self):
         """Return queryset filtered by ?q= and ?tag=."""
-        qs = Recipe.objects.filter(status="published")
-        q = self.request.GET.get("q")
-        tag = self.request.GET.get("tag")
-        if q:
-            qs = qs.filter(
-                models.Q(title__icontains=q)
-                | models.Q(description__icontains=q)
-                | models.Q(ingredients__icontains=q)
-                | models.Q(steps__icontains=q)
-            )
-        if tag:
-            qs = qs.filter(tags__icontains=tag)
-        return qs
+        qs = (
+            Recipe.objects.filter(status="published")
+            .select_related("author")
+            .prefetch_related("normalized_tags")
+        )
+        get = self.request.GET.get
+        return filter_recipes(qs, get("q"), get("tag"), get("sort"))
+
+    def _cursor_paginator(self, queryset, page_size):
+        if not queryset.query.order_by:
+            queryset = queryset.order_by("-created_at", "-id")
+        return CursorPaginator(queryset, page_size)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Seek on the ordering keys in cursor mode; defer to ``ListView`` otherwise."""
+        if self.pagination_mode != "cursor":
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self._cursor_paginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def _page_url(self, **params) -> str:
+        """Current query string without its page/cursor, with ``params`` replaced."""
+        query = self.request.GET.copy()
+        for name in ("page", "cursor", *params):
+            query.pop(name, None)
+        query.update(params)
+        return "?" + query.urlencode()
+
+    def _page_links(self, page) -> dict:
+        links = {}
+        if isinstance(page, CursorPage):
+            if page.has_previous():
+                links["previous_page_url"] = self._page_url(cursor=page.previous_cursor)
+            if page.has_next():
+                links["next_page_url"] = self._page_url(cursor=page.next_cursor)
+        elif page is not None:
+            if page.has_previous():
+                links["previous_page_url"] = self._page_url(page=page.previous_page_number())
+            if page.has_next():
+                links["next_page_url"] = self._page_url(page=page.next_page_number())
+        return links
+
+    def _sort_links(self) -> list[tuple[str, str, bool]]:
+        """``(label, url, active)`` for each ``?sort=`` choice."""
+        sort = self.request.GET.get("sort")
+        if sort not in LIST_SORTS:
+            sort = None if self.request.GET.get("q") else "newest"
+        return [
+            (label, self._page_url(sort=value), value == sort)
+            for value, (label, _) in LIST_SORTS.items()
+        ]
+
+    def _facets_key(self) -> str:
+        get = self.request.GET.get
+        filters = urlencode({"q": get("q") or "", "tag": slugify(get("tag") or "")})
+        return f"{FACETS_KEY_PREFIX}:{caching.list_generation(self.request)}:{filters}"
+
+    def _facets_queryset(self):
+        return (
+            Tag.objects.filter(recipe_tags__recipe__in=self.object_list.values("pk"))
+            .annotate(recipe_count=models.Count("recipe_tags"))
+            .order_by("-recipe_count", "name")[:15]
+        )
+
+    def _tag_facets(self) -> list:
+        """The 15 most used tags among the results, with their recipe counts."""
+        key = self._facets_key()
+        facets = cache.get(key)
+        if facets is None:
+            facets = list(self._facets_queryset())
+            cache.set(key, facets, caching.page_cache_timeout())
+        return facets
+
+    async def _atag_facets(self) -> list:
+        key = self._facets_key()
+        facets = cache.get(key)
+        if facets is None:
+            facets = [tag async for tag in self._facets_queryset()]
+            cache.set(key, facets, caching.page_cache_timeout())
+        return facets
+
+    def get_context_data(self, **kwargs):
+        """Add page links and tag facets (tag name + recipe count) for the results."""
+        context = super().get_context_data(**kwargs)
+        context.update(self._page_links(context.get("page_obj")))
+        context["tag_facets"] = self._tag_facets()
+        context["sort_links"] = self._sort_links()
+        context["current_tag"] = slugify(self.request.GET.get("tag") or "")
+        context["fragment_cache_timeout"] = caching.fragment_timeout()
+        return context
+
+
+@method_decorator(
+    caching.anonymous_page_cache("list", query_params=LIST_QUERY_PARAMS),
+    name="dispatch",
+)
+class RecipeListView(RecipeListBase):
+    """The recipe list, served synchronously (WSGI)."""
+
+    def get(self, request, *args, **kwargs):
+        """Answer conditional requests before querying, else render as usual."""
+        validators = conditional.for_list(request)
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        return validators.not_modified(request) or validators.apply(
+            super().get(request, *args, **kwargs)
+        )
+
+
+async def _aload_user(request):
+    """Resolve the lazy ``request.user`` without querying on the event loop.
+
+    Loading the user (and with it the session, which also holds flash
+    messages) may query the database, so it runs in a worker thread;
+    without a session cookie there is nothing to load and no thread hop.
+    Staff also get their pending counts fetched for the context processor.
+    """
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        await sync_to_async(lambda: request.user.is_authenticated)()
+    user = request.user
+    if user.is_authenticated and user.is_staff and getattr(request, "pending_counts", None) is None:
+        request.pending_counts = await pending.aget_counts()
+    return user
+
+
+@method_decorator(
+    caching.anonymous_page_cache("list", query_params=LIST_QUERY_PARAMS),
+    name="dispatch",
+)
+class AsyncRecipeListView(RecipeListBase):
+    """The recipe list for ASGI mode, querying with the async ORM.
+
+    Builds the same context as :class:`RecipeListView` and renders it on
+    the event loop.  Django 4.2's async ORM still runs each query in a
+    thread, but only for the query: nothing holds a thread while the
+    request waits its turn or the response is written to a slow client.
+    """
+
+    # declared async so the page-cache decorator wraps it as a coroutine
+    async def dispatch(self, request, *args, **kwargs):
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def _apaginate(self, queryset, page_size):
+        if self.pagination_mode == "cursor":
+            paginator = self._cursor_paginator(queryset, page_size)
+            try:
+                page = await paginator.apage(self.request.GET.get("cursor"))
+            except InvalidCursor:
+                raise Http404("Invalid page cursor.")
+            return paginator, page, page.has_other_pages()
+
+        paginator = self.get_paginator(queryset, page_size)
+        paginator.count = await queryset.acount()  # would otherwise run on first use
+        number = self.request.GET.get(self.page_kwarg) or 1
+        try:
+            number = paginator.num_pages if number == "last" else int(number)
+            page = paginator.page(number)
+        except (ValueError, InvalidPage) as e:
+            raise Http404(f"Invalid page ({number}): {e}")
+        page.object_list = [recipe async for recipe in page.object_list]
+        return paginator, page, page.has_other_pages()
+
+    async def get(self, request, *args, **kwargs):
+        await _aload_user(request)
+        await caching.alist_generation(request)
+        validators = conditional.for_list(request)
+        if validators is not None and (response := validators.not_modified(request)):
+            return response
+        self.object_list = self.get_queryset()
+        paginator, page, is_paginated = await self._apaginate(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        context = {
+            "view": self,
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": is_paginated,
+            "object_list": page.object_list,
+            self.context_object_name: page.object_list,
+            **self._page_links(page),
+            "tag_facets": await self._atag_facets(),
+            "sort_links": self._sort_links(),
+            "current_tag": slugify(request.GET.get("tag") or ""),
+            "fragment_cache_timeout": caching.fragment_timeout(),
+        }
+        response = self.render_to_response(context).render()
+        return validators.apply(response) if validators is not None else response
+
+
+def _detail_queryset(request):
+    """Recipes with their author, their newest approved comment's time (for
+    the conditional GET validators) and, for members, the member's own stars."""
+    newest_comment = (
+        Comment.objects.filter(recipe=models.OuterRef("pk"), approved=True)
+        .order_by("-created_at")
+        .values("created_at")[:1]
+    )
+    recipes = Recipe.objects.select_related("author").annotate(
+        last_comment_at=models.Subquery(newest_comment)
+    )
+    if request.user.is_authenticated:
+        own_stars = Rating.objects.filter(recipe=models.OuterRef("pk"), user=request.user)
+        recipes = recipes.annotate(user_stars=models.Subquery(own_stars.values("stars")[:1]))
+    return recipes
+
+
+def _can_view(user, recipe) -> bool:
+    return recipe.status == "published" or user.is_staff or recipe.author == user
+
+
+def _detail_response(request, recipe, comments, form, edit_comment_id=None):
+    return render(
+        request,
+        "recipes/recipe_detail.html",
+        {
+            "recipe": recipe,
+            "user_stars": getattr(recipe, "user_stars", None),
+            "comments": comments,
+            "comments_next_url": _comments_page_url(recipe, comments),
+            "comment_form": form,
+            "edit_comment_id": edit_comment_id,
+            "fragment_cache_timeout": caching.fragment_timeout(),
+        },
+    )
 
 
+@caching.anonymous_page_cache("detail")
 def recipe_detail(request, slug):
-    """Render the detail page for a single recipe with comments and ratings."""
-    recipe = get_object_or_404(Recipe, slug=slug)
-    if recipe.status != "published" and (
-        not request.user.is_staff and recipe.author != request.user
-    ):
+    """Render the detail page for a single recipe with comments and ratings.
+
+    The page costs a fixed number of queries however many comments there
+    are: the recipe comes with its author and the visitor's own stars (the
+    averages are stored counters), and the comments with their authors.
+    """
+    recipe = get_object_or_404(_detail_queryset(request), slug=slug)
+    if not _can_view(request.user, recipe):
         return redirect("recipe_list")
-
-    user_rating = None
-    if request.user.is_authenticated:
-        user_rating = Rating.objects.filter(recipe=recipe, user=request.user).first()
+    validators = conditional.for_recipe(request, recipe) if request.method == "GET" else None
+    if validators is not None and (response := validators.not_modified(request)):
+        return response
 
     # Ensure a comment form is always available for rendering and avoid
     # UnboundLocalError when an unexpected POST is received (e.g. empty
@@ -78,6 +350,8 @@ def recipe_detail(request, slug):
             Rating.objects.update_or_create(
                 recipe=recipe, user=request.user, defaults={"stars": stars}
             )
+            # the rating counters already moved the list pages on (recipes.counters)
+            caching.purge_recipe_page(recipe.slug)
             # use a message tag to indicate this is a rating so the frontend shows a stars modal
             messages.success(request, str(stars), extra_tags="rating")
             return redirect("recipe_detail", slug=recipe.slug)
@@ -97,12 +371,15 @@ def recipe_detail(request, slug):
                     except (Comment.DoesNotExist, ValueError):
                         messages.error(request, "Comment not found.")
                         return redirect("recipe_detail", slug=recipe.slug)
-                    if existing.user != request.user:
+                    if existing.user_id != request.user.pk:
                         messages.error(request, "You don't have permission to edit that comment.")
                         return redirect("recipe_detail", slug=recipe.slug)
+                    was_visible = existing.approved
                     existing.body = form.cleaned_data["body"]
                     existing.approved = False  # require re-approval after edit
                     existing.save()
+                    if was_visible:
+                        caching.purge_recipe_page(recipe.slug)
                     messages.success(request, "Comment updated and submitted for re-approval.")
                     return redirect("recipe_detail", slug=recipe.slug)
                 else:
@@ -128,7 +405,7 @@ def recipe_detail(request, slug):
         if edit_id and request.user.is_authenticated:
             try:
                 existing = Comment.objects.get(pk=int(edit_id), recipe=recipe)
-                if existing.user == request.user:
+                if existing.user_id == request.user.pk:
                     form = CommentForm(instance=existing)
                     # pass edit id to template via form.initial is not enough, set variable below
                     edit_comment_id = str(existing.pk)
@@ -142,21 +419,107 @@ def recipe_detail(request, slug):
             form = CommentForm()
             edit_comment_id = None
 
-    comments = recipe.comments.filter(approved=True).order_by("created_at")
+    comments = _comment_paginator(recipe).page()
+    response = _detail_response(
+        request, recipe, comments, form, locals().get('edit_comment_id', None)
+    )
+    return validators.apply(response) if validators is not None else response
 
-    return render(
-        request,
-        "recipes/recipe_detail.html",
-        {
-            "recipe": recipe,
-            "user_rating": user_rating,
-            "comments": comments,
-            "comment_form": form,
-            "edit_comment_id": locals().get('edit_comment_id', None),
-        },
+
+@caching.anonymous_page_cache("detail")
+async def async_recipe_detail(request, slug):
+    """:func:`recipe_detail` for ASGI mode: GETs are served with the async ORM.
+
+    POSTs (ratings and comments) are rare next to reads and go through the
+    synchronous view in a worker thread.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return await sync_to_async(recipe_detail)(request, slug)
+    user = await _aload_user(request)
+    try:
+        recipe = await _detail_queryset(request).aget(slug=slug)
+    except Recipe.DoesNotExist:
+        raise Http404("No Recipe matches the given query.")
+    if not _can_view(user, recipe):
+        return redirect("recipe_list")
+    validators = conditional.for_recipe(request, recipe)
+    if validators is not None and (response := validators.not_modified(request)):
+        return response
+
+    form, edit_comment_id = CommentForm(), None
+    edit_id = request.GET.get("edit")
+    if edit_id and user.is_authenticated:
+        try:
+            existing = await Comment.objects.filter(pk=int(edit_id), recipe=recipe).afirst()
+        except ValueError:
+            existing = None
+        if existing is not None and existing.user_id == user.pk:
+            form, edit_comment_id = CommentForm(instance=existing), str(existing.pk)
+
+    comments = await _comment_paginator(recipe).apage()
+    response = _detail_response(request, recipe, comments, form, edit_comment_id)
+    return validators.apply(response) if validators is not None else response
+
+
+def _comment_paginator(recipe):
+    """Approved comments of ``recipe``, oldest first, a page at a time."""
+    return CursorPaginator(
+        recipe.comments.filter(approved=True).select_related("user"),
+        per_page=settings.RECIPE_COMMENTS_PER_PAGE,
+        ordering=["created_at", "id"],
     )
 
 
+def _comments_page_url(recipe, page):
+    """URL of the comments page after ``page``, or None on the last one."""
+    if not page.has_next():
+        return None
+    url = reverse("recipe_comments", args=[recipe.slug])
+    return f"{url}?{urlencode({'cursor': page.next_cursor})}"
+
+
+def recipe_comments(request, slug):
+    """Return a further page of a recipe's comments (HTML or JSON).
+
+    The detail page renders the first page itself and links here for the
+    rest.  Its script asks with ``X-Requested-With: XMLHttpRequest`` and
+    gets the bare list items, with the next page's URL in ``X-Next-Page``;
+    following the link without JavaScript gives a full page that links on
+    to the next.  ``?format=json`` returns the same page as data.
+    """
+    recipe = get_object_or_404(Recipe.objects.select_related("author"), slug=slug)
+    if not _can_view(request.user, recipe):
+        raise Http404("No such recipe.")
+    try:
+        page = _comment_paginator(recipe).page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor.")
+    next_url = _comments_page_url(recipe, page)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "comments": [
+                {
+                    "id": c.pk,
+                    "user": c.user.username,
+                    "body": c.body,
+                    "created_at": c.created_at.isoformat(),
+                    "editable": request.user.is_authenticated and c.user_id == request.user.pk,
+                }
+                for c in page
+            ],
+            "next": next_url,
+        })
+    context = {"recipe": recipe, "comments": page, "comments_next_url": next_url}
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        response = render(request, "recipes/_comment_items.html", context)
+        response["X-Next-Page"] = next_url or ""
+    else:
+        response = render(request, "recipes/recipe_comments.html", context)
+    patch_vary_headers(response, ("X-Requested-With",))
+    return response
+
+
 def signup_view(request):
     """Simple signup view that creates a user and logs them in."""
     if request.method == "POST":
@@ -190,17 +553,10 @@ def recipe_create(request):
             recipe = form.save(commit=False)
             # ensure author
             recipe.author = request.user
-            # auto-generate a unique slug if not provided
-            base = slugify(recipe.title)[:200]
-            slug = base
-            i = 1
-            while Recipe.objects.filter(slug=slug).exists():
-                slug = f"{base}-{i}"
-                i += 1
-            recipe.slug = slug
             # always save user submissions as draft for admin approval
             recipe.status = "draft"
-            recipe.save()
+            # auto-generate a unique slug from the title
+            slugs.save_with_unique_slug(recipe)
             messages.success(request, "Recipe submitted — pending admin approval.")
             return redirect("recipe_detail", slug=recipe.slug)
         else:
@@ -227,6 +583,7 @@ def recipe_edit(request, slug):
             # edits by non-staff require admin approval
             updated.status = "draft"
             updated.save()
+            caching.purge_recipe_pages(updated.slug)
             messages.success(request, "Recipe updated — submitted for re-approval.")
             return redirect("recipe_detail", slug=updated.slug)
         else:
@@ -245,6 +602,7 @@ def recipe_delete(request, slug):
 
     if request.method == "POST":
         recipe.delete()
+        caching.purge_recipe_pages(slug)
         messages.success(request, "Recipe deleted.")
         return redirect("recipe_list")
 
@@ -261,9 +619,12 @@ def comment_edit(request, pk):
     if request.method == "POST":
         form = CommentForm(request.POST, instance=comment)
         if form.is_valid():
+            was_visible = comment.approved
             comment = form.save(commit=False)
             comment.approved = False  # require admin re-approval
             comment.save()
+            if was_visible:
+                caching.purge_recipe_page(comment.recipe.slug)
             messages.success(request, "Comment updated and submitted for re-approval.")
             return redirect("recipe_detail", slug=comment.recipe.slug)
         else:
@@ -284,20 +645,59 @@ def comment_delete(request, pk):
     if request.method == "POST":
         recipe_slug = comment.recipe.slug
         comment.delete()
+        caching.purge_recipe_page(recipe_slug)
         messages.success(request, "Comment deleted.")
         return redirect("recipe_detail", slug=recipe_slug)
 
     return render(request, "recipes/comment_confirm_delete.html", {"comment": comment})
 
 
+def _moderation_page(request, queryset):
+    """Keyset page of a moderation queue, newest first, and its neighbours' URLs.
+
+    Also returns ``upto``, the highest primary key in the whole queue when
+    it was opened (read on the first page, then carried from page to page),
+    which the "all" actions are limited to so they never touch rows
+    submitted since.
+    """
+    paginator = CursorPaginator(
+        queryset, per_page=settings.RECIPE_MODERATION_PER_PAGE, ordering=["-created_at", "-id"]
+    )
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor.")
+    upto = _moderation_upto(request.GET)
+    if upto is None:
+        upto = queryset.order_by().aggregate(upto=models.Max("pk"))["upto"]
+    previous_url = next_url = None
+    if page.has_previous():
+        previous_url = f"?{urlencode({'cursor': page.previous_cursor, 'upto': upto})}"
+    if page.has_next():
+        next_url = f"?{urlencode({'cursor': page.next_cursor, 'upto': upto})}"
+    return page, previous_url, next_url, upto
+
+
+def _moderation_upto(data):
+    try:
+        return int(data["upto"])
+    except (KeyError, ValueError):
+        return None
+
+
 @login_required
 def pending_recipes(request):
     """Staff view: list recipes awaiting approval (status='draft')."""
     if not request.user.is_staff:
         messages.error(request, "You don't have permission to view that page.")
         return redirect("recipe_list")
-    recipes = Recipe.objects.filter(status="draft").order_by("-created_at")
-    return render(request, "recipes/pending_recipes.html", {"recipes": recipes})
+    page, previous_url, next_url, upto = _moderation_page(
+        request, Recipe.objects.filter(status="draft").select_related("author")
+    )
+    return render(request, "recipes/pending_recipes.html", {
+        "recipes": page, "previous_page_url": previous_url, "next_page_url": next_url,
+        "upto": upto,
+    })
 
 
 @login_required
@@ -306,8 +706,105 @@ def pending_comments(request):
     if not request.user.is_staff:
         messages.error(request, "You don't have permission to view that page.")
         return redirect("recipe_list")
-    comments = Comment.objects.filter(approved=False).order_by("-created_at")
-    return render(request, "recipes/pending_comments.html", {"comments": comments})
+    page, previous_url, next_url, upto = _moderation_page(
+        request, Comment.objects.filter(approved=False).select_related("recipe", "user")
+    )
+    return render(request, "recipes/pending_comments.html", {
+        "comments": page, "previous_page_url": previous_url, "next_page_url": next_url,
+        "upto": upto,
+    })
+
+
+def _bulk_moderate(request, queue, pending_queryset, actions):
+    """Shared POST handling for the bulk moderation forms.
+
+    ``action`` is ``approve``/``reject`` for the ticked ``ids`` or
+    ``approve_all``/``reject_all`` for everything still pending up to the
+    posted ``upto`` primary key (see :func:`_moderation_page`), so rows
+    submitted after the queue was opened are left for the next look.
+    Returns ``(action, rows changed)``, or None after adding an error
+    message.
+    """
+    name, _, scope = request.POST.get("action", "").partition("_")
+    if name not in actions or scope not in ("", "all"):
+        messages.error(request, "Unknown moderation action.")
+        return None
+    if scope == "all":
+        upto = _moderation_upto(request.POST)
+        if upto is None:
+            messages.error(request, f"Reload the {queue} queue and try again.")
+            return None
+        ids = pending_queryset.filter(pk__lte=upto).values_list("pk", flat=True)
+    else:
+        try:
+            ids = [int(pk) for pk in request.POST.getlist("ids")]
+        except ValueError:
+            ids = []
+        if not ids:
+            messages.error(request, f"Select at least one {queue} first.")
+            return None
+    return name, actions[name](ids)
+
+
+@login_required
+def bulk_moderate_comments(request):
+    """Approve or reject many pending comments in one POST."""
+    if not request.user.is_staff:
+        messages.error(request, "You don't have permission to perform that action.")
+        return redirect("recipe_list")
+    if request.method == "POST":
+        result = _bulk_moderate(request, "comment", Comment.objects.filter(approved=False), {
+            "approve": moderation.approve_comments, "reject": moderation.reject_comments,
+        })
+        if result:
+            name, done = result
+            verb = "approved" if name == "approve" else "rejected and removed"
+            messages.success(request, f"{done} comment{pluralize(done)} {verb}.")
+    return redirect("pending_comments")
+
+
+@login_required
+def bulk_moderate_recipes(request):
+    """Approve or reject many draft recipes in one POST."""
+    if not request.user.is_staff:
+        messages.error(request, "You don't have permission to perform that action.")
+        return redirect("recipe_list")
+    if request.method == "POST":
+        result = _bulk_moderate(request, "recipe", Recipe.objects.filter(status="draft"), {
+            "approve": moderation.approve_recipes, "reject": moderation.reject_recipes,
+        })
+        if result:
+            name, done = result
+            verb = "approved and published" if name == "approve" else "rejected and removed"
+            messages.success(request, f"{done} recipe{pluralize(done)} {verb}.")
+    return redirect("pending_recipes")
+
+
+@login_required
+def export_recipes(request):
+    """Staff view: stream the catalogue as NDJSON (default) or ``?format=csv``.
+
+    ``?status=published`` or ``?status=draft`` limits the export.  Lines are
+    sent as they are read (see :mod:`recipes.export`), so the download
+    starts at once and the server never holds the whole catalogue.
+    """
+    if not request.user.is_staff:
+        messages.error(request, "You don't have permission to view that page.")
+        return redirect("recipe_list")
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest("Unknown export format.")
+    queryset = Recipe.objects.all()
+    status = request.GET.get("status")
+    if status:
+        queryset = queryset.filter(status=status)
+    response = StreamingHttpResponse(
+        export.buffered(export.render(export.iter_records(queryset), fmt)),
+        content_type=f"{export.FORMATS[fmt]}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="recipes.{fmt}"'
+    response["Cache-Control"] = "no-store"
+    return response
 
 
 @login_required
@@ -320,6 +817,7 @@ def approve_recipe(request, slug):
     if request.method == "POST":
         recipe.status = "published"
         recipe.save()
+        caching.purge_recipe_pages(recipe.slug)
         messages.success(request, f"Recipe '{recipe.title}' approved and published.")
         return redirect("pending_recipes")
     return render(request, "recipes/pending_action_confirm.html", {"object": recipe, "type": "recipe", "action": "approve"})
@@ -334,6 +832,7 @@ def reject_recipe(request, slug):
     recipe = get_object_or_404(Recipe, slug=slug)
     if request.method == "POST":
         recipe.delete()
+        caching.purge_recipe_pages(slug)
         messages.success(request, f"Recipe '{recipe.title}' rejected and removed.")
         return redirect("pending_recipes")
     return render(request, "recipes/pending_action_confirm.html", {"object": recipe, "type": "recipe", "action": "reject"})
@@ -349,6 +848,7 @@ def approve_comment(request, pk):
     if request.method == "POST":
         comment.approved = True
         comment.save()
+        caching.purge_recipe_page(comment.recipe.slug)
         messages.success(request, "Comment approved.")
         return redirect("pending_comments")
     return render(request, "recipes/pending_action_confirm.html", {"object": comment, "type": "comment", "action": "approve"})
@@ -1,14 +1,27 @@
-"""Security-related middleware for HTTP response headers.
+"""Project middleware: security headers and request timing.
 
-This lightweight middleware adds conservative security headers such as
+``SecurityHeadersMiddleware`` adds conservative security headers such as
 ``X-Content-Type-Options`` and a minimal ``Permissions-Policy``.  The goal
 is to improve default security without breaking common third-party
-resources (for example, Cloudinary-hosted images).
+resources (for example, Cloudinary-hosted images).  It is intentionally
+small and safe to enable in production.
 
-The middleware is intentionally small and safe to enable in production.
+``RequestTimingMiddleware`` reports per-request query counts, database,
+template and wall time via ``Server-Timing`` and logs slow requests.
 """
 
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
 
 
 class SecurityHeadersMiddleware:
@@ -16,10 +29,16 @@ class SecurityHeadersMiddleware:
 
     The middleware intentionally uses ``response.setdefault`` so it does
     not override headers set earlier by other middleware or the application.
+    It runs natively in both sync (WSGI) and async (ASGI) chains.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
         """Apply headers to the response before returning it.
@@ -30,9 +49,15 @@ class SecurityHeadersMiddleware:
         Returns:
             HttpResponse with additional security headers set.
         """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(self.get_response(request))
 
-        response = self.get_response(request)
+    async def __acall__(self, request):
+        return self.add_headers(await self.get_response(request))
 
+    def add_headers(self, response):
+        """Set the headers on ``response`` unless already present and return it."""
         # Prevent MIME-sniffing
         response.setdefault("X-Content-Type-Options", "nosniff")
 
@@ -49,3 +74,146 @@ class SecurityHeadersMiddleware:
         response.setdefault("X-XSS-Protection", "1; mode=block")
 
         return response
+
+
+class RequestTimingMiddleware:
+    """Measure where each request's time goes and report it.
+
+    Records the number of SQL queries, the time spent in the database, the
+    time spent rendering templates and the total wall time.  The figures are
+    sent to the browser as a ``Server-Timing`` header (visible in the
+    devtools network panel) and, when the request takes longer than
+    ``SLOW_REQUEST_THRESHOLD_MS``, written as one structured entry to the
+    ``recipesite.performance`` logger together with the resolved URL name.
+
+    Template time includes any queries run lazily while rendering, so the
+    numbers overlap rather than add up to the total.
+
+    Disabled unless ``REQUEST_TIMING_ENABLED`` is set; Django then drops the
+    middleware from the chain entirely, so it costs nothing.  Like
+    ``SecurityHeadersMiddleware`` it runs natively in both sync and async
+    chains, so it adds no thread hop in front of the async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed("REQUEST_TIMING_ENABLED is off")
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.threshold_ms = getattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 500)
+        _instrument_templates()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = _RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with timings.wrap_connections():
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.report(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings = _RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            # the async ORM runs queries in threads that share these connections
+            with timings.wrap_connections():
+                response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.report(request, response, timings, start)
+
+    def report(self, request, response, timings, start):
+        """Add the ``Server-Timing`` header and log the request if it was slow."""
+        total_ms = (time.perf_counter() - start) * 1000
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries"',
+                f"tpl;dur={timings.template_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ]
+        )
+        if total_ms >= self.threshold_ms:
+            match = getattr(request, "resolver_match", None)
+            entry = {
+                "method": request.method,
+                "path": request.path,
+                "url_name": match.view_name if match else None,
+                "status": response.status_code,
+                "queries": timings.queries,
+                "db_ms": round(timings.db_ms, 1),
+                "template_ms": round(timings.template_ms, 1),
+                "total_ms": round(total_ms, 1),
+            }
+            performance_logger.warning(
+                "Slow request: %s", json.dumps(entry, sort_keys=True), extra=entry
+            )
+        return response
+
+
+performance_logger = logging.getLogger("recipesite.performance")
+
+# Timings of the request being handled in this thread/task (None if untimed).
+_current_timings = ContextVar("request_timings", default=None)
+
+
+class _RequestTimings:
+    """Accumulators for one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def wrap_connections(self) -> ExitStack:
+        """Time every query on every database connection until the stack exits."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self.sql_wrapper))
+        return stack
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+
+def _instrument_templates():
+    """Wrap ``Template.render`` once so renders are timed for timed requests.
+
+    Only outermost renders are counted; ``{% include %}`` and
+    ``{% extends %}`` render nested templates inside them.
+    """
+    if getattr(Template.render, "_request_timing", False):
+        return
+    original = Template.render
+
+    @wraps(original)
+    def render(self, context):
+        timings = _current_timings.get()
+        if timings is None:
+            return original(self, context)
+        timings.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_ms += (time.perf_counter() - start) * 1000
+
+    render._request_timing = True
+    Template.render = render
@@ -66,6 +66,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover every other middleware too
+    'recipesite.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'recipesite.middleware.SecurityHeadersMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -77,7 +79,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'recipesite.urls'
+# Per-request Server-Timing header and slow-request log (off by default;
+# the middleware removes itself when disabled).
+REQUEST_TIMING_ENABLED = os.environ.get("REQUEST_TIMING_ENABLED", "False").lower() in ("1", "true", "yes")
+SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 500))
+
+# ASGI mode: serve the recipe list and detail pages with async views (run
+# under an ASGI server, see "ASGI mode" in the README).
+RECIPE_ASYNC_VIEWS = os.environ.get("RECIPE_ASYNC_VIEWS", "False").lower() in ("1", "true", "yes")
+
+ROOT_URLCONF = 'recipesite.urls_async' if RECIPE_ASYNC_VIEWS else 'recipesite.urls'
 
 TEMPLATES = [
     {
@@ -124,6 +135,63 @@ else:
         }
     }
 
+# Cache
+# A shared Redis cache is used when REDIS_URL is set (e.g. the Heroku Redis
+# add-on); otherwise each process keeps its own in-memory cache.
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Lifetime of cached recipe card/detail fragments.  Entries are keyed on
+# Recipe.cache_version, so this only bounds memory, not staleness.
+RECIPE_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get("RECIPE_FRAGMENT_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# Lifetime of whole cached pages served to logged-out visitors.  The views
+# purge them on publish/edit/delete; this bounds staleness for other writes
+# (0 effectively disables the page cache).
+RECIPE_PAGE_CACHE_TIMEOUT = int(os.environ.get("RECIPE_PAGE_CACHE_TIMEOUT", 300))
+
+# Comments shown per page on the recipe page; further pages load on demand.
+RECIPE_COMMENTS_PER_PAGE = int(os.environ.get("RECIPE_COMMENTS_PER_PAGE", 20))
+
+# JSON API (recipes.api): default and largest ?limit=, and how long clients
+# and shared caches may reuse a response without revalidating it.
+RECIPE_API_PAGE_SIZE = int(os.environ.get("RECIPE_API_PAGE_SIZE", 20))
+RECIPE_API_MAX_PAGE_SIZE = int(os.environ.get("RECIPE_API_MAX_PAGE_SIZE", 100))
+RECIPE_API_MAX_AGE = int(os.environ.get("RECIPE_API_MAX_AGE", 60))
+
+# "Top rated" score (recipes.counters): each recipe's stars are averaged
+# with RECIPE_TOP_PRIOR_WEIGHT imaginary ratings of RECIPE_TOP_PRIOR_MEAN
+# stars, so a few votes cannot outrank many.  Changing either only affects
+# stored scores after `manage.py recount`.
+RECIPE_TOP_PRIOR_MEAN = float(os.environ.get("RECIPE_TOP_PRIOR_MEAN", 3.5))
+RECIPE_TOP_PRIOR_WEIGHT = int(os.environ.get("RECIPE_TOP_PRIOR_WEIGHT", 10))
+
+# Rows per page in the staff moderation queues.
+RECIPE_MODERATION_PER_PAGE = int(os.environ.get("RECIPE_MODERATION_PER_PAGE", 50))
+
+# The staff navbar's pending counts live in the cache and are adjusted on
+# every moderation change; they are recounted from the database this often.
+RECIPE_PENDING_COUNTS_TIMEOUT = int(os.environ.get("RECIPE_PENDING_COUNTS_TIMEOUT", 60 * 10))
+
+# Widths (px) of the responsive copies made of each recipe image; changing
+# this only affects existing images after `manage.py generate_image_variants --force`.
+RECIPE_IMAGE_WIDTHS = tuple(
+    int(w) for w in os.environ.get("RECIPE_IMAGE_WIDTHS", "320,640,960,1280").split(",") if w.strip()
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -206,6 +274,10 @@ else:
 
 WHITENOISE_USE_FINDERS = True
 
+# Recipe list pagination: "offset" (?page=, with page count) or "cursor"
+# (?cursor=, keyset seek with no COUNT(*); cheap at any depth).
+RECIPE_LIST_PAGINATION = os.environ.get("RECIPE_LIST_PAGINATION", "offset")
+
 # Redirect after login/logout (avoid default /accounts/profile/)
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
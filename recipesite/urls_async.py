@@ -0,0 +1,14 @@
+"""Root URLconf for ASGI mode (``RECIPE_ASYNC_VIEWS``).
+
+The recipe list and detail pages are served by their async views; every
+other route, and every URL name, is the same as in ``recipesite.urls``.
+"""
+from django.urls import include, path
+
+from recipes import views
+
+urlpatterns = [
+    path("", views.AsyncRecipeListView.as_view(), name="recipe_list"),
+    path("recipe/<slug:slug>/", views.async_recipe_detail, name="recipe_detail"),
+    path("", include("recipesite.urls")),
+]